@@ -1,16 +1,27 @@
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
 
+from service import responder
+from service.llm import llamacpp_api, py_hf
 from service.responder import generate_response
 
 app = FastAPI()
 
 
+@app.on_event("startup")
+async def warmup_models():
+    llamacpp_api.warmup()
+    if responder.llm_provider == "hf":
+        py_hf.warmup()
+
+
 @app.post("/chat")
 async def chat(request: Request):
     body = await request.json()
     message = body.get("message", "")
-    return {"response": generate_response(message)}
+    # Off the event loop, so concurrent requests can reach the provider together (and share HF batches)
+    return {"response": await run_in_threadpool(generate_response, message)}
 
 
 def start_fastapi():
@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from llama_cpp import Llama
+
+# Settings for bindings mode; override through environment variables
+N_THREADS = int(os.getenv("LLAMA_N_THREADS", "6"))
+N_CTX = int(os.getenv("LLAMA_N_CTX", "2048"))
+N_BATCH = int(os.getenv("LLAMA_N_BATCH", "512"))
+INSTANCES = int(os.getenv("LLAMA_INSTANCES", "1"))  # resident copies; each serves one request at a time
+IDLE_TIMEOUT = float(os.getenv("LLAMA_IDLE_TIMEOUT", "600"))  # seconds idle before unloading (0 = never)
+
+
+class LlamaResidency:
+    """
+    Keeps llama.cpp models loaded between calls instead of re-reading the GGUF file every time.
+
+    Up to `instances` models are loaded lazily and lent out one call at a time (a `Llama`
+    object must not be used from two threads at once). A daemon thread unloads the idle
+    models after `idle_timeout` seconds without calls; the next call loads them again.
+    """
+
+    def __init__(self, model_path, n_threads=N_THREADS, n_ctx=N_CTX, n_batch=N_BATCH,
+                 instances=INSTANCES, idle_timeout=IDLE_TIMEOUT):
+        self.model_path = model_path
+        self.n_threads = n_threads
+        self.n_ctx = n_ctx
+        self.n_batch = n_batch
+        self.instances = max(1, instances)
+        self.idle_timeout = idle_timeout
+
+        self._idle = queue.LifoQueue()
+        self._loaded = 0
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._reaper = None
+
+    @contextmanager
+    def acquire(self):
+        llm = None
+        while llm is None:
+            try:
+                llm = self._idle.get_nowait()
+                break
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                reserve = self._loaded < self.instances
+                if reserve:
+                    self._loaded += 1
+            if reserve:
+                try:
+                    llm = self._load()
+                except Exception:
+                    with self._lock:
+                        self._loaded -= 1
+                    raise
+                break
+
+            try:
+                llm = self._idle.get(timeout=1.0)  # all instances busy: wait for one
+            except queue.Empty:
+                continue
+
+        self._last_used = time.monotonic()
+        try:
+            yield llm
+        finally:
+            self._last_used = time.monotonic()
+            self._idle.put(llm)
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        with self.acquire() as llm:
+            response = llm(prompt=prompt, **kwargs)
+        return response["choices"][0]["text"]
+
+    def warmup(self):
+        """Load one instance in the background so the first call does not pay for it."""
+
+        def load():
+            try:
+                with self.acquire():
+                    pass
+            except Exception as e:
+                print(f"[ERROR] llama.cpp warm-up failed: {e}")
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def unload(self) -> int:
+        dropped = []
+        while True:
+            try:
+                dropped.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._loaded -= len(dropped)
+        for llm in dropped:
+            if hasattr(llm, "close"):
+                llm.close()
+        if dropped:
+            print(f"[INFO] Unloaded {len(dropped)} idle llama.cpp model(s)")
+        return len(dropped)
+
+    def _load(self):
+        started = time.perf_counter()
+        llm = Llama(model_path=self.model_path, n_threads=self.n_threads, n_ctx=self.n_ctx, n_batch=self.n_batch,
+                    verbose=False)
+        print(f"[INFO] Loaded {self.model_path} in {time.perf_counter() - started:.1f}s")
+        with self._lock:
+            if self.idle_timeout > 0 and (self._reaper is None or not self._reaper.is_alive()):
+                self._reaper = threading.Thread(target=self._reap, daemon=True)
+                self._reaper.start()
+        return llm
+
+    def _reap(self):
+        interval = min(30.0, max(1.0, self.idle_timeout / 4))
+        while True:
+            time.sleep(interval)
+            if self._loaded and time.monotonic() - self._last_used >= self.idle_timeout:
+                self.unload()
+
+
+_residencies = {}
+_residencies_lock = threading.Lock()
+
+
+def get_llama_residency(model_path: str) -> LlamaResidency:
+    """Process-wide residency manager for a model file."""
+    with _residencies_lock:
+        if model_path not in _residencies:
+            _residencies[model_path] = LlamaResidency(model_path)
+        return _residencies[model_path]
@@ -2,7 +2,8 @@ import subprocess
 import threading
 from typing import List
 import requests
-from llama_cpp import Llama
+
+from service.llm.llama_residency import get_llama_residency
 
 LLAMA_CLI = r"C:\Users\lugr\Desktop\lgro\git\llama.cpp\build-x64-windows-msvc-release\bin\llama-cli.exe"
 MODEL_PATH = r"C:\Users\lugr\Desktop\lgro\git\llama.cpp\models\mistral-7b-instruct-v0.1-q4_k_m.gguf"
@@ -88,16 +89,17 @@ def call_llama_server(prompt: str) -> str:
 
 
 def call_llama_bindings(prompt: str) -> str:
-    llm = Llama(
-        model_path=MODEL_PATH,
-        n_threads=6,
-        n_ctx=2048
-    )
-    response = llm(
-        prompt=prompt,
+    # The model is loaded once and kept resident (see llama_residency)
+    return get_llama_residency(MODEL_PATH).generate(
+        prompt,
         max_tokens=150,
         temperature=0.7,
         top_k=40,
         top_p=0.9
     )
-    return response["choices"][0]["text"]
+
+
+def warmup():
+    """Load the bindings-mode model ahead of the first request."""
+    if mode == "bindings":
+        get_llama_residency(MODEL_PATH).warmup()
@@ -1,18 +1,157 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
 import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+# Settings for in-process generation; override through environment variables
+MODEL_ID = os.getenv("HF_MODEL_ID", "tiiuae/falcon-rw-1b")
+DEVICE = os.getenv("HF_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
+NUM_THREADS = int(os.getenv("HF_NUM_THREADS", "0"))  # torch CPU threads (0 = torch default)
+MAX_NEW_TOKENS = int(os.getenv("HF_MAX_NEW_TOKENS", "100"))
+MAX_BATCH_SIZE = int(os.getenv("HF_MAX_BATCH_SIZE", "8"))  # prompts generated together in one batch
+MAX_WAIT_MS = float(os.getenv("HF_MAX_WAIT_MS", "20"))  # how long the first prompt waits for others to join
+TIMEOUT = float(os.getenv("HF_TIMEOUT", "300"))  # seconds a caller waits for its answer
+
+
+class HFBatcher:
+    """
+    Micro-batching generation server for a Hugging Face causal LM.
+
+    Callers hand prompts to a queue and wait. A single worker thread takes the first waiting
+    prompt, collects more for up to `max_wait_ms` (or until `max_batch_size` are waiting),
+    left-pads them into one batch and runs a single `model.generate` for all of them, then
+    hands every caller its own completion. Under concurrency the per-call cost is shared, so
+    aggregate tokens/sec grows with the number of callers instead of staying flat.
+    The model is loaded by the worker on the first request.
+    """
+
+    def __init__(self, model_id=MODEL_ID, device=DEVICE, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 max_new_tokens=MAX_NEW_TOKENS):
+        self.model_id = model_id
+        self.device = device
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_new_tokens = max_new_tokens
+
+        self.model = None
+        self.tokenizer = None
+        self._requests = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, prompt: str, max_new_tokens=None) -> Future:
+        """Queue a prompt; the returned future resolves to its completion (prompt not included)."""
+        self._start_worker()
+        future = Future()
+        self._requests.put((prompt, max_new_tokens or self.max_new_tokens, future))
+        return future
+
+    def generate(self, prompt: str, max_new_tokens=None, timeout=TIMEOUT) -> str:
+        return self.submit(prompt, max_new_tokens).result(timeout=timeout)
+
+    def warmup(self):
+        """Load the model in the background so the first request does not pay for it."""
+        self._start_worker()
+        self._requests.put(None)
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._serve, name="hf-batcher", daemon=True)
+                self._worker.start()
+
+    def _load(self):
+        if self.model is not None:
+            return
+        started = time.perf_counter()
+        if self.device == "cpu" and NUM_THREADS > 0:
+            torch.set_num_threads(NUM_THREADS)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+        self.tokenizer.padding_side = "left"  # decoder-only models continue from the right end of each row
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(self.model_id).to(self.device)
+        self.model.eval()
+        print(f"[INFO] Loaded {self.model_id} on {self.device} in {time.perf_counter() - started:.1f}s")
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or `max_wait` has passed."""
+        batch = []
+        first = self._requests.get()
+        if first is not None:
+            batch.append(first)
+        deadline = time.monotonic() + self.max_wait
+        while batch and len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._load()
+            except Exception as e:
+                print(f"[ERROR] Failed to load {self.model_id}: {e}")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                completions = self._generate([prompt for prompt, _, _ in batch],
+                                             [limit for _, limit, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), completion in zip(batch, completions):
+                future.set_result(completion)
+
+    def _generate(self, prompts, limits):
+        """One padded `model.generate` for the whole batch; each row is cut to its caller's token limit."""
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.device)
+        with torch.inference_mode():
+            outputs = self.model.generate(**inputs, max_new_tokens=max(limits),
+                                          pad_token_id=self.tokenizer.pad_token_id)
+        new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+        return [self.tokenizer.decode(row[:limit], skip_special_tokens=True).strip()
+                for row, limit in zip(new_tokens, limits)]
+
 
-model_id = "tiiuae/falcon-rw-1b"
+_batcher = None
+_batcher_lock = threading.Lock()
 
-model = AutoModelForCausalLM.from_pretrained(model_id).to("cuda")
-tokenizer = AutoTokenizer.from_pretrained(model_id)
 
-prompt = "how are you?"
+def get_hf_batcher() -> HFBatcher:
+    """Process-wide batcher for MODEL_ID."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = HFBatcher()
+        return _batcher
 
 
-def hf_call(prompt: str) -> str:
-    inputs = tokenizer(prompt, return_tensors="pt").to("cuda")
-    outputs = model.generate(**inputs, max_new_tokens=100)
-    return tokenizer.decode(outputs[0], skip_special_tokens=True)
+def hf_call(prompt: str, max_new_tokens: int = MAX_NEW_TOKENS) -> str:
+    try:
+        return get_hf_batcher().generate(prompt, max_new_tokens=max_new_tokens)
+    except Exception as e:
+        return f"Hugging Face error: {e}"
 
 
-hf_call(prompt)
+def warmup():
+    """Load the model ahead of the first request."""
+    get_hf_batcher().warmup()
@@ -1,11 +1,11 @@
 from typing import Dict
 
-from service.llm import openai_api, gemini_api, ollama_api, lmstudio_api, llamacpp_api
+from service.llm import openai_api, gemini_api, ollama_api, lmstudio_api, llamacpp_api, py_hf
 
 RESPONSE_TEMPLATE = "Hello {prompt}!"
 
 # Set your provider here (ideally move to a config later)
-llm_provider = "llamacpp"  # Options: openai, gemini, ollama, lmstudio, llamacpp
+llm_provider = "llamacpp"  # Options: openai, gemini, ollama, lmstudio, llamacpp, hf
 
 
 def llm_ask(prompt: str) -> str:
@@ -19,6 +19,9 @@ def llm_ask(prompt: str) -> str:
         return lmstudio_api.lmstudio_call(prompt)
     elif llm_provider == "llamacpp":
         return llamacpp_api.call_llamacpp(prompt)
+    elif llm_provider == "hf":
+        # In-process Hugging Face model; concurrent prompts are generated in shared batches
+        return py_hf.hf_call(prompt)
     else:
         return "Error: Unknown LLM provider."
 
@@ -1,15 +1,25 @@
+import asyncio
+import json
 import uuid
+from typing import Optional
 
+import anyio
 from fastapi import FastAPI, Request, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from api.schemas.chat_schema import ChatRequest
+from helpers.executor import configure_executor, configure_llm_executor, run_in_executor, run_in_llm_executor
 from helpers.logger import setup_logger
+from helpers.single_flight import single_flight_stats
 from helpers.utils import format_rest_response
-from integrations.vectordb.qdrant.qdrant_vectorstore import QdrantVectorStore
+from integrations.llm.admission import AdmissionRejected
+from integrations.llm.providers.client_pool import configure_client_pool
+from integrations.llm.providers.llama_residency import configure_llama_residency
+from integrations.embeddings.embedding_cache import embedding_cache_stats
+from integrations.vectordb.vectorstore_factory import create_vector_store
 from service.agent_ai import AgentAI
 from service.hello_service import HelloService
 from service.text_chunking import TextChunkingService
@@ -21,14 +31,59 @@ def create_fastapi_app(config):
     app = FastAPI()
     app.state.config = config
     cors_setup(app)
+    # Blocking work (LLM calls, chunking, embedding) runs here so the event loop stays free
+    executor = configure_executor(config)
+    # Keep-alive sessions and SDK clients shared by every LLM call
+    client_pool = configure_client_pool(config)
+    # Resident llama.cpp models for bindings mode (warmed up in the background when configured)
+    llama_residency = configure_llama_residency(config)
 
     hello_service = HelloService(config)
     templates = Jinja2Templates(directory='templates')
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
-    agent = AgentAI(config)
+    # One store for the routes and the agent, so /chat sees what /add-to-qdrant inserted
+    vector_store = create_vector_store(config, use_async=True)
+    agent = AgentAI(config, vector_store=vector_store)
     chunker = TextChunkingService(config)
-    vector_store = QdrantVectorStore(config)
+    # /chat answers wait for LLM admission slots in their own pool, sized to the admission queues
+    llm_executor = configure_llm_executor(
+        config, agent.llm.admission.capacity(agent.llm.providers()) if agent.llm.admission else 0)
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        if hasattr(vector_store, "aclose"):
+            await vector_store.aclose()
+        executor.shutdown(wait=False)
+        llm_executor.shutdown(wait=False)
+        client_pool.close()
+        llama_residency.close()
+        if agent.sessions:
+            agent.sessions.flush()
+
+    def overloaded(e: AdmissionRejected) -> HTTPException:
+        return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    def next_token(tokens) -> asyncio.Future:
+        """
+        Pulls the next piece of an answer stream in the LLM executor (None once it is exhausted).
+        """
+        return asyncio.ensure_future(run_in_llm_executor(next, tokens, None))
+
+    async def close_stream(tokens, step: Optional[asyncio.Future] = None):
+        """
+        Closes an answer stream, releasing its admission slot and saving the session turn.
+
+        A client disconnect cancels the request while `step` (a `next`) may still run in its thread,
+        and a generator cannot be closed while it runs, so this waits for it first. The wait and the
+        (blocking) close run shielded from that cancellation, and the close runs in the LLM executor.
+        """
+        with anyio.CancelScope(shield=True):
+            if step is not None:
+                await asyncio.wait([step])
+                if not step.cancelled():
+                    step.exception()  # the piece is discarded; retrieving it keeps asyncio from logging it
+            await run_in_llm_executor(tokens.close)
 
     @app.get("/", response_class=HTMLResponse)
     async def index(request: Request):
@@ -40,14 +95,68 @@ def create_fastapi_app(config):
             user_input = request.message.strip()
             if not user_input:
                 raise HTTPException(status_code=400, detail="Empty message")
-            return JSONResponse(content=format_rest_response(agent.respond(user_input)))
+            response = await run_in_llm_executor(agent.respond, user_input, request.session_id)
+            return JSONResponse(content={**format_rest_response(response), "session_id": request.session_id})
+        except AdmissionRejected as e:
+            raise overloaded(e)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.post("/chat/stream")
+    async def chat_stream(request: ChatRequest):
+        """
+        Server-Sent Events: one `data: {"token": ...}` event per piece of the answer as the LLM
+        produces it, then `event: done` (or `event: error`). A saturated LLM provider is reported
+        as 429/503 before the stream starts.
+        """
+        user_input = request.message.strip()
+        if not user_input:
+            raise HTTPException(status_code=400, detail="Empty message")
+
+        tokens = agent.respond_stream(user_input, request.session_id)
+        # Pull the first piece before answering, so a saturated provider still gets a proper 429/503
+        step = next_token(tokens)
+        try:
+            first = await asyncio.shield(step)
+        except AdmissionRejected as e:
+            await close_stream(tokens, step)
+            raise overloaded(e)
         except Exception as e:
+            await close_stream(tokens, step)
+            logger.exception("Error in /chat/stream route")
             raise HTTPException(status_code=500, detail=str(e))
+        except asyncio.CancelledError:
+            await close_stream(tokens, step)
+            raise
+
+        async def events():
+            step = None
+            try:
+                token = first
+                while token is not None:
+                    yield f"data: {json.dumps({'token': token})}\n\n"
+                    # Each step blocks on the provider, so it runs in the LLM executor like /chat does;
+                    # shielded, so a disconnect leaves it running until close_stream has waited for it
+                    step = next_token(tokens)
+                    token = await asyncio.shield(step)
+                yield "event: done\ndata: {}\n\n"
+            except Exception as e:
+                logger.exception("Error in /chat/stream route")
+                yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            finally:
+                await close_stream(tokens, step)
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
     @app.get("/history")
-    async def get_history():
+    async def get_history(session_id: str):
         try:
-            return JSONResponse(content={"history": agent.get_memories()})
+            return JSONResponse(content={
+                "session_id": session_id,
+                "summary": agent.get_summary(session_id),
+                "history": agent.get_memories(session_id)
+            })
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -59,7 +168,7 @@ def create_fastapi_app(config):
             if not text:
                 raise HTTPException(status_code=400, detail="Missing 'text' in request body")
 
-            chunks = chunker.chunk_text(text)
+            chunks = await run_in_executor(chunker.chunk_text, text)
             return JSONResponse(content={"chunks": chunks})
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
@@ -70,15 +179,16 @@ def create_fastapi_app(config):
         try:
             text = payload.get("text", "").strip()
             document_id = payload.get("document_id", "").strip() or str(uuid.uuid4())
+            tags = payload.get("tags") or []
 
             if not text:
                 raise HTTPException(status_code=400, detail="Missing 'text' in request body")
 
-            chunks = chunker.chunk_text(text)
+            chunks = await run_in_executor(chunker.chunk_text, text)
             if not chunks:
                 raise HTTPException(status_code=400, detail="No chunks generated from input text.")
 
-            inserted_count = vector_store.insert_chunks(document_id, chunks)
+            inserted_count = await vector_store.ainsert_chunks(document_id, chunks, tags=tags)
 
             return JSONResponse(content={
                 "document_id": document_id,
@@ -96,17 +206,81 @@ def create_fastapi_app(config):
             text = payload.get("text", "").strip()
             threshold = float(payload.get("threshold", 0.75))
             limit = int(payload.get("limit", 5))
+            search_effort = payload.get("search_effort")  # hnsw_ef / nprobe for this query
+            filters = payload.get("filters")  # document_id, tags, ingested_after, ingested_before
+            search_mode = payload.get("search_mode")  # dense, sparse or hybrid
+            diversify = payload.get("diversify")  # collapse near-duplicates + MMR; None uses the config
 
             if not text:
                 raise HTTPException(status_code=400, detail="Missing 'text' in request body")
 
-            results = vector_store.search_similar(text, threshold=threshold, limit=limit)
+            results = await vector_store.asearch_similar(
+                text,
+                threshold=threshold,
+                limit=limit,
+                search_effort=int(search_effort) if search_effort is not None else None,
+                filters=filters,
+                search_mode=search_mode,
+                diversify=diversify
+            )
 
             return JSONResponse(content={"results": results})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logger.exception("Error in /search-qdrant route")
             raise HTTPException(status_code=500, detail=str(e))
 
+    @app.post("/search-qdrant/batch")
+    async def search_qdrant_batch(payload: dict = Body(...)):
+        logger.info("Received request to batch-search in Qdrant.")
+        try:
+            # Each query is a string or {"text", "threshold", "limit", "search_effort", "filters",
+            # "search_mode", "diversify"}; missing fields fall back to the top-level values
+            queries = payload.get("queries") or []
+            if not isinstance(queries, list) or not queries:
+                raise HTTPException(status_code=400, detail="Missing 'queries' list in request body")
+
+            results = await vector_store.asearch_similar_many(
+                queries,
+                threshold=float(payload.get("threshold", 0.75)),
+                limit=int(payload.get("limit", 5)),
+                search_effort=payload.get("search_effort"),
+                filters=payload.get("filters"),
+                search_mode=payload.get("search_mode"),
+                diversify=payload.get("diversify")
+            )
+
+            return JSONResponse(content={"results": results})
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.exception("Error in /search-qdrant/batch route")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/stats")
+    async def get_stats():
+        try:
+            return JSONResponse(content={
+                "embedding_cache": embedding_cache_stats(),
+                "vector_store": vector_store.stats(),
+                "executor": executor.stats(),
+                "llm_executor": llm_executor.stats(),
+                "sessions": agent.sessions.stats() if agent.sessions else None,
+                "single_flight": single_flight_stats(),
+                "llm_clients": client_pool.stats(),
+                "llama_residency": llama_residency.stats(),
+                "llm_admission": agent.llm.admission.stats() if agent.llm.admission else None,
+                "llm_routing": agent.llm.router.stats() if agent.llm.router else None,
+                "reranker": agent.reranker.stats() if agent.reranker else None,
+                "semantic_cache": agent.semantic_cache.stats() if agent.semantic_cache else None,
+                "llm_cache": agent.llm.response_cache.stats() if agent.llm.response_cache else None
+            })
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
     return app
 
 
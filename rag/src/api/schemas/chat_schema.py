@@ -1,5 +1,8 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None  # continues the conversation with this ID (multi-turn memory)
@@ -0,0 +1,44 @@
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import synthetic_embeddings, build_store, run_queries, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k of the local IVF index against exact flat search.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--distance", default="COSINE", choices=["COSINE", "DOT", "EUCLID"])
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.rows + args.queries, args.dim)
+    corpus, queries = vectors[:args.rows], vectors[args.rows:]
+
+    with tempfile.TemporaryDirectory() as path:
+        flat = build_store(path, "bench_flat", args.dim, args.distance, {"index": {"type": "flat"}}, corpus)
+        truth, flat_latency = run_queries(flat, queries, args.k)
+
+        started = time.perf_counter()
+        ivf = build_store(path, "bench_ivf", args.dim, args.distance,
+                          {"index": {"type": "ivf", "nlist": args.nlist, "train_size": 0}}, corpus)
+        build_seconds = time.perf_counter() - started
+
+        print(f"rows={args.rows} dim={args.dim} queries={args.queries} k={args.k} distance={args.distance} "
+              f"nlist={ivf.index.nlist} build={build_seconds:.1f}s\n")
+        print(f"| {'search':<12} | recall@{args.k:<3} | ms/query | speed-up |")
+        print(f"|{'-' * 14}|------------|----------|----------|")
+        print(f"| {'exact flat':<12} | {1.0:10.4f} | {flat_latency:8.2f} | {1.0:7.1f}x |")
+
+        for nprobe in args.nprobe:
+            results, latency = run_queries(ivf, queries, args.k, search_effort=nprobe)
+            print(f"| {f'nprobe={nprobe}':<12} | {recall(results, truth):10.4f} | {latency:8.2f} | "
+                  f"{flat_latency / latency:7.1f}x |")
+
+
+if __name__ == "__main__":
+    main()
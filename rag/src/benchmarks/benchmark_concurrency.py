@@ -0,0 +1,83 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+
+PAYLOADS = {
+    "search": ("/search-qdrant", {"text": "What does the knowledge base say about onboarding?", "threshold": 0.0}),
+    "chat": ("/chat", {"message": "Summarise what you know in one sentence."}),
+    "chunk": ("/chunk", {"text": "The quick brown fox jumps over the lazy dog. " * 40}),
+}
+
+
+def post(url: str, body: dict, timeout: float) -> float:
+    """Sends one JSON POST and returns its latency in milliseconds."""
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def probe(url: str, stop: threading.Event, latencies: List[float], interval: float = 0.05):
+    """Polls a cheap GET route while load runs; its latency shows whether the event loop is blocked."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+        latencies.append((time.perf_counter() - started) * 1000)
+        stop.wait(interval)
+
+
+def run_level(url: str, body: dict, clients: int, requests: int, timeout: float,
+              probe_url: str) -> Tuple[float, np.ndarray, List[float]]:
+    stop, probe_latencies = threading.Event(), []
+    prober = threading.Thread(target=probe, args=(probe_url, stop, probe_latencies), daemon=True)
+    prober.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = np.array(list(pool.map(lambda _: post(url, body, timeout), range(requests))))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    prober.join()
+    return requests / elapsed, latencies, probe_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput of a running API as the number of parallel clients grows.")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--route", default="search", choices=sorted(PAYLOADS))
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    path, body = PAYLOADS[args.route]
+    url, probe_url = args.url.rstrip("/") + path, args.url.rstrip("/") + "/stats"
+    post(url, body, args.timeout)  # warm-up: loads models and creates the collection
+
+    print(f"route={path} requests/level={args.requests}\n")
+    print("| clients |   req/s | speed-up | p50 ms | p95 ms | /stats max ms |")
+    print("|---------|---------|----------|--------|--------|---------------|")
+
+    baseline = None
+    for clients in args.clients:
+        throughput, latencies, probe_latencies = run_level(url, body, clients, args.requests, args.timeout,
+                                                           probe_url)
+        baseline = baseline or throughput
+        print(f"| {clients:7d} | {throughput:7.1f} | {throughput / baseline:7.1f}x | "
+              f"{np.percentile(latencies, 50):6.0f} | {np.percentile(latencies, 95):6.0f} | "
+              f"{max(probe_latencies, default=0.0):13.0f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import tempfile
+
+from benchmarks.common import synthetic_embeddings, build_store, run_queries, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency of quantized vs. uncompressed local search.")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--distance", default="COSINE", choices=["COSINE", "DOT", "EUCLID"])
+    parser.add_argument("--oversampling", type=float, default=3.0)
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.rows + args.queries, args.dim)
+    corpus, queries = vectors[:args.rows], vectors[args.rows:]
+
+    modes = [
+        ("float32 (current)", {"type": "none"}),
+        ("int8 scalar + rescore", {"type": "scalar", "oversampling": args.oversampling}),
+        ("int8 scalar, no rescore", {"type": "scalar", "rescore": False}),
+        ("PQ x16 + rescore", {"type": "product", "pq_compression": "x16", "oversampling": args.oversampling}),
+        ("PQ x16, no rescore", {"type": "product", "pq_compression": "x16", "rescore": False}),
+    ]
+
+    with tempfile.TemporaryDirectory() as path:
+        baseline = None
+        print(f"rows={args.rows} dim={args.dim} queries={args.queries} k={args.k} distance={args.distance}\n")
+        print(f"| {'mode':<24} | recall@{args.k:<3} | ms/query | RAM for search |")
+        print(f"|{'-' * 26}|------------|----------|----------------|")
+
+        for i, (name, quantization) in enumerate(modes):
+            store = build_store(path, f"bench_{i}", args.dim, args.distance, {"quantization": quantization}, corpus)
+            results, latency = run_queries(store, queries, args.k)
+            baseline = baseline or results
+            ram = store._codes.nbytes if store._codes is not None else corpus.nbytes
+            print(f"| {name:<24} | {recall(results, baseline):10.4f} | {latency:8.2f} | {ram / 2 ** 20:11.1f} MB |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from integrations.vectordb.local.local_vectorstore import LocalVectorStore
+
+
+def synthetic_embeddings(n: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Clustered, unit-normalised vectors that behave roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_store(path: str, name: str, dim: int, distance: str, local_conf: dict,
+                vectors: np.ndarray) -> LocalVectorStore:
+    """Creates a local collection and loads `vectors` into it, bypassing the embedding model."""
+    config = {
+        "embedding_cache": {"enabled": False},
+        "vectordb": {
+            "search_cache": {"enabled": False},
+            "local": {
+                "path": path,
+                "collection_name": name,
+                "vector_size": dim,
+                "distance": distance,
+                **local_conf
+            }
+        }
+    }
+    store = LocalVectorStore(config)
+    ids = [str(i) for i in range(len(vectors))]
+    store._upsert(ids, vectors, [{"text": i} for i in ids])
+    return store
+
+
+def run_queries(store: LocalVectorStore, queries: np.ndarray, k: int, **search_kwargs) -> Tuple[List[List[str]], float]:
+    """Returns the hit texts per query and the mean latency in milliseconds."""
+    threshold = float("inf") if store.distance_name == "EUCLID" else -float("inf")
+    results, started = [], time.perf_counter()
+    for query in queries:
+        results.append([hit["text"] for hit in store._search_vector(query, threshold, k, **search_kwargs)])
+    return results, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def recall(results: List[List[str]], truth: List[List[str]]) -> float:
+    return float(np.mean([len(set(r) & set(t)) / max(len(t), 1) for r, t in zip(results, truth)]))
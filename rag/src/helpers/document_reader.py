@@ -0,0 +1,83 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+TEXT_EXTENSIONS = (".txt", ".md")
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+def _read_text_file(path: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    yield {"document_id": path, "text": text, "tags": [], "source": path}
+
+
+def _read_jsonl_file(path: str, text_field: str, id_field: str, tags_field: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed JSON at {path}:{line_no}: {e}")
+                continue
+
+            text = record.get(text_field)
+            if not isinstance(text, str):
+                logger.warning(f"Skipping {path}:{line_no}: missing '{text_field}' field.")
+                continue
+
+            tags = record.get(tags_field) or []
+            yield {
+                "document_id": str(record.get(id_field) or f"{path}:{line_no}"),
+                "text": text,
+                "tags": [tags] if isinstance(tags, str) else list(tags),
+                "source": f"{path}:{line_no}"
+            }
+
+
+def _iter_files(path: str) -> Iterator[str]:
+    if os.path.isfile(path):
+        yield path
+        return
+
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(TEXT_EXTENSIONS + JSONL_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def iter_documents(paths: Iterable[str], text_field: str = "text", id_field: str = "document_id",
+                   tags_field: str = "tags") -> Iterator[Dict]:
+    """
+    Streams documents from text files, JSONL exports and directories (recursively) in a stable order.
+
+    Text files become one document whose id is the file path. Each JSONL line becomes one
+    document; lines without an id fall back to `<path>:<line>`.
+
+    Args:
+        paths (Iterable[str]): Files and/or directories to read.
+        text_field (str): JSONL field holding the document text.
+        id_field (str): JSONL field holding the document id.
+        tags_field (str): JSONL field holding a tag or list of tags.
+
+    Returns:
+        Iterator[Dict]: Records with `document_id`, `text`, `tags` and `source`.
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            logger.warning(f"Input path does not exist: {path}")
+            continue
+
+        for file_path in _iter_files(path):
+            if file_path.lower().endswith(JSONL_EXTENSIONS):
+                yield from _read_jsonl_file(file_path, text_field, id_field, tags_field)
+            else:
+                yield from _read_text_file(file_path)
+
@@ -0,0 +1,148 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "max_workers": 8,  # threads running blocking work (model inference, chunking, sync clients)
+    "max_pending": 64,  # calls allowed to queue for a thread before callers wait in the event loop
+    "llm_max_workers": None  # threads answering /chat (None = max_workers plus every admission queue's length)
+}
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking work called from async code.
+
+    Both the number of threads and the number of queued calls are bounded, so a burst of
+    requests waits cooperatively in the event loop instead of piling up unbounded work.
+    """
+
+    def __init__(self, max_workers: int = DEFAULTS["max_workers"], max_pending: int = DEFAULTS["max_pending"],
+                 thread_name_prefix: str = "rag-worker"):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = asyncio.Semaphore(max_workers + max_pending)
+        self._in_flight = 0
+        self._completed = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs `func(*args, **kwargs)` on the pool and awaits its result without blocking the event loop.
+        """
+        async with self._slots:
+            self._in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+            finally:
+                self._in_flight -= 1
+                self._completed += 1
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "completed": self._completed
+        }
+
+
+_executor: Optional[BoundedExecutor] = None
+_llm_executor: Optional[BoundedExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def configure_executor(config: Optional[dict]) -> BoundedExecutor:
+    """
+    (Re)creates the process-wide executor from the `executor` config section.
+    """
+    global _executor
+    econf = (config or {}).get("executor", {})
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = BoundedExecutor(
+            max_workers=econf.get("max_workers", DEFAULTS["max_workers"]),
+            max_pending=econf.get("max_pending", DEFAULTS["max_pending"])
+        )
+        logger.info(f"Executor configured with max_workers={_executor.max_workers}, "
+                    f"max_pending={_executor.max_pending}")
+        return _executor
+
+
+def get_executor() -> BoundedExecutor:
+    """
+    Returns the process-wide executor, creating one with default settings if none was configured.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = BoundedExecutor()
+        return _executor
+
+
+async def run_in_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Shortcut for `get_executor().run(func, *args, **kwargs)`.
+    """
+    return await get_executor().run(func, *args, **kwargs)
+
+
+def configure_llm_executor(config: Optional[dict], admission_capacity: int = 0) -> BoundedExecutor:
+    """
+    (Re)creates the process-wide executor for LLM-bound requests (/chat answers).
+
+    A request waiting for an LLM admission slot blocks its thread, so these requests get their
+    own pool: waiting answers never hold the threads chunking and embedding need. The pool is
+    sized so every admission queue can fill up and the next request is still turned away with
+    a 429 at once, rather than waiting for a thread.
+
+    Args:
+        config: Application config (`executor` section).
+        admission_capacity: Requests the LLM admission limits let run or wait at once
+            (see `AdmissionController.capacity`).
+    """
+    global _llm_executor
+    econf = (config or {}).get("executor", {})
+    max_workers = econf.get("max_workers", DEFAULTS["max_workers"])
+    llm_workers = econf.get("llm_max_workers", DEFAULTS["llm_max_workers"]) or max_workers + admission_capacity
+    if llm_workers <= admission_capacity:
+        logger.warning(f"executor.llm_max_workers={llm_workers} cannot hold the {admission_capacity} request(s) the "
+                       f"LLM admission limits let run or wait: their queues never fill, so no request gets a 429.")
+
+    with _executor_lock:
+        if _llm_executor is not None:
+            _llm_executor.shutdown(wait=False)
+        _llm_executor = BoundedExecutor(
+            max_workers=llm_workers,
+            max_pending=econf.get("max_pending", DEFAULTS["max_pending"]),
+            thread_name_prefix="rag-llm"
+        )
+        logger.info(f"LLM executor configured with max_workers={llm_workers} "
+                    f"(admission capacity {admission_capacity})")
+        return _llm_executor
+
+
+def get_llm_executor() -> BoundedExecutor:
+    """
+    Returns the LLM executor, or the shared one when no LLM executor was configured.
+    """
+    return _llm_executor or get_executor()
+
+
+async def run_in_llm_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Shortcut for `get_llm_executor().run(func, *args, **kwargs)`.
+    """
+    return await get_llm_executor().run(func, *args, **kwargs)
@@ -0,0 +1,55 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from helpers.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so only one process may write a data directory at a time
+    fcntl = None
+
+logger = setup_logger("app")
+
+if fcntl is None:
+    logger.warning("fcntl is unavailable: data directories are not locked between processes; "
+                   "do not run ingest.py while the server is writing to the same directory.")
+
+
+class FileLock:
+    """
+    Advisory lock shared by every process that opens the same lock file (POSIX `flock`).
+
+    Writers hold it exclusively for a whole append-and-commit, and readers take it shared
+    while they catch up with what other processes committed, so no process ever reads
+    another one's half-written rows. `flock` does not tell apart threads that share a file
+    descriptor, so threads of one process are serialized by an internal lock as well.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def locked(self, shared: bool = False) -> Iterator[None]:
+        """
+        Holds the lock for the duration of the `with` block, waiting for other processes as needed.
+
+        Args:
+            shared (bool): Take a shared (read) lock instead of an exclusive (write) one.
+        """
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        os.close(self._fd)
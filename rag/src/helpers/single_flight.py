@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": True
+}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one computation.
+
+    The first caller for a key (the leader) runs the function; callers that arrive with the
+    same key while it is still running wait for it and receive the same result or exception.
+    The key is forgotten as soon as the call finishes, so nothing is cached afterwards.
+    Thread callers use `do`, async callers use `ado`; the two never share a flight.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Tuple[int, Hashable], "asyncio.Task[Any]"] = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.shared = 0  # calls answered by another caller's in-flight computation
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs `func(*args, **kwargs)` unless an identical call (same key) is already in flight, in which
+        case it blocks until that call finishes and returns its result (or raises its exception).
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    async def ado(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Async `do`: awaits `func(*args, **kwargs)` once per key and event loop. A cancelled
+        caller does not cancel the shared computation the others are waiting on.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(flight_key)
+            if task is None:
+                task = self._tasks[flight_key] = loop.create_task(func(*args, **kwargs))
+                task.add_done_callback(lambda _: self._aforget(flight_key))
+                self.leaders += 1
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def _aforget(self, flight_key: Tuple[int, Hashable]):
+        with self._lock:
+            self._tasks.pop(flight_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._calls) + len(self._tasks)
+        return {
+            "name": self.name,
+            "leaders": self.leaders,
+            "deduplicated": self.shared,
+            "in_flight": in_flight
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(config: Optional[dict], name: str) -> Optional[SingleFlight]:
+    """
+    Returns the process-wide single-flight group `name`, or None when `single_flight.enabled` is off.
+    """
+    sconf = (config or {}).get("single_flight", {})
+    if not sconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def single_flight_stats() -> List[Dict[str, Any]]:
+    """Leader/deduplicated counters for every group used in this process."""
+    with _groups_lock:
+        return [group.stats() for group in _groups.values()]
@@ -0,0 +1,36 @@
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text so that trivially different copies hash the same.
+
+    Applies Unicode NFC normalization, collapses runs of whitespace and strips the ends.
+    Case is preserved because embedding models are case-sensitive.
+
+    Args:
+        text (str): Raw text.
+
+    Returns:
+        str: Normalized text.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text: str, namespace: str = "") -> str:
+    """
+    Returns a stable content hash of the normalized text.
+
+    Args:
+        text (str): Raw text.
+        namespace (str): Optional prefix (e.g. a model name) mixed into the hash.
+
+    Returns:
+        str: Hex digest (32 characters).
+    """
+    digest = hashlib.sha256(f"{namespace}\n{normalize_text(text)}".encode("utf-8"))
+    return digest.hexdigest()[:32]
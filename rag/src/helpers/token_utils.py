@@ -1,4 +1,25 @@
 # token_utils.py
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # counts fall back to the chars/4 estimate
+    tiktoken = None
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+FALLBACK_ENCODING = "cl100k_base"  # for models tiktoken does not know (Ollama, llama.cpp, ...): close, not exact
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators added around every chat message
+PROMPT_OVERHEAD_TOKENS = 3  # tokens priming the assistant's reply
+COUNT_CACHE_SIZE = 8192  # (encoding, text) pairs whose counts are remembered
+
+_encodings: Dict[str, Optional["tiktoken.Encoding"]] = {}
+_encodings_lock = threading.Lock()
+
 
 def estimate_token_count(prompt: list[dict]) -> int:
     """
@@ -19,3 +40,100 @@ def estimate_token_count(prompt: list[dict]) -> int:
     total_chars = sum(len(message.get("content", "")) for message in prompt)
     # Using integer division to get an approximate token count.
     return total_chars // 4
+
+
+def estimate_text_token_count(text: str) -> int:
+    """
+    Estimate the number of tokens in a single piece of text.
+
+    Uses the same 1 token ≈ 4 characters rule as `estimate_token_count`,
+    rounded up so that short texts never count as zero tokens.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return (len(text) + 3) // 4
+
+
+def _encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    """
+    Returns the tiktoken encoding for `model` (FALLBACK_ENCODING for unknown models),
+    or None when tiktoken or its encoding files are unavailable.
+    """
+    with _encodings_lock:
+        if model in _encodings:
+            return _encodings[model]
+        encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+            except Exception as e:
+                logger.warning(f"No tokenizer for model '{model}', estimating token counts instead: {e}")
+        _encodings[model] = encoding
+        return encoding
+
+
+@lru_cache(maxsize=COUNT_CACHE_SIZE)
+def _cached_count(model: str, text: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return estimate_text_token_count(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_text_tokens(text: str, model: str) -> int:
+    """
+    Counts the tokens of `text` with the model's tokenizer. Counts are cached per
+    (model, text), so messages repeated across prompts (system text, history) are encoded once.
+
+    Args:
+        text (str): The text to measure.
+        model (str): Model name used to pick the tokenizer.
+
+    Returns:
+        int: The token count (the chars/4 estimate when no tokenizer is available).
+    """
+    return _cached_count(model, text) if text else 0
+
+
+def count_message_tokens(prompt: List[Dict[str, str]], model: str) -> int:
+    """
+    Counts the tokens a list of chat messages takes up, including the per-message overhead.
+
+    Args:
+        prompt (List[Dict[str, str]]): Message dicts (with a 'content' key).
+        model (str): Model name used to pick the tokenizer.
+
+    Returns:
+        int: The token count.
+    """
+    return PROMPT_OVERHEAD_TOKENS + sum(MESSAGE_OVERHEAD_TOKENS + count_text_tokens(message.get("content", ""), model)
+                                        for message in prompt)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Cuts `text` down to at most `max_tokens` tokens of the model's tokenizer.
+
+    Args:
+        text (str): The text to shorten.
+        max_tokens (int): Token limit.
+        model (str): Model name used to pick the tokenizer.
+
+    Returns:
+        str: `text` itself when it fits, otherwise its longest prefix that does.
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_text_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
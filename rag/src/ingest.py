@@ -0,0 +1,49 @@
+import argparse, json, sys
+
+from core.app_factory import LOGS_DIR
+from config.config_loader import ConfigLoader
+from helpers.document_reader import iter_documents
+from helpers.logger import setup_logger
+from service.ingestion_pipeline import IngestionPipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk-ingest text files, directories and JSONL exports into the configured vector store.")
+    parser.add_argument("paths", nargs="+", help="files (.txt, .md, .jsonl) or directories to ingest")
+    parser.add_argument("--tags", nargs="*", default=[], help="tags added to every ingested chunk")
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the document text")
+    parser.add_argument("--id-field", default="document_id", help="JSONL field holding the document id")
+    parser.add_argument("--chunk-workers", type=int)
+    parser.add_argument("--embed-workers", type=int)
+    parser.add_argument("--upsert-workers", type=int)
+    parser.add_argument("--queue-size", type=int)
+    parser.add_argument("--checkpoint", help="checkpoint file used to resume an interrupted run")
+    parser.add_argument("--no-resume", action="store_true", help="discard the checkpoint and ingest everything")
+    args = parser.parse_args()
+
+    config = ConfigLoader().get_config()
+    logger = setup_logger("app", log_dir=LOGS_DIR)
+
+    pipeline = IngestionPipeline(
+        config,
+        chunk_workers=args.chunk_workers,
+        embed_workers=args.embed_workers,
+        upsert_workers=args.upsert_workers,
+        queue_size=args.queue_size,
+        checkpoint=args.checkpoint
+    )
+    records = iter_documents(args.paths, text_field=args.text_field, id_field=args.id_field)
+
+    try:
+        summary = pipeline.run(records, tags=args.tags, resume=not args.no_resume)
+    except KeyboardInterrupt:
+        logger.warning(f"Interrupted; re-run the same command to resume from {pipeline.checkpoint_path}.")
+        sys.exit(130)
+
+    print(json.dumps(summary, indent=2))
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
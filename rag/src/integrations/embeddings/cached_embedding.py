@@ -0,0 +1,48 @@
+from typing import List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+from integrations.embeddings.embedding_cache import EmbeddingCache
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    llama_index embedding wrapper that serves text embeddings from an `EmbeddingCache`
+    and only forwards cache misses to the wrapped model.
+    Query embeddings are passed through untouched.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache: EmbeddingCache, **kwargs):
+        super().__init__(model_name=inner.model_name, embed_batch_size=inner.embed_batch_size, **kwargs)
+        self._inner = inner
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._inner.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return await self._inner.aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        cached = self._cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+
+        if missing:
+            computed = self._inner.get_text_embedding_batch([texts[i] for i in missing])
+            self._cache.put_many([texts[i] for i in missing], np.asarray(computed, dtype=np.float32))
+            for i, vector in zip(missing, computed):
+                cached[i] = vector
+
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in cached]
@@ -0,0 +1,362 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from helpers.file_lock import FileLock
+from helpers.logger import setup_logger
+from helpers.text_hash import text_hash
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": True,
+    "dir": "data/embedding_cache",
+    "max_size_mb": 1024,
+    "segment_rows": 4096
+}
+
+INDEX_FILE = "index.json"
+LOG_FILE = "index.log"
+LOCK_FILE = "lock"
+COMPACT_MIN_RECORDS = 10_000  # the log is folded into index.json once it holds this many records (or entries)
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of embeddings for a single model.
+
+    Vectors live in fixed-size float32 segment files that are memory-mapped on demand.
+    Each put appends one line per new vector to `index.log` mapping its text hash to its
+    (segment, row); the log is folded into the `index.json` snapshot once it is as long as
+    the index itself, so persisting a batch costs O(batch) rather than O(cache size). When the
+    cache grows beyond `max_bytes`, the least recently used segment is evicted as a whole.
+
+    The server and `ingest.py` may share a cache directory: writers hold an exclusive `flock`
+    on its `lock` file and first read what other processes appended to the log, so segment
+    rows are only ever handed out once.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, max_bytes: int, segment_rows: int):
+        self.model_name = model_name
+        self.dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        self.max_bytes = max_bytes
+        self.segment_rows = segment_rows
+
+        self.dim: Optional[int] = None
+        self._entries: Dict[str, List[int]] = {}  # key -> [segment_id, row]
+        self._segments: Dict[int, Dict[str, float]] = {}  # segment_id -> {"rows", "last_access"}
+        self._active_segment: Optional[int] = None
+        self._next_segment = 0
+        self._maps: Dict[int, np.memmap] = {}
+        self._lock = threading.Lock()
+        self._log_offset = 0  # bytes of index.log already applied
+        self._log_records = 0
+        self._index_stat = None  # stat of the index.json snapshot last loaded or written
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.dir, exist_ok=True)
+        self._file_lock = FileLock(os.path.join(self.dir, LOCK_FILE))
+        with self._lock, self._file_lock.locked(shared=True):
+            self._load_index()
+            self._read_log()
+
+    # ---------- public API ----------
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Looks up cached embeddings.
+
+        Returns:
+            List[Optional[np.ndarray]]: One vector per text, or None on a miss.
+        """
+        now = time.time()
+        results: List[Optional[np.ndarray]] = []
+
+        self._refresh()
+        with self._lock:
+            for text in texts:
+                location = self._entries.get(self._key(text))
+                segment = self._segment(location[0]) if location is not None else None
+                if segment is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+
+                segment_id, row = location
+                self._segments[segment_id]["last_access"] = now
+                results.append(np.array(segment[row], dtype=np.float32))
+                self.hits += 1
+
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """
+        Stores embeddings for the given texts and appends their locations to the index log.
+        """
+        if not texts:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        with self._lock, self._file_lock.locked():
+            self._sync(exclusive=True)
+            records = []
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                records.append({"dim": self.dim})
+            elif vectors.shape[1] != self.dim:
+                logger.warning(
+                    f"Embedding cache '{self.model_name}' expects dim={self.dim}, got {vectors.shape[1]}. Skipping.")
+                return
+
+            now = time.time()
+            written = set()
+            for text, vector in zip(texts, vectors):
+                key = self._key(text)
+                if key in self._entries:
+                    continue
+
+                segment_id = self._writable_segment()
+                row = int(self._segments[segment_id]["rows"])
+                self._segment(segment_id, create=True)[row] = vector
+                self._segments[segment_id]["rows"] = row + 1
+                self._segments[segment_id]["last_access"] = now
+                self._entries[key] = [segment_id, row]
+                records.append({"k": key, "s": segment_id, "r": row})
+                written.add(segment_id)
+
+            # Vectors reach their segment files before the log lines that point at them
+            for segment_id in written:
+                self._maps[segment_id].flush()
+            records.extend({"evict": victim} for victim in self._evict_if_needed())
+            self._append_log(records)
+            if self._log_records >= max(COMPACT_MIN_RECORDS, len(self._entries)):
+                self._save_index()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "segments": len(self._segments),
+            "size_bytes": self._size_bytes()
+        }
+
+    # ---------- internals ----------
+
+    def _key(self, text: str) -> str:
+        return text_hash(text, namespace=self.model_name)
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.dir, f"seg_{segment_id:05d}.f32")
+
+    def _segment_bytes(self) -> int:
+        return self.segment_rows * (self.dim or 0) * 4
+
+    def _size_bytes(self) -> int:
+        return len(self._segments) * self._segment_bytes()
+
+    def _segment(self, segment_id: int, create: bool = False) -> Optional[np.memmap]:
+        """
+        Maps a segment file; None when it is gone (evicted by another process not yet seen in the log).
+        """
+        if segment_id not in self._maps:
+            path = self._segment_path(segment_id)
+            if not os.path.exists(path) and not create:
+                return None
+            mode = "r+" if os.path.exists(path) else "w+"
+            self._maps[segment_id] = np.memmap(path, dtype=np.float32, mode=mode, shape=(self.segment_rows, self.dim))
+        return self._maps[segment_id]
+
+    def _writable_segment(self) -> int:
+        active = self._active_segment
+        if active is None or active not in self._segments or self._segments[active]["rows"] >= self.segment_rows:
+            active = self._next_segment
+            self._next_segment += 1
+            self._segments[active] = {"rows": 0, "last_access": time.time()}
+            self._active_segment = active
+        return active
+
+    def _evict_if_needed(self) -> List[int]:
+        victims = []
+        while self._size_bytes() > self.max_bytes and len(self._segments) > 1:
+            candidates = [s for s in self._segments if s != self._active_segment]
+            victim = min(candidates, key=lambda s: self._segments[s]["last_access"])
+            self._drop_segment(victim)
+            try:
+                os.remove(self._segment_path(victim))
+            except FileNotFoundError:
+                pass
+            victims.append(victim)
+            logger.info(f"Embedding cache '{self.model_name}' evicted segment {victim}.")
+        return victims
+
+    def _drop_segment(self, segment_id: int):
+        self._entries = {k: loc for k, loc in self._entries.items() if loc[0] != segment_id}
+        self._segments.pop(segment_id, None)
+        self._maps.pop(segment_id, None)
+
+    # ---------- persistence ----------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _stat(self, name: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _log_size(self) -> int:
+        stat = self._stat(LOG_FILE)
+        return stat[2] if stat else 0
+
+    def _refresh(self):
+        """
+        Applies what other processes logged since the last look; a `stat` is all it costs when nothing changed.
+        """
+        if self._stat(INDEX_FILE) == self._index_stat and self._log_size() == self._log_offset:
+            return
+        with self._lock, self._file_lock.locked(shared=True):
+            self._sync()
+
+    def _sync(self, exclusive: bool = False):
+        """
+        Catches up with other processes (the caller holds `_lock` and the file lock): reloads the
+        snapshot if another process compacted the log, then applies the log records not seen yet.
+        """
+        if self._stat(INDEX_FILE) != self._index_stat:
+            last_access = {s: info["last_access"] for s, info in self._segments.items()}
+            self._entries, self._segments, self._maps = {}, {}, {}
+            self._log_offset = self._log_records = 0
+            self._load_index()
+            for segment_id, info in self._segments.items():
+                info["last_access"] = max(info["last_access"], last_access.get(segment_id, 0))
+        self._read_log(truncate_torn=exclusive)
+
+    def _read_log(self, truncate_torn: bool = False):
+        path = self._path(LOG_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) < len(data) and truncate_torn:
+            # A writer died mid-append; nobody else is writing while we hold the lock exclusively
+            with open(path, "r+b") as f:
+                f.truncate(self._log_offset + len(complete))
+        now = time.time()
+        for line in complete.splitlines():
+            self._apply(json.loads(line), now)
+            self._log_records += 1
+        self._log_offset += len(complete)
+
+    def _apply(self, record: Dict, now: float):
+        if "evict" in record:
+            self._drop_segment(record["evict"])
+        elif "dim" in record:
+            self.dim = record["dim"]
+        else:
+            segment_id, row = record["s"], record["r"]
+            self._entries[record["k"]] = [segment_id, row]
+            segment = self._segments.setdefault(segment_id, {"rows": 0, "last_access": now})
+            segment["rows"] = max(segment["rows"], row + 1)
+            if segment_id >= self._next_segment:
+                self._next_segment = segment_id + 1
+                self._active_segment = segment_id
+
+    def _append_log(self, records: List[Dict]):
+        if not records:
+            return
+        data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8")
+        with open(self._path(LOG_FILE), "ab") as f:
+            f.write(data)
+        self._log_offset += len(data)
+        self._log_records += len(records)
+
+    def _load_index(self):
+        path = self._path(INDEX_FILE)
+        self._index_stat = self._stat(INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as f:
+                index = json.load(f)
+            if index.get("segment_rows") != self.segment_rows:
+                logger.warning(f"Embedding cache '{self.model_name}' segment size changed; starting empty.")
+                return
+            self.dim = index.get("dim")
+            self._entries = index.get("entries", {})
+            self._segments = {int(k): v for k, v in index.get("segments", {}).items()}
+            self._active_segment = index.get("active_segment")
+            self._next_segment = index.get("next_segment", 0)
+            logger.info(f"Embedding cache '{self.model_name}' loaded with {len(self._entries)} entries.")
+        except Exception as e:
+            logger.error(f"Failed to load embedding cache index from {path}: {e}")
+
+    def _save_index(self):
+        """
+        Folds the log into a new `index.json` snapshot and empties the log (caller holds the file lock).
+        """
+        path = self._path(INDEX_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "model": self.model_name,
+                "dim": self.dim,
+                "segment_rows": self.segment_rows,
+                "active_segment": self._active_segment,
+                "next_segment": self._next_segment,
+                "segments": self._segments,
+                "entries": self._entries
+            }, f)
+        os.replace(tmp_path, path)
+        with open(self._path(LOG_FILE), "wb"):
+            pass
+        self._index_stat = self._stat(INDEX_FILE)
+        self._log_offset = self._log_records = 0
+        logger.info(f"Embedding cache '{self.model_name}' compacted its index ({len(self._entries)} entries).")
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(config: Optional[dict], model_name: str) -> Optional[EmbeddingCache]:
+    """
+    Returns the process-wide cache for `model_name`, or None when caching is disabled.
+    The same instance is shared by every caller that asks for the same model.
+    """
+    cconf = (config or {}).get("embedding_cache", {})
+    if not cconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(
+                cache_dir=cconf.get("dir", DEFAULTS["dir"]),
+                model_name=model_name,
+                max_bytes=int(cconf.get("max_size_mb", DEFAULTS["max_size_mb"]) * 1024 * 1024),
+                segment_rows=cconf.get("segment_rows", DEFAULTS["segment_rows"])
+            )
+        return _caches[model_name]
+
+
+def embedding_cache_stats() -> List[Dict[str, float]]:
+    """Hit/miss counters for every cache opened in this process."""
+    with _caches_lock:
+        return [cache.stats() for cache in _caches.values()]
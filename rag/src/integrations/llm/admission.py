@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": True,
+    "max_concurrency": 0,  # requests sent to one provider at once (0 = unlimited)
+    "max_queue": 32,  # requests allowed to wait for a slot; beyond this they are rejected at once (429)
+    "queue_timeout": 30.0  # seconds a request may wait for a slot before it is rejected (503)
+}
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a provider is saturated: its wait queue is full (429) or the wait timed out (503).
+    """
+
+    def __init__(self, provider: str, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"LLM provider '{provider}' is overloaded: {reason}")
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ProviderLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one provider.
+
+    At most `max_concurrency` requests run at once; up to `max_queue` more wait (in arrival
+    order) for up to `queue_timeout` seconds, and anything beyond that is rejected immediately
+    so a saturated local model server is not pushed past its throughput sweet spot.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int = DEFAULTS["max_concurrency"],
+                 max_queue: int = DEFAULTS["max_queue"], queue_timeout: float = DEFAULTS["queue_timeout"]):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiters: Deque[object] = deque()  # served first come, first served
+
+        self.admitted = 0
+        self.rejected_full = 0
+        self.timed_out = 0
+        self.max_queued = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Holds one of the provider's concurrency slots for the duration of the `with` block.
+
+        Raises:
+            AdmissionRejected: The wait queue is full (429) or no slot freed up within `queue_timeout` (503).
+        """
+        if self.max_concurrency <= 0:
+            yield
+            return
+
+        started = time.monotonic()
+        with self._cond:
+            if self._active >= self.max_concurrency or self._waiters:
+                if len(self._waiters) >= self.max_queue:
+                    self.rejected_full += 1
+                    raise AdmissionRejected(self.provider, f"{len(self._waiters)} request(s) already waiting", 429, 1)
+
+                waiter = object()
+                self._waiters.append(waiter)
+                self.max_queued = max(self.max_queued, len(self._waiters))
+                deadline = started + self.queue_timeout
+                while self._waiters[0] is not waiter or self._active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(waiter)
+                        self._cond.notify_all()  # the waiter behind may now be first in line
+                        self.timed_out += 1
+                        raise AdmissionRejected(self.provider, f"no slot free after {self.queue_timeout:g}s",
+                                                503, max(1, int(self.queue_timeout)))
+                    self._cond.wait(remaining)
+                self._waiters.popleft()
+                self._cond.notify_all()  # the next waiter may fit in another free slot
+
+            self._active += 1
+            self.admitted += 1
+            waited = time.monotonic() - started
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "max_queued": self.max_queued,
+                "admitted": self.admitted,
+                "rejected_full": self.rejected_full,
+                "timed_out": self.timed_out,
+                "avg_wait_ms": round(self._wait_total / self.admitted * 1000, 1) if self.admitted else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 1)
+            }
+
+
+class AdmissionController:
+    """
+    One `ProviderLimiter` per LLM provider, configured from `llm_config.admission`.
+    """
+
+    def __init__(self, aconf: dict):
+        self.default = {key: aconf.get(key, DEFAULTS[key])
+                        for key in ("max_concurrency", "max_queue", "queue_timeout")}
+        self.provider_conf: Dict[str, dict] = aconf.get("providers", {}) or {}
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        with self._lock:
+            if provider not in self._limiters:
+                settings = {**self.default, **self.provider_conf.get(provider, {})}
+                self._limiters[provider] = ProviderLimiter(provider, **settings)
+            return self._limiters[provider]
+
+    def slot(self, provider: str):
+        """
+        Shortcut for `limiter(provider).slot()`.
+        """
+        return self.limiter(provider).slot()
+
+    def capacity(self, providers: Iterable[str]) -> int:
+        """
+        Requests that may hold or wait for a slot at once across `providers`; unlimited providers add nothing.
+        """
+        total = 0
+        for provider in set(providers):
+            settings = {**self.default, **self.provider_conf.get(provider, {})}
+            if settings["max_concurrency"] > 0:
+                total += settings["max_concurrency"] + settings["max_queue"]
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.provider: limiter.stats() for limiter in limiters}
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller(config: Optional[dict]) -> Optional[AdmissionController]:
+    """
+    Returns the process-wide admission controller, created from the first config's
+    `llm_config.admission` section, or None when admission control is disabled.
+    """
+    global _controller
+    aconf = (config or {}).get("llm_config", {}).get("admission", {})
+    if not aconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(aconf)
+            logger.info(f"LLM admission control: default {_controller.default}, "
+                        f"per provider {_controller.provider_conf}")
+        return _controller
@@ -1,14 +1,18 @@
 import json
-from typing import Optional
+from contextlib import nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple, Union
 
 from helpers.logger import setup_logger
-from helpers.token_utils import estimate_token_count
-from integrations.llm.prompt_builder import build_prompt
+from helpers.token_utils import count_message_tokens
+from integrations.llm.admission import AdmissionRejected, get_admission_controller
+from integrations.llm.prompt_builder import DEFAULT_HISTORY_TOKEN_SHARE, DEFAULT_MIN_CHUNK_TOKENS, build_prompt
+from integrations.llm.provider_router import get_provider_router
 from integrations.llm.providers.gemini_api import gemini_call
-from integrations.llm.providers.llamacpp_api import llamacpp_call
+from integrations.llm.providers.llamacpp_api import llamacpp_call, llamacpp_stream
 from integrations.llm.providers.lmstudio_api import lmstudio_call
-from integrations.llm.providers.ollama_api import ollama_call
-from integrations.llm.providers.openai_api import openai_call
+from integrations.llm.providers.ollama_api import ollama_call, ollama_stream
+from integrations.llm.providers.openai_api import openai_call, openai_stream
+from integrations.llm.response_cache import get_response_cache
 
 logger = setup_logger("app")
 
@@ -19,6 +23,14 @@ DEFAULT_CONTEXT_WINDOW = 10000  # 10k tokens ≈ 7500 words
 DEFAULT_MAX_TOKENS = 10000  # 1000 tokens ≈ 750 words
 DEFAULT_TOP_P = 1.0
 
+# Providers report failures as answer text starting with one of these; such answers must never be cached
+ERROR_PREFIXES = ("Error:", "OpenAI API error:", "Gemini error:", "Ollama API error:", "LM Studio error:",
+                  "[ERROR]", "Invalid llama.cpp mode.")
+
+
+def is_error_response(response) -> bool:
+    return not isinstance(response, str) or not response.strip() or response.startswith(ERROR_PREFIXES)
+
 
 class LLMClient:
     def __init__(self, config):
@@ -30,15 +42,41 @@ class LLMClient:
         self.context_window: int = llm_config.get("context_window", DEFAULT_CONTEXT_WINDOW)
         self.max_tokens: int = llm_config.get("max_tokens", DEFAULT_MAX_TOKENS)
         self.top_p: float = llm_config.get("top_p", DEFAULT_TOP_P)
+        # Prompts are cut to context_window - max_tokens, counted with the model's tokenizer
+        budget_config = llm_config.get("prompt_budget", {})
+        self.enforce_budget: bool = budget_config.get("enabled", True)
+        self.history_token_share: float = budget_config.get("history_token_share", DEFAULT_HISTORY_TOKEN_SHARE)
+        self.min_chunk_tokens: int = budget_config.get("min_chunk_tokens", DEFAULT_MIN_CHUNK_TOKENS)
+        # Tokens the prompt may use; None when max_tokens leaves no room, in which case prompts are not trimmed
+        self.prompt_budget: Optional[int] = self.context_window - self.max_tokens
+        if self.prompt_budget <= 0:
+            logger.warning(f"max_tokens ({self.max_tokens}) leaves no room for the prompt in context_window "
+                           f"({self.context_window}); prompts will not be trimmed. Lower llm_config.max_tokens.")
+            self.prompt_budget = None
+        # Opt-in exact-prompt cache (llm_cache.enabled), shared by every LLMClient pointing at the same file
+        self.response_cache = get_response_cache(config)
+        self.llamacpp_mode: Optional[str] = llm_config.get("llamacpp", {}).get("mode")  # rest or bindings
+        # Latency-aware routing with hedged requests across llm_config.routing.providers (opt-in)
+        self.router = get_provider_router(config)
+        # Per-provider concurrency limits with a bounded wait queue, shared by every LLMClient
+        self.admission = get_admission_controller(config)
+        self.route_models: Dict[str, str] = llm_config.get("routing", {}).get("models", {})
 
         self.handlers = {
             "openai": lambda prompt, model, temperature: openai_call(prompt, model, temperature, self.max_tokens,
                                                                      self.top_p),
             "gemini": lambda prompt, model, temperature: gemini_call(str(prompt), model, temperature),
             "ollama": lambda prompt, model, _: ollama_call(prompt, model),
-            "llamacpp": lambda prompt, *_: llamacpp_call(str(prompt)),
+            "llamacpp": lambda prompt, _, temperature: llamacpp_call(str(prompt), temperature, self.llamacpp_mode),
             "lmstudio": lambda prompt, *_: lmstudio_call(str(prompt)),
         }
+        # Providers that can stream tokens (see `ask_stream`)
+        self.stream_handlers = {
+            "openai": lambda prompt, model, temperature: openai_stream(prompt, model, temperature, self.max_tokens,
+                                                                       self.top_p),
+            "ollama": lambda prompt, model, _: ollama_stream(prompt, model),
+            "llamacpp": lambda prompt, _, temperature: llamacpp_stream(str(prompt), temperature, self.llamacpp_mode),
+        }
 
     def ask(
             self,
@@ -46,17 +84,149 @@ class LLMClient:
             knowledge: Optional[str] = None,
             model: Optional[str] = None,
             temperature: Optional[float] = None,
-            history: Optional[str] = None
+            history: Optional[Union[str, List[str]]] = None,
+            use_cache: bool = True,
+            knowledge_chunks: Optional[List[str]] = None
     ):
-        """Main method to send the prompt to the selected LLM provider."""
+        """
+        Main method to send the prompt to the selected LLM provider.
+        `knowledge_chunks` (best-ranked first) are listed under `knowledge`; when the prompt would
+        not leave `max_tokens` free in the context window, the lowest-ranked chunks and the oldest
+        history are dropped first (see `build_prompt`).
+        With `llm_config.routing` enabled, the prompt goes to the fastest healthy routed provider
+        instead, hedged to a second one when the first is slower than usual (see `ProviderRouter`).
+        With `llm_cache` enabled, a byte-identical prompt with the same provider, model and sampling
+        parameters is answered from the cache; pass `use_cache=False` to always call the provider.
+
+        Raises:
+            AdmissionRejected: The provider's wait queue is full or the wait for a free slot timed out.
+        """
+        model = model or self.model
+        temperature = temperature or self.temperature
+        prompt = self._prepare_prompt(user_input, knowledge, history, model, knowledge_chunks)
+
+        handler = self.handlers.get(self.provider)
+        if not handler and not self.router:
+            logger.error(f"Unsupported LLM provider: {self.provider}")
+            return "Error: Unsupported LLM provider."
+
+        cache_key, cached = self._cached_response(prompt, model, temperature, use_cache)
+        if cached is not None:
+            return cached
+
+        if self.router:
+            response = self._route(prompt, model, temperature)
+        else:
+            with self._admit(self.provider):
+                response = handler(prompt, model, temperature)
+        self._store_response(cache_key, response)
+        return response
+
+    def ask_stream(
+            self,
+            user_input: Optional[str] = None,
+            knowledge: Optional[str] = None,
+            model: Optional[str] = None,
+            temperature: Optional[float] = None,
+            history: Optional[Union[str, List[str]]] = None,
+            use_cache: bool = True,
+            knowledge_chunks: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of `ask`: yields the answer in pieces as the provider produces them.
+        OpenAI, Ollama and the llama.cpp server stream token by token; other providers (and
+        cache hits) yield the whole answer at once. The joined answer is cached like `ask`'s.
+        With routing enabled, the stream comes from the fastest healthy routed provider (streams are not hedged).
+        """
         model = model or self.model
         temperature = temperature or self.temperature
+        prompt = self._prepare_prompt(user_input, knowledge, history, model, knowledge_chunks)
+
+        provider = self.router.ranked()[0] if self.router else self.provider
+        stream_handler = self.stream_handlers.get(provider)
+        handler = self.handlers.get(provider)
+        if not stream_handler and not handler:
+            logger.error(f"Unsupported LLM provider: {provider}")
+            yield "Error: Unsupported LLM provider."
+            return
+
+        cache_key, cached = self._cached_response(prompt, model, temperature, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        provider_model = self._model_for(provider, model)
+        if not stream_handler:
+            with self._admit(provider):
+                response = handler(prompt, provider_model, temperature)
+            self._store_response(cache_key, response)
+            yield response
+            return
+
+        parts, failed = [], False
+        with self._admit(provider):  # the slot is held until the stream ends
+            for part in stream_handler(prompt, provider_model, temperature):
+                parts.append(part)
+                failed = failed or part.startswith(ERROR_PREFIXES)  # providers report mid-stream failures inline
+                yield part
+        if not failed:
+            self._store_response(cache_key, "".join(parts).strip())
+
+    def providers(self) -> List[str]:
+        """
+        Providers this client may call: the configured one plus every routed provider.
+        """
+        return [self.provider] + (self.router.providers if self.router else [])
+
+    def _admit(self, provider: str) -> ContextManager:
+        """
+        Waits for a concurrency slot of `provider` (`llm_config.admission`); raises `AdmissionRejected` when saturated.
+        """
+        return self.admission.slot(provider) if self.admission else nullcontext()
 
-        prompt = build_prompt(user_input=user_input, knowledge=knowledge, history=history)
+    def _model_for(self, provider: str, model: str) -> str:
+        """
+        Model to request from a routed provider: `model` for the configured provider, else its `routing.models` entry.
+        """
+        return model if provider == self.provider else self.route_models.get(provider, model)
 
-        estimated_input_tokens = estimate_token_count(prompt)
-        # Warn if the combined tokens (input prompt + expected output) might exceed the context window.
-        if estimated_input_tokens + self.max_tokens > self.context_window:
+    def _route(self, prompt: List[Dict[str, str]], model: str, temperature: float) -> str:
+        """
+        Sends the prompt through the provider router; provider error answers count as failures there.
+        """
+        def call(provider: str, routed_prompt: List[Dict[str, str]], routed_temperature: float) -> str:
+            handler = self.handlers.get(provider)
+            if not handler:
+                raise ValueError(f"Error: Unsupported LLM provider: {provider}")
+            with self._admit(provider):
+                response = handler(routed_prompt, self._model_for(provider, model), routed_temperature)
+            if is_error_response(response):
+                raise RuntimeError(response or f"Error: Empty response from {provider}.")
+            return response
+
+        try:
+            return self.router.ask(call, prompt, temperature)
+        except AdmissionRejected:
+            raise  # every routed provider is saturated: let the API answer 429/503
+        except Exception as e:
+            message = str(e)
+            return message if message.startswith(ERROR_PREFIXES) else f"Error: {message}"
+
+    def _prepare_prompt(self, user_input: Optional[str], knowledge: Optional[str],
+                        history: Optional[Union[str, List[str]]], model: str,
+                        knowledge_chunks: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        prompt = build_prompt(
+            user_input=user_input,
+            knowledge=knowledge,
+            history=history,
+            knowledge_chunks=knowledge_chunks,
+            token_budget=self.prompt_budget if self.enforce_budget else None,
+            model=model,
+            history_token_share=self.history_token_share,
+            min_chunk_tokens=self.min_chunk_tokens
+        )
+
+        if not self.enforce_budget and count_message_tokens(prompt, model) + self.max_tokens > self.context_window:
             logger.warning(
                 "The combined prompt and max_tokens may exceed the model's context window. "
                 "Consider trimming your prompt or reducing max_tokens."
@@ -64,10 +234,23 @@ class LLMClient:
 
         logger.info(f"Calling LLM ({self.provider}, model: {model}) with prompt: {user_input}")
         logger.debug(f"Full prompt: {json.dumps(prompt, indent=2)}")
+        return prompt
 
-        handler = self.handlers.get(self.provider)
-        if handler:
-            return handler(prompt, model, temperature)
-        else:
-            logger.error(f"Unsupported LLM provider: {self.provider}")
-            return "Error: Unsupported LLM provider."
+    def _cached_response(self, prompt: List[Dict[str, str]], model: str, temperature: float,
+                         use_cache: bool) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns the response-cache key for the request (None when not caching) and the cached answer, if any.
+        """
+        if not self.response_cache or not use_cache:
+            return None, None
+        # Routed answers may come from any routed provider, so they share one key space
+        provider = "routed:" + ",".join(self.router.providers) if self.router else self.provider
+        cache_key = self.response_cache.make_key(provider, model, temperature, self.top_p, self.max_tokens, prompt)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"LLM response cache hit ({provider}, model: {model}).")
+        return cache_key, cached
+
+    def _store_response(self, cache_key: Optional[str], response):
+        if cache_key is not None and not is_error_response(response):
+            self.response_cache.put(cache_key, response)
@@ -1,3 +1,5 @@
+import threading
+import time
 from datetime import datetime, timezone
 from collections import deque
 
@@ -7,9 +9,18 @@ class AgentMemory:
         """
         Initializes a conversation memory buffer.
 
+        Messages are kept as compact (role, content, unix time) tuples and only expanded
+        into dictionaries when read.
+
         :param max_size: Maximum number of messages to store.
         """
+        self.max_size = max_size
         self._history = deque(maxlen=max_size)
+        self.summary = None  # rolling summary of the turns compacted out of the history
+        self.summarized_messages = 0
+        # Held while a request summarizes or appends to this conversation, so a compaction never
+        # drops messages added after it read the history
+        self.lock = threading.Lock()
 
     def add_message(self, role: str, content: str):
         """
@@ -21,12 +32,7 @@ class AgentMemory:
         if not role or not content:
             raise ValueError("Both role and content must be provided.")
 
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-        self._history.append(message)
+        self._history.append((role, content, time.time()))
 
     def get_history(self, limit: int = None):
         """
@@ -38,12 +44,27 @@ class AgentMemory:
         if limit is not None:
             if not isinstance(limit, int) or limit <= 0:
                 raise ValueError("Limit must be a positive integer.")
-            return list(self._history)[-limit:]
-        return list(self._history)
+            return [self._expand(message) for message in list(self._history)[-limit:]]
+        return [self._expand(message) for message in self._history]
+
+    def compact(self, keep_last: int, summary: str):
+        """
+        Replaces all but the `keep_last` most recent messages with a summary of the conversation so far.
+
+        :param keep_last: Number of recent messages kept verbatim.
+        :param summary: Summary covering the previous summary and the dropped messages.
+        """
+        dropped = max(0, len(self._history) - keep_last)
+        for _ in range(dropped):
+            self._history.popleft()
+        self.summary = summary
+        self.summarized_messages += dropped
 
     def clear(self):
         """Clears the conversation history."""
         self._history.clear()
+        self.summary = None
+        self.summarized_messages = 0
 
     def to_dict(self):
         """
@@ -51,7 +72,46 @@ class AgentMemory:
 
         :return: List of message dictionaries.
         """
-        return list(self._history)
+        return self.get_history()
+
+    def dump(self):
+        """
+        Serializes the whole memory (messages and summary) to a JSON-compatible dictionary.
+
+        :return: Dictionary accepted by `AgentMemory.load`.
+        """
+        return {
+            "max_size": self.max_size,
+            "summary": self.summary,
+            "summarized_messages": self.summarized_messages,
+            "messages": [list(message) for message in self._history]
+        }
+
+    @classmethod
+    def load(cls, data: dict):
+        """
+        Restores a memory serialized with `dump`.
+
+        :param data: Dictionary produced by `dump`.
+        :return: The restored memory.
+        """
+        memory = cls(max_size=data.get("max_size", 100))
+        memory._history.extend(tuple(message) for message in data.get("messages", []))
+        memory.summary = data.get("summary")
+        memory.summarized_messages = data.get("summarized_messages", 0)
+        return memory
+
+    @staticmethod
+    def _expand(message):
+        role, content, created = message
+        return {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.fromtimestamp(created, timezone.utc).isoformat()
+        }
+
+    def __len__(self):
+        return len(self._history)
 
     def __repr__(self):
         return f"ConversationMemory(entries={len(self._history)})"
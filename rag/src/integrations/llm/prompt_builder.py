@@ -1,21 +1,140 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Sequence, Tuple, Union
+
+from helpers.logger import setup_logger
+from helpers.token_utils import (MESSAGE_OVERHEAD_TOKENS, PROMPT_OVERHEAD_TOKENS, count_message_tokens,
+                                 count_text_tokens, truncate_to_tokens)
+
+logger = setup_logger("app")
+
+HISTORY_HEADER = "This is the conversation history:\n"
+DEFAULT_HISTORY_TOKEN_SHARE = 0.3  # share of the free budget reserved for history when there are knowledge chunks
+DEFAULT_MIN_CHUNK_TOKENS = 32  # a chunk that does not fit is cut to the remaining budget only if this much is left
 
 
 def build_prompt(
         user_input: Optional[str],
         knowledge: Optional[str],
-        history: Optional[str]  # ← include_history is removed
+        history: Optional[Union[str, Sequence[str]]],  # ← include_history is removed
+        knowledge_chunks: Optional[Sequence[str]] = None,
+        token_budget: Optional[int] = None,
+        model: str = "",
+        history_token_share: float = DEFAULT_HISTORY_TOKEN_SHARE,
+        min_chunk_tokens: int = DEFAULT_MIN_CHUNK_TOKENS
 ) -> List[Dict[str, str]]:
-    """Construct the full prompt as a list of messages."""
+    """
+    Construct the full prompt as a list of messages.
+
+    Knowledge chunks are listed under `knowledge` as "- chunk" lines, best-ranked first.
+    With a `token_budget`, the prompt is cut to fit it, counted with the model's tokenizer:
+    the lowest-ranked chunks and the oldest history entries go first, and the last chunk
+    that still partly fits is shortened. The user input itself is never cut.
+
+    Args:
+        user_input: The user's message.
+        knowledge: System text (instructions plus any fixed knowledge).
+        history: Conversation history, as one string (one entry per line) or a list of entries, oldest first.
+        knowledge_chunks: Retrieved chunks, best-ranked first.
+        token_budget: Maximum prompt tokens (context window minus the output reserve); None disables trimming.
+        model: Model name used to pick the tokenizer.
+        history_token_share: Share of the budget left after the user input and `knowledge` that history may use
+            while there are chunks competing for it; whatever one side leaves unused goes to the other.
+        min_chunk_tokens: Smallest useful remainder to shorten a chunk into.
+
+    Returns:
+        List[Dict[str, str]]: The chat messages.
+    """
+    chunks = list(knowledge_chunks or [])
+    entries = history.split("\n") if isinstance(history, str) else list(history or [])
+
+    if token_budget is not None:
+        knowledge, chunks, entries = _fit_to_budget(user_input, knowledge, chunks, entries, token_budget, model,
+                                                    history_token_share, min_chunk_tokens)
+    return _assemble(user_input, knowledge, chunks, entries)
+
+
+def _assemble(user_input: Optional[str], knowledge: Optional[str], chunks: List[str],
+              entries: List[str]) -> List[Dict[str, str]]:
     prompt = []
 
-    if knowledge:
-        prompt.append({"role": "system", "content": knowledge})
+    knowledge_text = "\n".join(([knowledge] if knowledge else []) + [f"- {chunk}" for chunk in chunks])
+    if knowledge_text:
+        prompt.append({"role": "system", "content": knowledge_text})
 
-    if history:
-        prompt.append({"role": "system", "content": f"This is the conversation history:\n{history}"})
+    if entries:
+        prompt.append({"role": "system", "content": HISTORY_HEADER + "\n".join(entries)})
 
     if user_input:
         prompt.append({"role": "user", "content": user_input})
 
     return prompt
+
+
+def _fit_to_budget(user_input: Optional[str], knowledge: Optional[str], chunks: List[str], entries: List[str],
+                   budget: int, model: str, history_token_share: float,
+                   min_chunk_tokens: int) -> Tuple[Optional[str], List[str], List[str]]:
+    """
+    Returns the knowledge text, chunks and history entries that fit `budget` together with the user input.
+    """
+    def cost(text: str) -> int:
+        return count_text_tokens(text, model) + 1  # + the newline joining it to the previous line
+
+    original_chunks, original_entries = chunks, entries
+    available = budget - PROMPT_OVERHEAD_TOKENS
+    if user_input:
+        available -= MESSAGE_OVERHEAD_TOKENS + count_text_tokens(user_input, model)
+    if knowledge or chunks:
+        available -= MESSAGE_OVERHEAD_TOKENS
+    if knowledge:
+        if count_text_tokens(knowledge, model) > available:
+            logger.warning(f"Knowledge text alone exceeds the prompt budget of {budget} tokens; truncating it.")
+            knowledge = truncate_to_tokens(knowledge, available, model)
+            chunks, entries = [], []
+        available -= count_text_tokens(knowledge, model)
+
+    history_overhead = MESSAGE_OVERHEAD_TOKENS + count_text_tokens(HISTORY_HEADER, model)
+
+    def take_history(limit: int, kept: List[str]) -> Tuple[List[str], int]:
+        """Newest entries first, until `limit` tokens (including the history message overhead) are used."""
+        used = history_overhead if kept else 0
+        used += sum(cost(entry) for entry in kept)
+        for entry in reversed(entries[:len(entries) - len(kept)]):
+            extra = cost(entry) + (0 if kept else history_overhead)
+            if used + extra > limit:
+                break
+            kept.insert(0, entry)
+            used += extra
+        return kept, used
+
+    kept_entries, history_used = take_history(int(available * history_token_share) if chunks else available, [])
+
+    kept_chunks, chunks_used = [], 0
+    for chunk in chunks:
+        line = f"- {chunk}"
+        room = available - history_used - chunks_used
+        if cost(line) <= room:
+            kept_chunks.append(chunk)
+            chunks_used += cost(line)
+            continue
+        if room - 1 >= min_chunk_tokens:
+            shortened = truncate_to_tokens(line, room - 1, model)[2:]
+            kept_chunks.append(shortened)
+            chunks_used += cost(f"- {shortened}")
+        break
+
+    # History may use whatever the chunks left over
+    kept_entries, history_used = take_history(available - chunks_used, kept_entries)
+
+    # Tokenizing whole messages can differ slightly from summing their lines: drop more until it fits
+    while count_message_tokens(_assemble(user_input, knowledge, kept_chunks, kept_entries), model) > budget:
+        if kept_entries:
+            kept_entries.pop(0)
+        elif kept_chunks:
+            kept_chunks.pop()
+        else:
+            logger.warning(f"The user input alone exceeds the prompt budget of {budget} tokens.")
+            break
+
+    if kept_chunks != original_chunks or kept_entries != original_entries:
+        logger.info(f"Prompt fitted to {budget} tokens: kept {len(kept_chunks)}/{len(original_chunks)} knowledge "
+                    f"chunk(s) and {len(kept_entries)}/{len(original_entries)} history entr(ies).")
+    return knowledge, kept_chunks, kept_entries
@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": False,
+    "providers": [],  # providers eligible for routing and hedging, e.g. ["openai", "ollama"]
+    "models": {},  # model per provider; the configured llm_config.model is used for llm_config.provider
+    "hedge": True,
+    "hedge_providers": None,  # providers that may receive the hedged duplicate (default: all of `providers`)
+    "hedge_percentile": 95,  # a hedge is sent once the first provider is slower than this percentile
+    "hedge_after_ms": 3000,  # hedge delay used until a provider has `min_samples` latencies
+    "min_samples": 20,
+    "window": 200,  # latencies kept per provider
+    "failure_cooldown_s": 30,  # a failed provider is skipped for this long
+    "max_workers": 16
+}
+
+# call(provider, prompt, temperature) -> answer; raises when the provider fails
+ProviderCall = Callable[[str, Any, float], str]
+
+
+class ProviderStats:
+    """
+    Rolling latency window and health of one provider.
+    """
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.failed_at: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.wins = 0
+        self.hedges = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        return float(np.percentile(self.latencies, q)) if self.latencies else None
+
+
+class ProviderRouter:
+    """
+    Latency-aware routing with hedged requests across several LLM providers.
+
+    Each request goes to the healthy provider with the lowest median latency. If it has not
+    answered once its own `hedge_percentile` latency has passed, the same request is sent to
+    the next provider listed in `hedge_providers`, and the first good answer wins. A provider whose call raises is put
+    in cooldown for `failure_cooldown_s` and the request fails over to the next one.
+    """
+
+    def __init__(self, rconf: dict):
+        self.providers: List[str] = list(rconf.get("providers", DEFAULTS["providers"]))
+        self.hedge = rconf.get("hedge", DEFAULTS["hedge"])
+        self.hedge_providers = set(rconf.get("hedge_providers") or self.providers)
+        self.hedge_percentile = rconf.get("hedge_percentile", DEFAULTS["hedge_percentile"])
+        self.hedge_after = rconf.get("hedge_after_ms", DEFAULTS["hedge_after_ms"]) / 1000.0
+        self.min_samples = rconf.get("min_samples", DEFAULTS["min_samples"])
+        self.failure_cooldown = rconf.get("failure_cooldown_s", DEFAULTS["failure_cooldown_s"])
+
+        self._stats = {provider: ProviderStats(rconf.get("window", DEFAULTS["window"])) for provider in self.providers}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=rconf.get("max_workers", DEFAULTS["max_workers"]),
+                                        thread_name_prefix="llm-route")
+
+    def ranked(self) -> List[str]:
+        """
+        Providers in routing order: healthy ones by median latency (untried first), then those in cooldown.
+        """
+        now = time.monotonic()
+        with self._lock:
+            def key(provider: str):
+                stats = self._stats[provider]
+                cooling = stats.failed_at is not None and now - stats.failed_at < self.failure_cooldown
+                median = stats.percentile(50)
+                return cooling, median if median is not None else 0.0, self.providers.index(provider)
+
+            return sorted(self.providers, key=key)
+
+    def _hedge_delay(self, provider: str) -> float:
+        with self._lock:
+            stats = self._stats[provider]
+            if len(stats.latencies) < self.min_samples:
+                return self.hedge_after
+            return stats.percentile(self.hedge_percentile)
+
+    def _run(self, call: ProviderCall, provider: str, prompt: Any, temperature: float) -> str:
+        started = time.perf_counter()
+        try:
+            response = call(provider, prompt, temperature)
+        except Exception:
+            with self._lock:
+                stats = self._stats[provider]
+                stats.calls += 1
+                stats.failures += 1
+                stats.failed_at = time.monotonic()
+            raise
+
+        with self._lock:
+            stats = self._stats[provider]
+            stats.calls += 1
+            stats.latencies.append(time.perf_counter() - started)
+            stats.failed_at = None
+        return response
+
+    def ask(self, call: ProviderCall, prompt: Any, temperature: float) -> str:
+        """
+        Sends the prompt to the fastest healthy provider, hedging to the next one if it is slow.
+
+        Args:
+            call: Function (provider, prompt, temperature) -> answer that raises when the provider fails.
+            prompt: The prompt passed through to `call`.
+            temperature: Sampling temperature passed through to `call`.
+
+        Returns:
+            str: The first successful answer.
+
+        Raises:
+            Exception: The last provider error when every attempted provider failed.
+        """
+        order = self.ranked()
+        pending: Dict[Future, str] = {}
+        error: Optional[BaseException] = None
+
+        def launch(provider: str):
+            pending[self._pool.submit(self._run, call, provider, prompt, temperature)] = provider
+
+        def hedge_deadline(provider: str) -> Optional[float]:
+            return time.monotonic() + self._hedge_delay(provider) if self.hedge else None
+
+        launch(order[0])
+        remaining = order[1:]
+        deadline = hedge_deadline(order[0])
+
+        while pending:
+            hedge_to = next((p for p in remaining if p in self.hedge_providers), None) if deadline else None
+            timeout = max(0.0, deadline - time.monotonic()) if hedge_to else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:  # the running attempt is slower than its p95: send the duplicate
+                logger.info(f"Hedging LLM request to {hedge_to}; {', '.join(pending.values())} is slow.")
+                remaining.remove(hedge_to)
+                with self._lock:
+                    self._stats[hedge_to].hedges += 1
+                launch(hedge_to)
+                deadline = None
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    self._cancel(pending)
+                    with self._lock:
+                        self._stats[provider].wins += 1
+                    return future.result()
+                logger.warning(f"LLM provider {provider} failed: {error}")
+
+            if not pending and remaining:  # every attempt so far failed: fail over immediately
+                provider = remaining.pop(0)
+                launch(provider)
+                deadline = hedge_deadline(provider)
+        raise error
+
+    @staticmethod
+    def _cancel(pending: Dict[Future, str]):
+        """
+        Cancels the losing attempts. One that has not started yet never runs; a running one cannot be
+        interrupted mid-HTTP-call, so its answer is discarded (its latency is still recorded).
+        """
+        for future in pending:
+            future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                provider: {
+                    "p50_ms": round(stats.percentile(50) * 1000, 1) if stats.latencies else None,
+                    "p95_ms": round(stats.percentile(95) * 1000, 1) if stats.latencies else None,
+                    "calls": stats.calls,
+                    "failures": stats.failures,
+                    "hedges": stats.hedges,
+                    "wins": stats.wins
+                }
+                for provider, stats in self._stats.items()
+            }
+
+
+_routers: Dict[Tuple[str, ...], ProviderRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_provider_router(config: Optional[dict]) -> Optional[ProviderRouter]:
+    """
+    Returns the process-wide router for the `llm_config.routing` providers, or None when routing is disabled.
+    Latency windows live in the router, so they are shared by every LLMClient routing over the same providers.
+    """
+    rconf = (config or {}).get("llm_config", {}).get("routing", {})
+    providers = tuple(rconf.get("providers", DEFAULTS["providers"]))
+    if not rconf.get("enabled", DEFAULTS["enabled"]) or not providers:
+        return None
+
+    with _routers_lock:
+        if providers not in _routers:
+            _routers[providers] = ProviderRouter(rconf)
+            logger.info(f"LLM routing over {list(providers)} (hedge={_routers[providers].hedge}).")
+        return _routers[providers]
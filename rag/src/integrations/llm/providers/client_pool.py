@@ -0,0 +1,147 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import google.generativeai as genai
+import httpx
+import ollama
+import requests
+from openai import OpenAI
+from requests.adapters import HTTPAdapter
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "pool_connections": 4,  # distinct hosts kept per requests session
+    "pool_maxsize": 16,  # keep-alive connections per host
+    "connect_timeout": 5.0,
+    "read_timeout": 120.0,
+    "max_retries": 0
+}
+
+
+class ProviderClientPool:
+    """
+    Lazily built, reused HTTP sessions and SDK clients for the LLM providers.
+
+    One client is kept per (provider, base URL, model), so every call to the same server
+    reuses its keep-alive connections instead of opening a new TCP (and TLS) connection.
+    All clients share the configured connection limits and connect/read timeouts.
+    """
+
+    def __init__(self, pool_connections: int = DEFAULTS["pool_connections"],
+                 pool_maxsize: int = DEFAULTS["pool_maxsize"],
+                 connect_timeout: float = DEFAULTS["connect_timeout"],
+                 read_timeout: float = DEFAULTS["read_timeout"],
+                 max_retries: int = DEFAULTS["max_retries"]):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+
+        self._clients: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """
+        (connect, read) timeout for `requests` calls.
+        """
+        return self.connect_timeout, self.read_timeout
+
+    def _get(self, key: Tuple[str, Optional[str], Optional[str]], build: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = build()
+                logger.info(f"Created {key[0]} client (base_url={key[1]}, model={key[2]}).")
+            return client
+
+    def _httpx_client(self) -> httpx.Client:
+        return httpx.Client(
+            limits=httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        )
+
+    def session(self, provider: str, base_url: str) -> requests.Session:
+        """
+        Keep-alive `requests` session for a provider's HTTP server; pass `timeout=pool.timeout` with each call.
+        """
+        def build() -> requests.Session:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                                  max_retries=self.max_retries)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            return session
+
+        return self._get((provider, base_url, None), build)
+
+    def openai_client(self, base_url: Optional[str] = None, api_key: Optional[str] = None) -> OpenAI:
+        return self._get(("openai", base_url, None), lambda: OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url,
+            max_retries=self.max_retries,
+            http_client=self._httpx_client()
+        ))
+
+    def ollama_client(self, host: Optional[str] = None) -> ollama.Client:
+        return self._get(("ollama", host, None), lambda: ollama.Client(
+            host=host,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize)
+        ))
+
+    def gemini_model(self, model: str) -> genai.GenerativeModel:
+        return self._get(("gemini", None, model), lambda: genai.GenerativeModel(model))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients = [f"{provider}|{base_url or ''}|{model or ''}" for provider, base_url, model in self._clients]
+        return {
+            "clients": clients,
+            "pool_maxsize": self.pool_maxsize,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout
+        }
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                if hasattr(client, "close"):
+                    client.close()
+            self._clients.clear()
+
+
+_pool: Optional[ProviderClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def configure_client_pool(config: Optional[dict]) -> ProviderClientPool:
+    """
+    (Re)creates the process-wide provider client pool from the `llm_config.client_pool` section.
+    """
+    global _pool
+    pconf = (config or {}).get("llm_config", {}).get("client_pool", {})
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ProviderClientPool(**{key: pconf.get(key, default) for key, default in DEFAULTS.items()})
+        logger.info(f"Provider client pool configured with pool_maxsize={_pool.pool_maxsize}, "
+                    f"timeouts={_pool.timeout}")
+        return _pool
+
+
+def get_client_pool() -> ProviderClientPool:
+    """
+    Returns the process-wide provider client pool, creating one with default settings if none was configured.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProviderClientPool()
+        return _pool
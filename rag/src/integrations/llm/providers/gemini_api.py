@@ -3,6 +3,8 @@ import os
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig, HarmCategory, HarmBlockThreshold
 
+from integrations.llm.providers.client_pool import get_client_pool
+
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 
@@ -25,6 +27,8 @@ def gemini_call(prompt: str, model, temperature: float = None) -> str:
             HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
         }
 
+        if isinstance(model, str):
+            model = get_client_pool().gemini_model(model)
         response = model.generate_content(
             prompt,  # todo
             generation_config=generation_config,
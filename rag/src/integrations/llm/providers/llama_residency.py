@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from llama_cpp import Llama
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "model_path": r"llama.cpp\models\mistral-7b-instruct-v0.1-q4_k_m.gguf",
+    "n_threads": 6,
+    "n_ctx": 2048,
+    "n_batch": 512,
+    "instances": 1,  # models kept loaded; each serves one request at a time
+    "idle_timeout": 600,  # seconds without requests before the models are unloaded (0 keeps them forever)
+    "warmup": True  # load the model at startup instead of on the first request
+}
+
+
+class LlamaResidency:
+    """
+    Keeps llama.cpp (bindings mode) models loaded between requests.
+
+    Up to `instances` `Llama` objects are created lazily and handed out one request at a
+    time (a `Llama` object is not safe to use from two threads at once); further callers
+    wait for a free instance. A background thread unloads every idle instance once no
+    request has arrived for `idle_timeout` seconds, and the next request loads it again.
+    """
+
+    def __init__(self, model_path: str = DEFAULTS["model_path"], n_threads: int = DEFAULTS["n_threads"],
+                 n_ctx: int = DEFAULTS["n_ctx"], n_batch: int = DEFAULTS["n_batch"],
+                 instances: int = DEFAULTS["instances"], idle_timeout: float = DEFAULTS["idle_timeout"]):
+        self.model_path = model_path
+        self.n_threads = n_threads
+        self.n_ctx = n_ctx
+        self.n_batch = n_batch
+        self.instances = max(1, int(instances))
+        self.idle_timeout = idle_timeout
+
+        self._idle: "queue.LifoQueue[Llama]" = queue.LifoQueue()
+        self._loaded = 0
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+        self.loads = 0
+        self.unloads = 0
+        self.requests = 0
+
+    def _load(self) -> Llama:
+        started = time.perf_counter()
+        llm = Llama(model_path=self.model_path, n_threads=self.n_threads, n_ctx=self.n_ctx, n_batch=self.n_batch,
+                    verbose=False)
+        self.loads += 1
+        logger.info(f"Loaded llama.cpp model {self.model_path} in {time.perf_counter() - started:.1f}s.")
+        self._start_reaper()
+        return llm
+
+    @contextmanager
+    def acquire(self) -> Iterator[Llama]:
+        """
+        Lends a loaded model to the caller for the duration of the `with` block.
+        """
+        llm = None
+        while llm is None:
+            try:
+                llm = self._idle.get_nowait()
+                break
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                reserve = self._loaded < self.instances
+                if reserve:
+                    self._loaded += 1
+            if reserve:
+                try:
+                    llm = self._load()
+                except Exception:
+                    with self._lock:
+                        self._loaded -= 1
+                    raise
+                break
+
+            try:
+                llm = self._idle.get(timeout=1.0)  # every instance is busy: wait for one
+            except queue.Empty:
+                continue
+
+        self.requests += 1
+        self._last_used = time.monotonic()
+        try:
+            yield llm
+        finally:
+            self._last_used = time.monotonic()
+            self._idle.put(llm)
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:
+        """
+        Runs a completion on a resident model; keyword arguments go to `Llama.__call__`.
+        """
+        with self.acquire() as llm:
+            response = llm(prompt=prompt, **kwargs)
+        return response["choices"][0]["text"]
+
+    def stream(self, prompt: str, **kwargs: Any) -> Iterator[str]:
+        """
+        Streams a completion from a resident model; the model stays lent out until the stream ends.
+        """
+        with self.acquire() as llm:
+            for chunk in llm(prompt=prompt, stream=True, **kwargs):
+                text = chunk["choices"][0]["text"]
+                if text:
+                    yield text
+
+    def warmup(self, background: bool = True):
+        """
+        Loads one instance ahead of the first request (in a daemon thread unless `background` is False).
+        """
+        def load():
+            try:
+                with self.acquire():
+                    pass
+            except Exception as e:
+                logger.error(f"llama.cpp warm-up failed: {e}")
+
+        if background:
+            threading.Thread(target=load, name="llama-warmup", daemon=True).start()
+        else:
+            load()
+
+    def unload(self) -> int:
+        """
+        Drops every idle instance; instances in use are kept. Returns how many were unloaded.
+        """
+        dropped: List[Llama] = []
+        while True:
+            try:
+                dropped.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._loaded -= len(dropped)
+        for llm in dropped:
+            if hasattr(llm, "close"):
+                llm.close()
+        self.unloads += len(dropped)
+        if dropped:
+            logger.info(f"Unloaded {len(dropped)} idle llama.cpp model instance(s).")
+        return len(dropped)
+
+    def _start_reaper(self):
+        with self._lock:
+            if self.idle_timeout <= 0 or (self._reaper is not None and self._reaper.is_alive()):
+                return
+            self._reaper = threading.Thread(target=self._reap, name="llama-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        interval = min(30.0, max(1.0, self.idle_timeout / 4))
+        while not self._stop.wait(interval):
+            if self._loaded and time.monotonic() - self._last_used >= self.idle_timeout:
+                self.unload()
+
+    def close(self):
+        self._stop.set()
+        self.unload()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_path": self.model_path,
+            "loaded": self._loaded,
+            "idle": self._idle.qsize(),
+            "instances": self.instances,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "requests": self.requests,
+            "idle_seconds": round(time.monotonic() - self._last_used, 1)
+        }
+
+
+_residency: Optional[LlamaResidency] = None
+_residency_lock = threading.Lock()
+
+
+def configure_llama_residency(config: Optional[dict]) -> LlamaResidency:
+    """
+    (Re)creates the process-wide llama.cpp residency manager from the `llm_config.llamacpp` section,
+    warming it up when that section asks for it and bindings mode is in use.
+    """
+    global _residency
+    lconf = (config or {}).get("llm_config", {}).get("llamacpp", {})
+    with _residency_lock:
+        if _residency is not None:
+            _residency.close()
+        _residency = LlamaResidency(**{key: lconf.get(key, DEFAULTS[key])
+                                       for key in ("model_path", "n_threads", "n_ctx", "n_batch",
+                                                   "instances", "idle_timeout")})
+        residency = _residency
+
+    uses_bindings = (config or {}).get("llm_config", {}).get("provider") == "llamacpp" \
+        and lconf.get("mode") == "bindings"
+    if uses_bindings and lconf.get("warmup", DEFAULTS["warmup"]):
+        residency.warmup()
+    return residency
+
+
+def get_llama_residency() -> LlamaResidency:
+    """
+    Returns the process-wide residency manager, creating one with default settings if none was configured.
+    """
+    global _residency
+    with _residency_lock:
+        if _residency is None:
+            _residency = LlamaResidency()
+        return _residency
@@ -1,22 +1,27 @@
+import json
+from typing import Iterator
+
 import requests
-from llama_cpp import Llama
+
+from integrations.llm.providers.client_pool import get_client_pool
+from integrations.llm.providers.llama_residency import get_llama_residency
 
 LLAMA_SERVER_URL = "http://localhost:8080/completion"
-MODEL_PATH = r"llama.cpp\models\mistral-7b-instruct-v0.1-q4_k_m.gguf"
 
-mode = "rest"  # cli rest bindings
+mode = "rest"  # rest bindings (the model path and size settings live in llm_config.llamacpp)
 
 
-def llamacpp_call(prompt, temperature) -> str:
-    if mode == "rest":
+def llamacpp_call(prompt, temperature, call_mode=None) -> str:
+    call_mode = call_mode or mode
+    if call_mode == "rest":
         return call_llama_rest(prompt, temperature)
-    if mode == "bindings":
-        return call_llama_bindings(prompt)
+    if call_mode == "bindings":
+        return call_llama_bindings(prompt, temperature)
     return "Invalid llama.cpp mode."
 
 
-def call_llama_rest(prompt: str, temperature) -> str:
-    payload = {
+def _rest_payload(prompt: str, temperature) -> dict:
+    return {
         "prompt": prompt,
         "n_predict": 200,
         "temperature": temperature,
@@ -24,26 +29,56 @@ def call_llama_rest(prompt: str, temperature) -> str:
         "top_p": 0.9,
         "repeat_penalty": 1.1
     }
+
+
+def call_llama_rest(prompt: str, temperature) -> str:
+    payload = _rest_payload(prompt, temperature)
     print(f"[INFO] Sending prompt to llama-server at {LLAMA_SERVER_URL}")
+    pool = get_client_pool()
     try:
-        response = requests.post(LLAMA_SERVER_URL, json=payload, timeout=20)
+        response = pool.session("llamacpp", LLAMA_SERVER_URL).post(LLAMA_SERVER_URL, json=payload, timeout=pool.timeout)
         response.raise_for_status()
         return response.json().get("content", "").strip()
     except requests.exceptions.RequestException as e:
         return f"[ERROR] Failed to query llama-server: {e}"
 
 
+def llamacpp_stream(prompt: str, temperature, call_mode=None) -> Iterator[str]:
+    """
+    Stream a completion from llama-server (one `data: {...}` server-sent event per token),
+    or from the resident model in bindings mode.
+    """
+    if (call_mode or mode) == "bindings":
+        yield from get_llama_residency().stream(prompt, **_bindings_params(temperature))
+        return
+
+    payload = {**_rest_payload(prompt, temperature), "stream": True}
+    pool = get_client_pool()
+    try:
+        with pool.session("llamacpp", LLAMA_SERVER_URL).post(LLAMA_SERVER_URL, json=payload, timeout=pool.timeout,
+                                                             stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if event.get("content"):
+                    yield event["content"]
+                if event.get("stop"):
+                    break
+    except requests.exceptions.RequestException as e:
+        yield f"[ERROR] Failed to query llama-server: {e}"
+
+
+def _bindings_params(temperature) -> dict:
+    return {
+        "max_tokens": 150,
+        "temperature": temperature,
+        "top_k": 40,
+        "top_p": 0.9
+    }
+
+
 def call_llama_bindings(prompt: str, temperature) -> str:
-    llm = Llama(
-        model_path=MODEL_PATH,
-        n_threads=6,
-        n_ctx=2048
-    )
-    response = llm(
-        prompt=prompt,
-        max_tokens=150,
-        temperature=temperature,
-        top_k=40,
-        top_p=0.9
-    )
-    return response["choices"][0]["text"]
+    # The model stays loaded between calls; see LlamaResidency
+    return get_llama_residency().generate(prompt, **_bindings_params(temperature))
@@ -1,15 +1,19 @@
-import requests
+from integrations.llm.providers.client_pool import get_client_pool
 
 
 def lmstudio_call(prompt: str, port: int = 1234) -> str:
+    pool = get_client_pool()
+    base_url = f"http://localhost:{port}"
     try:
-        res = requests.post(
-            f"http://localhost:{port}/v1/chat/completions",
+        res = pool.session("lmstudio", base_url).post(
+            f"{base_url}/v1/chat/completions",
             json={
                 "model": "llama-3.2-3b-instruct",
                 "messages": [{"role": "user", "content": prompt}]
-            }
+            },
+            timeout=pool.timeout
         )
+        res.raise_for_status()
         return res.json()["choices"][0]["message"]["content"].strip()
     except Exception as e:
         return f"LM Studio error: {e}"
@@ -1,4 +1,6 @@
-import ollama
+from typing import Iterator
+
+from integrations.llm.providers.client_pool import get_client_pool
 
 
 def ollama_call(
@@ -24,7 +26,7 @@ def ollama_call(
         str: Response content or error message
     """
     try:
-        response = ollama.chat(
+        response = get_client_pool().ollama_client().chat(
             model=model,
             messages=messages,
             format=format,
@@ -32,6 +34,23 @@ def ollama_call(
             stream=stream,
             keep_alive=keep_alive,
         )
+        if stream:
+            return "".join(part["message"]["content"] for part in response).strip()
         return response["message"]["content"].strip()
     except Exception as e:
         return f"Ollama API error: {e}"
+
+
+def ollama_stream(messages, model="llama3.2", options=None, keep_alive="5m") -> Iterator[str]:
+    """
+    Stream a local Ollama chat completion, yielding text as the model produces it.
+    Takes the same arguments as `ollama_call` (except `format` and `stream`).
+    """
+    try:
+        for part in get_client_pool().ollama_client().chat(model=model, messages=messages, options=options, stream=True,
+                                keep_alive=keep_alive):
+            content = part["message"]["content"]
+            if content:
+                yield content
+    except Exception as e:
+        yield f"Ollama API error: {e}"
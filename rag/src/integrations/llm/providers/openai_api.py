@@ -1,9 +1,6 @@
-import os
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
 
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from integrations.llm.providers.client_pool import get_client_pool
 
 # Optional for OpenAI: discourages repeating exact phrases.
 frequency_penalty = 0.0
@@ -20,7 +17,7 @@ def openai_call(
 ) -> str:
     """Call the OpenAI API with extended options."""
     try:
-        response = client.chat.completions.create(
+        response = get_client_pool().openai_client().chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
@@ -32,3 +29,29 @@ def openai_call(
         return response.choices[0].message.content.strip()
     except Exception as e:
         return f"OpenAI API error: {e}"
+
+
+def openai_stream(
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None
+) -> Iterator[str]:
+    """Stream the completion from the OpenAI API, yielding text deltas as they arrive."""
+    try:
+        stream = get_client_pool().openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stream=True,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        yield f"OpenAI API error: {e}"
@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from helpers.logger import setup_logger
+from helpers.text_hash import text_hash
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": False,
+    "path": "data/llm_cache.sqlite",
+    "ttl_seconds": 3600,
+    "max_entries": 10000  # least recently used responses are evicted beyond this count
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+EVICT_EVERY = 100  # stores between eviction passes
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache of LLM responses in SQLite (WAL mode, so several workers can share the file).
+
+    Keys hash the provider, model, sampling parameters and the fully built prompt, so only a
+    byte-identical request is answered from the cache. Entries expire after `ttl_seconds`; beyond
+    `max_entries` the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._stores_since_evict = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, top_p: float, max_tokens: int, prompt: Any) -> str:
+        """
+        Builds the cache key for a request; the prompt is hashed in its serialized (message list) form.
+        """
+        prompt_hash = text_hash(json.dumps(prompt, sort_keys=True, ensure_ascii=False))
+        return f"{provider}|{model}|{float(temperature)}|{float(top_p)}|{int(max_tokens)}|{prompt_hash}"
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self.stores += 1
+            self._stores_since_evict += 1
+            if self._stores_since_evict >= EVICT_EVERY:
+                self._stores_since_evict = 0
+                self._evict(now)
+
+    def _evict(self, now: float):
+        evicted = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            evicted += self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        self.evictions += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries
+        }
+
+
+_response_caches: Dict[str, LLMResponseCache] = {}
+_response_caches_lock = threading.Lock()
+
+
+def get_response_cache(config: Optional[dict]) -> Optional[LLMResponseCache]:
+    """
+    Returns the process-wide LLM response cache for the configured path, or None when it is disabled.
+    """
+    cconf = (config or {}).get("llm_cache", {})
+    if not cconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    path = cconf.get("path", DEFAULTS["path"])
+    with _response_caches_lock:
+        if path not in _response_caches:
+            _response_caches[path] = LLMResponseCache(
+                path,
+                ttl_seconds=cconf.get("ttl_seconds", DEFAULTS["ttl_seconds"]),
+                max_entries=cconf.get("max_entries", DEFAULTS["max_entries"])
+            )
+            logger.info(f"LLM response cache opened at {path}.")
+        return _response_caches[path]
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sentence_transformers import CrossEncoder
+
+from helpers.logger import setup_logger
+from helpers.text_hash import text_hash
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": False,
+    "model": "cross-encoder/ms-marco-MiniLM-L-6-v2",
+    "candidates": 20,  # hits fetched from the vector store before reranking
+    "time_budget_ms": 300,  # reranking is skipped when the estimated scoring time exceeds this
+    "max_length": 512,  # tokens per (query, chunk) pair
+    "cache_size": 10_000  # cached (query, chunk) scores
+}
+
+LATENCY_SMOOTHING = 0.2  # weight of the newest observation in the per-pair latency estimate
+
+
+class CrossEncoderReranker:
+    """
+    Reorders vector-search hits with a cross-encoder, scoring all (query, chunk) pairs in one CPU batch.
+
+    Scores are cached per (query hash, chunk hash). Before scoring, the uncached pairs are costed
+    with a moving average of the observed per-pair latency; if that exceeds the time budget the
+    hits are returned in their original order, so a slow or overloaded host never delays answers.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        rconf = (config or {}).get("knowledge", {}).get("rerank", {})
+        self.model_name = rconf.get("model", DEFAULTS["model"])
+        self.candidates = rconf.get("candidates", DEFAULTS["candidates"])
+        self.time_budget = rconf.get("time_budget_ms", DEFAULTS["time_budget_ms"]) / 1000.0
+        self.max_length = rconf.get("max_length", DEFAULTS["max_length"])
+        self.cache_size = rconf.get("cache_size", DEFAULTS["cache_size"])
+
+        self.model: Optional[CrossEncoder] = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pair_seconds: Optional[float] = None  # smoothed scoring latency per pair
+
+        self.reranked = 0
+        self.skipped = 0
+        self.cache_hits = 0
+
+    def _lazy_load_model(self):
+        with self._model_lock:
+            if self.model is None:
+                logger.info(f"Loading CrossEncoder model: {self.model_name}")
+                self.model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+
+    def rerank(self, query: str, hits: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Returns the `top_k` hits ordered by cross-encoder relevance, each with a `rerank_score`.
+
+        Args:
+            query (str): The user query.
+            hits (List[Dict[str, Any]]): Vector-search matches (must carry `text`).
+            top_k (int): Number of hits to keep.
+
+        Returns:
+            List[Dict[str, Any]]: Reranked hits, or the first `top_k` hits unchanged when skipped.
+        """
+        if len(hits) <= 1:
+            return hits[:top_k]
+
+        query_key = text_hash(query)
+        keys = [(query_key, text_hash(hit.get("text", ""))) for hit in hits]
+        scores = self._cached_scores(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing:
+            estimate = len(missing) * self._pair_seconds if self._pair_seconds is not None else 0.0
+            if estimate > self.time_budget:
+                self.skipped += 1
+                # decay the estimate so a transient slowdown does not disable reranking for good
+                self._pair_seconds *= 1 - LATENCY_SMOOTHING
+                logger.warning(f"Skipping rerank: ~{estimate * 1000:.0f} ms for {len(missing)} pair(s) "
+                               f"exceeds the {self.time_budget * 1000:.0f} ms budget.")
+                return hits[:top_k]
+
+            computed = self._score([(query, hits[i].get("text", "")) for i in missing])
+            self._store_scores([keys[i] for i in missing], computed)
+            for i, score in zip(missing, computed):
+                scores[i] = score
+
+        self.reranked += 1
+        order = sorted(range(len(hits)), key=lambda i: scores[i], reverse=True)[:top_k]
+        return [{**hits[i], "rerank_score": scores[i]} for i in order]
+
+    def _score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        self._lazy_load_model()  # model loading is excluded from the latency estimate
+
+        started = time.perf_counter()
+        scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        per_pair = (time.perf_counter() - started) / len(pairs)
+
+        if self._pair_seconds is None:
+            self._pair_seconds = per_pair
+        else:
+            self._pair_seconds += LATENCY_SMOOTHING * (per_pair - self._pair_seconds)
+        return [float(score) for score in scores]
+
+    def _cached_scores(self, keys: List[Tuple[str, str]]) -> List[Optional[float]]:
+        with self._cache_lock:
+            scores = []
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                scores.append(score)
+            return scores
+
+    def _store_scores(self, keys: List[Tuple[str, str]], scores: List[float]):
+        with self._cache_lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = score
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "reranked": self.reranked,
+            "skipped": self.skipped,
+            "cache_hits": self.cache_hits,
+            "cached_scores": len(self._cache),
+            "pair_ms": round(self._pair_seconds * 1000, 3) if self._pair_seconds is not None else None
+        }
+
+
+def create_reranker(config: Optional[dict]) -> Optional[CrossEncoderReranker]:
+    """
+    Builds the reranker described by `knowledge.rerank`, or None when it is disabled.
+    """
+    rconf = (config or {}).get("knowledge", {}).get("rerank", {})
+    if not rconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+    return CrossEncoderReranker(config)
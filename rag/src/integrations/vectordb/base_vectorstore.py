@@ -0,0 +1,764 @@
+import os
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+import numpy as np
+from openai import OpenAI
+from sentence_transformers import SentenceTransformer
+
+from helpers.executor import run_in_executor
+from helpers.logger import setup_logger
+from helpers.single_flight import get_single_flight
+from helpers.text_hash import normalize_text, text_hash
+from helpers.token_utils import estimate_text_token_count
+from integrations.embeddings.embedding_cache import get_embedding_cache
+from integrations.vectordb.chunk_manifest import get_chunk_manifest
+from integrations.vectordb.diversify import DEFAULTS as DIVERSIFY_DEFAULTS, diversify as diversify_matches
+from integrations.vectordb.filters import normalize_filters, filters_cache_key
+from integrations.vectordb.search_cache import get_search_cache
+from integrations.vectordb.sparse_index import (
+    DEFAULTS as SPARSE_DEFAULTS,
+    SEARCH_MODES,
+    get_sparse_index,
+    reciprocal_rank_fusion,
+)
+
+logger = setup_logger("app")
+
+# Default configuration values shared by all vector-store backends
+DEFAULTS = {
+    "collection": "source_texts",
+    "provider": "sentence-transformers",
+    "model": "all-MiniLM-L6-v2",
+    "openai_model": "text-embedding-ada-002",
+    "vector_size": 384,
+    "openai_vector_size": 1536,
+    "distance": "COSINE",
+    "embedding_batch_size": 64,
+    "upsert_batch_size": 256,
+    "openai_max_batch_inputs": 2048,  # OpenAI hard limit on inputs per embeddings request
+    "openai_max_batch_tokens": 250_000  # stay below the 300k tokens-per-request limit
+}
+
+DISTANCES = ("COSINE", "DOT", "EUCLID")
+
+DEFAULT_SEARCH_MODE = "dense"
+
+# Per-query options of search_similar, in their positional order after text/threshold/limit
+SEARCH_OPTIONS = ("search_effort", "filters", "search_mode", "diversify")
+
+# Point ids are uuid5(namespace, "<document_id>/<chunk hash>"), stable across re-ingestion
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1b8e-3a52-4d3e-9a57-2f0d2c9b7e41")
+
+
+class BaseVectorStore:
+    """
+    Embedding, caching and insert/search orchestration shared by the vector-store backends.
+
+    Subclasses implement `_upsert` and `_search_vector`; everything else
+    (batched embedding, the embedding cache and the search-result cache) lives here.
+
+    `ainsert_chunks` / `asearch_similar` are the non-blocking variants for async callers.
+    By default they run embedding and the backend hooks in the bounded executor; backends
+    with a native async client override `_aupsert` / `_asearch_vector` instead.
+    """
+
+    backend_name = "base"
+
+    def __init__(self, config: Optional[dict] = None, section: str = "qdrant"):
+        """
+        Reads settings from `vectordb.<section>`, falling back to `vectordb.qdrant`
+        so backends share the embedding configuration.
+        """
+        config = config or {}
+        vconf = config.get("vectordb", {})
+        self.conf = {**vconf.get("qdrant", {}), **vconf.get(section, {})}
+
+        self.collection_name = self.conf.get("collection_name", DEFAULTS["collection"])
+        self.provider = self.conf.get("provider", DEFAULTS["provider"]).lower()
+
+        # Embedding model config
+        if self.provider == "openai":
+            self.embedding_model_name = self.conf.get("embedding_model", DEFAULTS["openai_model"])
+            self.vector_size = self.conf.get("vector_size", DEFAULTS["openai_vector_size"])
+        else:
+            self.embedding_model_name = self.conf.get("embedding_model", DEFAULTS["model"])
+            self.vector_size = self.conf.get("vector_size", DEFAULTS["vector_size"])
+
+        distance = str(self.conf.get("distance", DEFAULTS["distance"])).upper()
+        self.distance_name = distance if distance in DISTANCES else DEFAULTS["distance"]
+
+        # Batching config
+        self.embedding_batch_size = self.conf.get("embedding_batch_size", DEFAULTS["embedding_batch_size"])
+        self.upsert_batch_size = self.conf.get("upsert_batch_size", DEFAULTS["upsert_batch_size"])
+        self.openai_max_batch_tokens = self.conf.get("openai_max_batch_tokens", DEFAULTS["openai_max_batch_tokens"])
+
+        self.embedding_model = None  # for sentence-transformers
+        self.openai_client = None  # for OpenAI
+        self._model_lock = threading.Lock()  # executor threads may race to load the model
+
+        # Shared with TextChunkingService; keyed the same way as `chunking.semantic_embed_model`
+        self.embedding_cache = get_embedding_cache(config, self._cache_model_name())
+        # Process-wide, so inserts through any store invalidate searches through all of them
+        self.search_cache = get_search_cache(config)
+        # Coalesces identical searches that run concurrently (a thundering herd costs one search)
+        self.search_flight = get_single_flight(config, "vector_search")
+        # Chunk hashes per document, used to re-ingest only what changed
+        self.manifest = get_chunk_manifest(config)
+        self._manifest_scope = f"{self.backend_name}/{self.collection_name}"
+        self._seen_revision: Optional[int] = None  # manifest revision the search cache was filled at
+        # BM25 index over the same chunks, for sparse and hybrid search
+        self.sparse_index = get_sparse_index(config, self._manifest_scope)
+        sconf = vconf.get("sparse", {})
+        self.rrf_k = sconf.get("rrf_k", SPARSE_DEFAULTS["rrf_k"])
+        self.hybrid_candidates = sconf.get("candidates", SPARSE_DEFAULTS["candidates"])
+        # Near-duplicate collapsing and MMR over an over-fetched candidate pool
+        dconf = vconf.get("diversify", {})
+        self.diversify = dconf.get("enabled", DIVERSIFY_DEFAULTS["enabled"])
+        self.diversify_candidates = dconf.get("candidates", DIVERSIFY_DEFAULTS["candidates"])
+        self.duplicate_threshold = dconf.get("duplicate_threshold", DIVERSIFY_DEFAULTS["duplicate_threshold"])
+        self.mmr_lambda = dconf.get("mmr_lambda", DIVERSIFY_DEFAULTS["mmr_lambda"])
+
+    # ---------- embeddings ----------
+
+    def _lazy_load_embedding_model(self):
+        """
+        Lazily loads the embedding model based on the provider.
+        """
+        with self._model_lock:
+            if self.provider == "openai":
+                if self.openai_client is None:
+                    logger.info("Loading OpenAI client for embeddings...")
+                    self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            else:
+                if self.embedding_model is None:
+                    logger.info(f"Loading SentenceTransformer model: {self.embedding_model_name}")
+                    self.embedding_model = SentenceTransformer(self.embedding_model_name)
+
+    def _cache_model_name(self) -> str:
+        """
+        Returns the model identifier used as the embedding cache namespace.
+        """
+        if self.provider == "openai":
+            return f"openai/{self.embedding_model_name}"
+        if "/" not in self.embedding_model_name:
+            return f"sentence-transformers/{self.embedding_model_name}"
+        return self.embedding_model_name
+
+    def _encode(self, text: str) -> List[float]:
+        """
+        Encodes a text string into an embedding using the configured provider.
+        """
+        return self._encode_many([text])[0].tolist()
+
+    def _encode_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes many texts, serving cached embeddings first and computing only the misses.
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(texts), vector_size).
+        """
+        if not texts:
+            return np.empty((0, self.vector_size), dtype=np.float32)
+
+        if self.embedding_cache is None:
+            return self._compute_embeddings(texts)
+
+        cached = self.embedding_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+
+        if missing:
+            computed = self._compute_embeddings([texts[i] for i in missing])
+            self.embedding_cache.put_many([texts[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                cached[i] = vector
+
+        logger.debug(f"Embedding cache served {len(texts) - len(missing)}/{len(texts)} text(s).")
+        return np.stack(cached).astype(np.float32, copy=False)
+
+    def _compute_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes many texts with one model call per batch.
+
+        Sentence-transformers receives whole lists (one forward pass per batch),
+        OpenAI receives `input=[...]` requests capped by input count and tokens.
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(texts), vector_size).
+        """
+        self._lazy_load_embedding_model()
+
+        if self.provider == "openai":
+            vectors = []
+            for batch in self._openai_batches(texts):
+                response = self.openai_client.embeddings.create(
+                    input=batch,
+                    model=self.embedding_model_name
+                )
+                # The API may return items out of order; sort by their index.
+                vectors.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+            return np.asarray(vectors, dtype=np.float32)
+
+        return np.asarray(
+            self.embedding_model.encode(
+                texts,
+                batch_size=self.embedding_batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ),
+            dtype=np.float32
+        )
+
+    def _openai_batches(self, texts: List[str]) -> Iterator[List[str]]:
+        """
+        Splits texts into OpenAI embedding requests that respect both the
+        configured batch size and the per-request token budget.
+        """
+        max_inputs = min(self.embedding_batch_size, DEFAULTS["openai_max_batch_inputs"])
+        batch, batch_tokens = [], 0
+
+        for text in texts:
+            tokens = estimate_text_token_count(text)
+            if batch and (len(batch) >= max_inputs or batch_tokens + tokens > self.openai_max_batch_tokens):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+
+        if batch:
+            yield batch
+
+    # ---------- insert / search ----------
+
+    def insert_chunks(self, document_id: str, chunks: List[str], tags: Optional[List[str]] = None) -> int:
+        """
+        Encodes and inserts text chunks into the collection.
+
+        Point ids are derived from (document_id, chunk hash), so re-adding a document is idempotent.
+        With the chunk manifest enabled, only new or changed chunks are embedded and upserted,
+        and chunks the document no longer contains are deleted.
+        Each payload carries `document_id`, `tags` and `ingested_at` (unix seconds) for filtering.
+
+        Returns:
+            int: Number of chunks upserted (unchanged chunks are not counted).
+        """
+        return self.insert_embedded(document_id, chunks, {}, tags=tags)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes texts with the store's embedding model (cache-first), without inserting them.
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(texts), vector_size).
+        """
+        return self._encode_many(texts)
+
+    def pending_chunks(self, document_id: str, chunks: List[str], tags: Optional[List[str]] = None) -> List[str]:
+        """
+        Returns the chunks of a document that are new or changed since it was last ingested,
+        i.e. the only ones `insert_embedded` needs embeddings for.
+        """
+        diff = self._diff_document(document_id, chunks, tags)
+        return [diff["chunks"][i] for i in diff["upsert"]]
+
+    def insert_embedded(self, document_id: str, chunks: List[str], embeddings: Dict[str, np.ndarray],
+                        tags: Optional[List[str]] = None) -> int:
+        """
+        Inserts a document's chunks using embeddings computed beforehand (see `embed` and
+        `pending_chunks`), letting bulk ingestion run embedding and upserts as separate stages.
+        Chunks that need upserting but are missing from `embeddings` are embedded here.
+
+        Returns:
+            int: Number of chunks upserted.
+        """
+        if not chunks:
+            logger.warning(f"No chunks to insert into {self.backend_name}.")
+            return 0
+
+        return self._apply_plan(self._plan_insert(document_id, chunks, tags, embeddings))
+
+    async def ainsert_chunks(self, document_id: str, chunks: List[str], tags: Optional[List[str]] = None) -> int:
+        """
+        Non-blocking `insert_chunks` for async callers.
+        """
+        if not chunks:
+            logger.warning(f"No chunks to insert into {self.backend_name}.")
+            return 0
+
+        plan = await run_in_executor(self._plan_insert, document_id, chunks, tags, {})
+        if plan["replace_document"]:
+            await self._adelete_document(document_id)
+        if plan["point_ids"]:
+            await self._aupsert(plan["point_ids"], plan["vectors"], plan["payloads"])
+        if plan["stale_ids"]:
+            await self._adelete(plan["stale_ids"])
+        await run_in_executor(self._update_indexes, plan)
+        return self._after_insert(plan)
+
+    @staticmethod
+    def _point_id(document_id: str, chunk_hash: str) -> str:
+        return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{document_id}/{chunk_hash}"))
+
+    def _diff_document(self, document_id: str, chunks: List[str], tags: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Compares a document's chunks with its manifest entry.
+
+        Returns:
+            Dict[str, Any]: `chunks` de-duplicated by hash, their `hashes` and `point_ids`, the indices to
+            `upsert`, the `stale_ids` to delete and whether the document was `known` to the manifest.
+        """
+        # Chunks differing only in whitespace share a hash (and so a point id): keep the first of each
+        by_hash = {}
+        for chunk in chunks:
+            by_hash.setdefault(text_hash(chunk), chunk)
+        hashes, chunks = list(by_hash), list(by_hash.values())
+        tags = sorted(set(tags or []))
+        point_ids = [self._point_id(document_id, chunk_hash) for chunk_hash in hashes]
+
+        previous = self.manifest.get(self._manifest_scope, document_id) if self.manifest else None
+        if previous is None:
+            upsert, stale_ids = list(range(len(chunks))), []
+        else:
+            previous_tags, previous_chunks = previous
+            # A tag change rewrites every payload; otherwise only unseen hashes are upserted
+            upsert = [i for i, chunk_hash in enumerate(hashes)
+                      if previous_tags != tags or chunk_hash not in previous_chunks]
+            current = set(hashes)
+            stale_ids = [point_id for chunk_hash, point_id in previous_chunks.items() if chunk_hash not in current]
+
+        return {"chunks": chunks, "tags": tags, "hashes": hashes, "point_ids": point_ids,
+                "upsert": upsert, "stale_ids": stale_ids, "known": previous is not None}
+
+    def _plan_insert(self, document_id: str, chunks: List[str], tags: Optional[List[str]],
+                     embeddings: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """
+        Diffs the document against the manifest and embeds whatever must be upserted.
+        """
+        diff = self._diff_document(document_id, chunks, tags)
+        upsert_chunks = [diff["chunks"][i] for i in diff["upsert"]]
+
+        missing = [chunk for chunk in upsert_chunks if chunk not in embeddings]
+        if missing:
+            embeddings = {**embeddings, **dict(zip(missing, self._encode_many(missing)))}
+
+        ingested_at = int(time.time())
+
+        def payload(i: int) -> Dict[str, Any]:
+            return {"document_id": document_id, "text": diff["chunks"][i], "chunk_hash": diff["hashes"][i],
+                    "tags": diff["tags"], "ingested_at": ingested_at}
+
+        # Unchanged chunks the sparse index lacks (ingested before it existed) are indexed as well
+        sparse_rows = list(diff["upsert"])
+        if self.sparse_index is not None and diff["known"]:
+            upserted = set(diff["upsert"])
+            unchanged = [i for i in range(len(diff["chunks"])) if i not in upserted]
+            missing = set(self.sparse_index.missing([diff["point_ids"][i] for i in unchanged]))
+            sparse_rows += [i for i in unchanged if diff["point_ids"][i] in missing]
+
+        return {
+            "document_id": document_id,
+            "tags": diff["tags"],
+            "point_ids": [diff["point_ids"][i] for i in diff["upsert"]],
+            "vectors": (np.stack([embeddings[chunk] for chunk in upsert_chunks]).astype(np.float32, copy=False)
+                        if upsert_chunks else np.empty((0, self.vector_size), dtype=np.float32)),
+            "payloads": [payload(i) for i in diff["upsert"]],
+            "sparse_ids": [diff["point_ids"][i] for i in sparse_rows],
+            "sparse_payloads": [payload(i) for i in sparse_rows],
+            "stale_ids": diff["stale_ids"],
+            # Documents the manifest has never seen may still have points from before it existed
+            "replace_document": self.manifest is not None and not diff["known"],
+            "manifest": dict(zip(diff["hashes"], diff["point_ids"])),
+            "unchanged": len(diff["chunks"]) - len(diff["upsert"])
+        }
+
+    def _apply_plan(self, plan: Dict[str, Any]) -> int:
+        if plan["replace_document"]:
+            self._delete_document(plan["document_id"])
+        if plan["point_ids"]:
+            self._upsert(plan["point_ids"], plan["vectors"], plan["payloads"])
+        if plan["stale_ids"]:
+            self._delete(plan["stale_ids"])
+        self._update_indexes(plan)
+        return self._after_insert(plan)
+
+    def _update_indexes(self, plan: Dict[str, Any]):
+        """
+        Mirrors an applied insert plan into the sparse index and the manifest.
+        """
+        if self.sparse_index is not None:
+            if plan["replace_document"]:
+                self.sparse_index.delete_document(plan["document_id"])
+            self.sparse_index.add(plan["sparse_ids"], plan["sparse_payloads"])
+            if plan["stale_ids"]:
+                self.sparse_index.delete(plan["stale_ids"])
+        if self.manifest:
+            self.manifest.replace(self._manifest_scope, plan["document_id"], plan["tags"], plan["manifest"])
+
+    def _after_insert(self, plan: Dict[str, Any]) -> int:
+        changed = plan["point_ids"] or plan["stale_ids"] or plan["replace_document"] or plan["sparse_ids"]
+        if changed and self.search_cache:
+            self.search_cache.invalidate(self.collection_name)
+        if changed and self.manifest:
+            self.manifest.bump_revision(self._manifest_scope)
+        logger.info(
+            f"Document '{plan['document_id']}' in {self.backend_name} collection '{self.collection_name}': "
+            f"{len(plan['point_ids'])} chunk(s) upserted, {len(plan['stale_ids'])} deleted, "
+            f"{plan['unchanged']} unchanged.")
+        return len(plan["point_ids"])
+
+    def search_similar(self, text: str, threshold: float, limit: int = 5,
+                       search_effort: Optional[int] = None,
+                       filters: Optional[Dict[str, Any]] = None,
+                       search_mode: Optional[str] = None,
+                       diversify: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """
+        Searches for chunks similar to the input text.
+        Repeated searches are answered from the search cache until the collection changes.
+
+        Args:
+            text (str): The query text.
+            threshold (float): Minimum similarity score (maximum distance for EUCLID). Applies to
+                dense hits only; BM25 hits only need to share a term with the query.
+            limit (int): Maximum number of results.
+            search_effort (Optional[int]): Per-query accuracy/speed knob for the ANN index
+                (`hnsw_ef` for Qdrant, `nprobe` for the local IVF index). None uses the configured default.
+            filters (Optional[Dict[str, Any]]): Restricts hits by `document_id`, `tags`,
+                `ingested_after` and `ingested_before` (see `filters.normalize_filters`).
+            search_mode (Optional[str]): "dense" (default), "sparse" (BM25) or "hybrid"
+                (both, fused with reciprocal-rank fusion; scores are then RRF scores).
+            diversify (Optional[bool]): Over-fetch, drop near-duplicate chunks and pick the results
+                with maximal marginal relevance. None uses `vectordb.diversify.enabled`.
+
+        Returns:
+            List[Dict[str, Any]]: List of matching texts, their document ids and scores.
+        """
+        request = self._prepare_search(text, threshold, limit, search_effort, filters, search_mode, diversify)
+        if request["cached"] is not None:
+            return request["cached"]
+        if not self.search_flight:
+            return self._run_search(request)
+        # Identical searches already running in other threads share their result
+        return [dict(hit) for hit in self.search_flight.do(self._flight_key(request), self._run_search, request)]
+
+    async def asearch_similar(self, text: str, threshold: float, limit: int = 5,
+                              search_effort: Optional[int] = None,
+                              filters: Optional[Dict[str, Any]] = None,
+                              search_mode: Optional[str] = None,
+                              diversify: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """
+        Non-blocking `search_similar` for async callers; takes the same arguments.
+        """
+        request = self._prepare_search(text, threshold, limit, search_effort, filters, search_mode, diversify)
+        if request["cached"] is not None:
+            return request["cached"]
+        if not self.search_flight:
+            return await self._arun_search(request)
+        return [dict(hit) for hit in await self.search_flight.ado(self._flight_key(request), self._arun_search, request)]
+
+    def search_similar_many(self, queries: List[Any], threshold: float, limit: int = 5,
+                            **options: Any) -> List[List[Dict[str, Any]]]:
+        """
+        Runs many searches with one embedding call and one batched vector-store request.
+
+        Args:
+            queries (List[Any]): Query texts, or dicts with `text` plus any of `threshold`, `limit`,
+                `search_effort`, `filters`, `search_mode` and `diversify` to override the shared values.
+            threshold (float): Default minimum score (see `search_similar`).
+            limit (int): Default maximum number of results per query.
+            **options: Defaults for `search_effort`, `filters`, `search_mode` and `diversify`.
+
+        Returns:
+            List[List[Dict[str, Any]]]: One result list per query, in input order.
+        """
+        requests, pending = self._prepare_many(queries, threshold, limit, options)
+        embed = [request for request in pending if self._needs_query_vector(request)]
+        if embed:
+            for request, vector in zip(embed, self._encode_many([request["text"] for request in embed])):
+                request["query_vector"] = vector
+
+        dense = [request for request in pending if request["search_mode"] != "sparse"]
+        hits = self._search_vectors([self._dense_args(request) for request in dense]) if dense else []
+        for request, matches in zip(dense, hits):
+            request["dense"] = matches
+        return [request["cached"] if request["cached"] is not None else self._finish_search(request, request["dense"])
+                for request in requests]
+
+    async def asearch_similar_many(self, queries: List[Any], threshold: float, limit: int = 5,
+                                   **options: Any) -> List[List[Dict[str, Any]]]:
+        """
+        Non-blocking `search_similar_many` for async callers; takes the same arguments.
+        """
+        requests, pending = self._prepare_many(queries, threshold, limit, options)
+        embed = [request for request in pending if self._needs_query_vector(request)]
+        if embed:
+            vectors = await run_in_executor(self._encode_many, [request["text"] for request in embed])
+            for request, vector in zip(embed, vectors):
+                request["query_vector"] = vector
+
+        dense = [request for request in pending if request["search_mode"] != "sparse"]
+        hits = await self._asearch_vectors([self._dense_args(request) for request in dense]) if dense else []
+        for request, matches in zip(dense, hits):
+            request["dense"] = matches
+        return [request["cached"] if request["cached"] is not None
+                else await self._afinish_search(request, request["dense"]) for request in requests]
+
+    def _prepare_search(self, text: str, threshold: float, limit: int, search_effort: Optional[int],
+                        filters: Optional[Dict[str, Any]], search_mode: Optional[str],
+                        diversify: Optional[bool]) -> Dict[str, Any]:
+        """
+        Validates one search's options and looks it up in the search cache.
+        """
+        filters = normalize_filters(filters)
+        search_mode = self._search_mode(search_mode)
+        diversify = self.diversify if diversify is None else bool(diversify)
+        cache_key, cached = self._cached_search(text, threshold, limit, search_effort=search_effort,
+                                                filters=filters_cache_key(filters), search_mode=search_mode,
+                                                diversify=diversify)
+        pool = limit * self.diversify_candidates if diversify else limit
+        return {
+            "text": text,
+            "threshold": threshold,
+            "limit": limit,
+            "search_effort": search_effort,
+            "filters": filters,
+            "search_mode": search_mode,
+            "diversify": diversify,
+            "pool": pool,
+            "fetch": pool if search_mode != "hybrid" else pool * self.hybrid_candidates,
+            "cache_key": cache_key,
+            "cached": cached,
+            "query_vector": None,
+            "dense": None
+        }
+
+    def _run_search(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self._needs_query_vector(request):
+            request["query_vector"] = self._encode_many([request["text"]])[0]
+        dense = self._search_vector(*self._dense_args(request)) if request["search_mode"] != "sparse" else None
+        return self._finish_search(request, dense)
+
+    async def _arun_search(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if self._needs_query_vector(request):
+            request["query_vector"] = (await run_in_executor(self._encode_many, [request["text"]]))[0]
+        dense = await self._asearch_vector(*self._dense_args(request)) if request["search_mode"] != "sparse" else None
+        return await self._afinish_search(request, dense)
+
+    def _flight_key(self, request: Dict[str, Any]) -> Tuple:
+        """
+        Identifies a search for single-flight coalescing: same store, query and result-shaping options.
+        """
+        return (self._manifest_scope, normalize_text(request["text"]), request["threshold"],
+                request["limit"], request["search_effort"], filters_cache_key(request["filters"]),
+                request["search_mode"], request["diversify"])
+
+    def _prepare_many(self, queries: List[Any], threshold: float, limit: int,
+                      options: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        unknown = set(options) - set(SEARCH_OPTIONS)
+        if unknown:
+            raise TypeError(f"Unexpected search option(s): {sorted(unknown)}")
+
+        requests = []
+        for query in queries:
+            query = {"text": query} if isinstance(query, str) else query
+            text = str(query.get("text", "")).strip()
+            if not text:
+                raise ValueError("Every query needs a non-empty 'text'.")
+            requests.append(self._prepare_search(
+                text,
+                float(query.get("threshold", threshold)),
+                int(query.get("limit", limit)),
+                *(query.get(name, options.get(name)) for name in SEARCH_OPTIONS)
+            ))
+        pending = [request for request in requests if request["cached"] is None]
+        if requests:
+            logger.info(f"Batch search: {len(requests)} queries, {len(requests) - len(pending)} answered from cache.")
+        return requests, pending
+
+    @staticmethod
+    def _needs_query_vector(request: Dict[str, Any]) -> bool:
+        return request["search_mode"] != "sparse" or request["diversify"]
+
+    @staticmethod
+    def _dense_args(request: Dict[str, Any]) -> tuple:
+        """
+        Positional arguments of `_search_vector` for a prepared search.
+        """
+        return (request["query_vector"], request["threshold"], request["fetch"], request["search_effort"],
+                request["filters"], request["diversify"])
+
+    def _finish_search(self, request: Dict[str, Any], dense: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Adds BM25 hits, fuses, diversifies and caches the result of a prepared search.
+        """
+        sparse = self._sparse_search(request["text"], request["fetch"], request["filters"]) \
+            if request["search_mode"] != "dense" else None
+        matches = self._combine(dense, sparse, request["pool"])
+        if request["diversify"]:
+            matches = self._diversify(request["query_vector"], matches, request["limit"], self._match_vectors(matches))
+        return self._after_search(request["text"], request["threshold"], request["cache_key"], matches)
+
+    async def _afinish_search(self, request: Dict[str, Any],
+                              dense: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        if request["search_mode"] == "dense" and not request["diversify"]:
+            return self._finish_search(request, dense)  # nothing left that blocks
+        return await run_in_executor(self._finish_search, request, dense)
+
+    def _search_mode(self, search_mode: Optional[str]) -> str:
+        search_mode = (search_mode or DEFAULT_SEARCH_MODE).lower()
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported search_mode '{search_mode}'. Use one of {SEARCH_MODES}.")
+        if search_mode != "dense" and self.sparse_index is None:
+            raise ValueError(f"search_mode '{search_mode}' needs the sparse index (vectordb.sparse.enabled).")
+        return search_mode
+
+    def _sparse_search(self, text: str, limit: int, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self._to_match(score, payload) for score, payload in self.sparse_index.search(text, limit, filters)]
+
+    def _combine(self, dense: Optional[List[Dict[str, Any]]], sparse: Optional[List[Dict[str, Any]]],
+                 limit: int) -> List[Dict[str, Any]]:
+        if sparse is None:
+            return dense
+        if dense is None:
+            return sparse
+        return reciprocal_rank_fusion([dense, sparse], k=self.rrf_k, limit=limit)
+
+    def _match_vectors(self, matches: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Stacks the vectors returned with the hits; hits without one (BM25) are embedded through the cache.
+        """
+        vectors = np.zeros((len(matches), self.vector_size), dtype=np.float32)
+        missing = [i for i, match in enumerate(matches) if match.get("vector") is None]
+        for i, match in enumerate(matches):
+            if match.get("vector") is not None:
+                vectors[i] = match["vector"]
+        if missing:
+            vectors[missing] = self._encode_many([matches[i]["text"] for i in missing])
+        return vectors
+
+    def _diversify(self, query_vector: np.ndarray, matches: List[Dict[str, Any]], limit: int,
+                   vectors: np.ndarray) -> List[Dict[str, Any]]:
+        selected = diversify_matches(query_vector, matches, vectors, limit,
+                                     duplicate_threshold=self.duplicate_threshold, mmr_lambda=self.mmr_lambda)
+        logger.debug(f"Diversified {len(matches)} candidate(s) down to {len(selected)}.")
+        return [{key: value for key, value in match.items() if key != "vector"} for match in selected]
+
+    def _cached_search(self, text: str, threshold: float, limit: int,
+                       **options: Any) -> Tuple[Optional[tuple], Optional[List[Dict[str, Any]]]]:
+        """
+        Returns the search-cache key for a query (plus any result-shaping options) and its cached result, if any.
+        """
+        if not self.search_cache:
+            return None, None
+
+        if self.manifest:
+            # Another process (e.g. ingest.py) changed the collection: what was cached is stale
+            revision = self.manifest.revision(self._manifest_scope)
+            if self._seen_revision is not None and revision != self._seen_revision:
+                self.search_cache.invalidate(self.collection_name)
+            self._seen_revision = revision
+
+        cache_key = self.search_cache.make_key(self.collection_name, text, threshold, limit, **options)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Search cache hit for query '{text[:30]}...'.")
+        return cache_key, cached
+
+    def _after_search(self, text: str, threshold: float, cache_key: Optional[tuple],
+                      matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        logger.info(
+            f"Search completed for query '{text[:30]}...'. Found {len(matches)} matches above threshold {threshold}.")
+
+        if cache_key is not None:
+            self.search_cache.put(cache_key, matches)
+        return matches
+
+    def _passes_threshold(self, score: float, threshold: float) -> bool:
+        """
+        EUCLID scores are distances (lower is better); COSINE and DOT are similarities.
+        """
+        if self.distance_name == "EUCLID":
+            return score <= threshold
+        return score >= threshold
+
+    @staticmethod
+    def _to_match(score: float, payload: Dict[str, Any], vector: Optional[Any] = None) -> Dict[str, Any]:
+        match = {
+            "text": payload.get("text", ""),
+            "document_id": payload.get("document_id"),
+            "score": float(score)
+        }
+        if vector is not None:
+            match["vector"] = vector
+        return match
+
+    def knowledge_version(self) -> str:
+        """
+        Identifies the current contents of the collection, for caches of answers built from it.
+
+        With the manifest this is a revision shared by every process (ingest.py included);
+        otherwise it only reflects inserts made through this process.
+        """
+        if self.manifest:
+            return f"{self._manifest_scope}@{self.manifest.revision(self._manifest_scope)}"
+        if self.search_cache:
+            return f"{self._manifest_scope}#{self.search_cache.generation(self.collection_name)}"
+        return self._manifest_scope
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns runtime counters for this store.
+        """
+        return {
+            "backend": self.backend_name,
+            "embedding_cache": self.embedding_cache.stats() if self.embedding_cache else None,
+            "search_cache": self.search_cache.stats() if self.search_cache else None,
+            "manifest": self.manifest.stats(self._manifest_scope) if self.manifest else None,
+            "sparse_index": self.sparse_index.stats() if self.sparse_index else None
+        }
+
+    # ---------- backend hooks ----------
+
+    def _upsert(self, point_ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def _delete(self, point_ids: List[str]):
+        raise NotImplementedError
+
+    def _delete_document(self, document_id: str):
+        raise NotImplementedError
+
+    def _search_vector(self, query_vector: np.ndarray, threshold: float, limit: int,
+                       search_effort: Optional[int] = None,
+                       filters: Optional[Dict[str, Any]] = None,
+                       with_vectors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Returns dense hits; with `with_vectors`, each hit also carries its stored `vector`.
+        """
+        raise NotImplementedError
+
+    async def _aupsert(self, point_ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        await run_in_executor(self._upsert, point_ids, vectors, payloads)
+
+    async def _adelete(self, point_ids: List[str]):
+        await run_in_executor(self._delete, point_ids)
+
+    async def _adelete_document(self, document_id: str):
+        await run_in_executor(self._delete_document, document_id)
+
+    async def _asearch_vector(self, query_vector: np.ndarray, threshold: float, limit: int,
+                              search_effort: Optional[int] = None,
+                              filters: Optional[Dict[str, Any]] = None,
+                              with_vectors: bool = False) -> List[Dict[str, Any]]:
+        return await run_in_executor(self._search_vector, query_vector, threshold, limit, search_effort, filters,
+                                     with_vectors)
+
+    def _search_vectors(self, searches: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """
+        Runs several `_search_vector` calls (one argument tuple each); backends with a batch API override this.
+        """
+        return [self._search_vector(*search) for search in searches]
+
+    async def _asearch_vectors(self, searches: List[tuple]) -> List[List[Dict[str, Any]]]:
+        return await run_in_executor(self._search_vectors, searches)
@@ -0,0 +1,131 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": True,
+    "path": "data/chunk_manifest.sqlite"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    scope TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    updated_at INTEGER NOT NULL,
+    PRIMARY KEY (scope, document_id)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    scope TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    point_id TEXT NOT NULL,
+    PRIMARY KEY (scope, document_id, chunk_hash)
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    scope TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+"""
+
+
+class ChunkManifest:
+    """
+    SQLite record of which chunks (by content hash) each document currently has in a collection.
+
+    Vector stores diff a re-ingested document against its manifest entry so that only new
+    or changed chunks are embedded and upserted, and chunks that disappeared are deleted.
+    Entries are scoped per backend/collection (`scope`), so several collections share one file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def get(self, scope: str, document_id: str) -> Optional[Tuple[List[str], Dict[str, str]]]:
+        """
+        Returns the document's (tags, {chunk_hash: point_id}), or None if it was never ingested.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tags FROM documents WHERE scope = ? AND document_id = ?", (scope, document_id)
+            ).fetchone()
+            if row is None:
+                return None
+            chunks = self._conn.execute(
+                "SELECT chunk_hash, point_id FROM chunks WHERE scope = ? AND document_id = ?", (scope, document_id)
+            ).fetchall()
+        return json.loads(row[0]), dict(chunks)
+
+    def replace(self, scope: str, document_id: str, tags: List[str], chunks: Dict[str, str]):
+        """
+        Atomically replaces the document's entry with its current tags and {chunk_hash: point_id}.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (scope, document_id, tags, updated_at) VALUES (?, ?, ?, ?)",
+                (scope, document_id, json.dumps(sorted(tags)), int(time.time()))
+            )
+            self._conn.execute("DELETE FROM chunks WHERE scope = ? AND document_id = ?", (scope, document_id))
+            self._conn.executemany(
+                "INSERT INTO chunks (scope, document_id, chunk_hash, point_id) VALUES (?, ?, ?, ?)",
+                [(scope, document_id, chunk_hash, point_id) for chunk_hash, point_id in chunks.items()]
+            )
+
+    def bump_revision(self, scope: str) -> int:
+        """
+        Records that the scope's contents changed; returns the new revision number.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO revisions (scope, revision) VALUES (?, 1) "
+                "ON CONFLICT(scope) DO UPDATE SET revision = revision + 1", (scope,)
+            )
+            return self._conn.execute("SELECT revision FROM revisions WHERE scope = ?", (scope,)).fetchone()[0]
+
+    def revision(self, scope: str) -> int:
+        """
+        Returns how many times the scope has changed; shared by every process using this file.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT revision FROM revisions WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else 0
+
+    def stats(self, scope: str) -> Dict[str, int]:
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents WHERE scope = ?", (scope,)).fetchone()[0]
+            chunks = self._conn.execute("SELECT COUNT(*) FROM chunks WHERE scope = ?", (scope,)).fetchone()[0]
+        return {"documents": documents, "chunks": chunks}
+
+
+_manifests: Dict[str, ChunkManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_chunk_manifest(config: Optional[dict]) -> Optional[ChunkManifest]:
+    """
+    Returns the process-wide manifest for the configured path, or None when it is disabled.
+    """
+    mconf = (config or {}).get("vectordb", {}).get("manifest", {})
+    if not mconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    path = mconf.get("path", DEFAULTS["path"])
+    with _manifests_lock:
+        if path not in _manifests:
+            _manifests[path] = ChunkManifest(path)
+            logger.info(f"Chunk manifest opened at {path}.")
+        return _manifests[path]
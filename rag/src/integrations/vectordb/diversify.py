@@ -0,0 +1,98 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": False,
+    "candidates": 3,  # hits fetched per requested result before collapsing / MMR
+    "duplicate_threshold": 0.95,  # cosine similarity above which two hits are the same passage
+    "mmr_lambda": 0.7  # 1.0 ranks purely by relevance, 0.0 purely by novelty
+}
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def collapse_near_duplicates(similarity: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Greedily keeps the first of every group of near-identical rows.
+
+    Args:
+        similarity (np.ndarray): Pairwise cosine similarities of candidates in rank order.
+        threshold (float): Similarity at or above which a later row duplicates an earlier one.
+
+    Returns:
+        np.ndarray: Indices of the rows kept, in rank order.
+    """
+    duplicates = np.triu(similarity >= threshold, k=1)
+    removed = np.zeros(len(similarity), dtype=bool)
+    for i in range(len(similarity)):
+        if not removed[i]:
+            removed |= duplicates[i]
+    return np.flatnonzero(~removed)
+
+
+def mmr_select(relevance: np.ndarray, similarity: np.ndarray, k: int, mmr_lambda: float) -> np.ndarray:
+    """
+    Maximal-marginal-relevance selection: each pick trades relevance to the query against
+    similarity to the hits already picked.
+
+    Args:
+        relevance (np.ndarray): Query similarity per candidate.
+        similarity (np.ndarray): Pairwise candidate similarities.
+        k (int): Number of candidates to select.
+        mmr_lambda (float): Relevance weight in [0, 1].
+
+    Returns:
+        np.ndarray: Indices of the selected candidates, in selection order.
+    """
+    k = min(k, len(relevance))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(relevance), dtype=bool)
+    available[selected[0]] = False
+
+    for _ in range(k - 1):
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(max_similarity, similarity[pick], out=max_similarity)
+    return np.asarray(selected, dtype=np.int64)
+
+
+def diversify(query_vector: np.ndarray, matches: List[Dict[str, Any]], vectors: np.ndarray, limit: int,
+              duplicate_threshold: float = DEFAULTS["duplicate_threshold"],
+              mmr_lambda: float = DEFAULTS["mmr_lambda"]) -> List[Dict[str, Any]]:
+    """
+    Drops near-duplicate hits and picks `limit` of the rest with MMR.
+
+    Args:
+        query_vector (np.ndarray): Embedding of the query.
+        matches (List[Dict[str, Any]]): Candidate hits, best first.
+        vectors (np.ndarray): One embedding per candidate.
+        limit (int): Number of hits to return.
+        duplicate_threshold (float): Cosine similarity at which two hits count as duplicates.
+        mmr_lambda (float): Relevance weight for MMR.
+
+    Returns:
+        List[Dict[str, Any]]: Up to `limit` distinct hits, in MMR order.
+    """
+    if len(matches) <= 1:
+        return matches[:limit]
+
+    unit = _unit(vectors)
+    similarity = unit @ unit.T
+    keep = collapse_near_duplicates(similarity, duplicate_threshold)
+
+    relevance = unit[keep] @ _unit(query_vector)
+    order = mmr_select(relevance, similarity[np.ix_(keep, keep)], limit, mmr_lambda)
+    return [matches[i] for i in keep[order]]
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Payload fields that can be filtered on; each gets a payload index in Qdrant
+FILTERABLE_FIELDS = {
+    "document_id": "keyword",
+    "tags": "keyword",
+    "ingested_at": "integer"  # unix seconds
+}
+
+FILTER_KEYS = ("document_id", "tags", "ingested_after", "ingested_before")
+
+
+def _as_list(value: Union[str, List[str], None]) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value if str(v).strip()]
+    return [str(value)] if str(value).strip() else []
+
+
+def _as_timestamp(value: Union[int, float, str, None]) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(datetime.fromisoformat(str(value)).timestamp())
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Validates and canonicalises a search filter.
+
+    Supported keys:
+        document_id: a document id or list of ids (match any).
+        tags: a tag or list of tags (match any).
+        ingested_after / ingested_before: unix seconds or ISO-8601 strings (inclusive).
+
+    Returns:
+        Optional[Dict[str, Any]]: The normalised filter, or None when it restricts nothing.
+
+    Raises:
+        ValueError: On unknown keys or unparsable timestamps.
+    """
+    if not filters:
+        return None
+
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unsupported filter key(s): {', '.join(sorted(unknown))}. Use one of {FILTER_KEYS}.")
+
+    normalized = {
+        "document_id": sorted(set(_as_list(filters.get("document_id")))),
+        "tags": sorted(set(_as_list(filters.get("tags")))),
+        "ingested_after": _as_timestamp(filters.get("ingested_after")),
+        "ingested_before": _as_timestamp(filters.get("ingested_before"))
+    }
+    normalized = {k: v for k, v in normalized.items() if v not in (None, [])}
+    return normalized or None
+
+
+def filters_cache_key(filters: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+    """
+    Hashable form of a normalised filter, for use in cache keys.
+    """
+    if not filters:
+        return None
+    return tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in sorted(filters.items()))
+
+
+def to_qdrant_filter(filters: Optional[Dict[str, Any]]):
+    """
+    Translates a normalised filter into a Qdrant `Filter`, or None.
+    """
+    if not filters:
+        return None
+
+    from qdrant_client.models import FieldCondition, Filter, MatchAny, Range
+
+    conditions = []
+    if "document_id" in filters:
+        conditions.append(FieldCondition(key="document_id", match=MatchAny(any=filters["document_id"])))
+    if "tags" in filters:
+        conditions.append(FieldCondition(key="tags", match=MatchAny(any=filters["tags"])))
+    if "ingested_after" in filters or "ingested_before" in filters:
+        conditions.append(FieldCondition(
+            key="ingested_at",
+            range=Range(gte=filters.get("ingested_after"), lte=filters.get("ingested_before"))
+        ))
+    return Filter(must=conditions)
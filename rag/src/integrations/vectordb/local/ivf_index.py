@@ -0,0 +1,172 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "type": "flat",  # flat (exact scan) or ivf
+    "nlist": 1024,  # number of inverted lists (k-means centroids)
+    "nprobe": 16,  # lists scanned per query; higher = better recall, slower
+    "train_size": 39 * 1024,  # rows required before the index is trained
+    "sample_size": 100_000,  # rows used for k-means training
+    "kmeans_iterations": 15
+}
+
+CENTROIDS_FILE = "ivf_centroids.npy"
+ASSIGNMENTS_FILE = "ivf_assign.i32"
+ASSIGN_CHUNK_ROWS = 16_384
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index over the rows of a local collection.
+
+    Vectors are clustered with k-means into `nlist` lists; a query scans only the rows of its
+    `nprobe` closest lists. New rows are assigned to their nearest centroid on insert, so the
+    index grows incrementally without retraining. Centroids and per-row list assignments are
+    persisted next to the collection; the rows themselves are never copied.
+    """
+
+    def __init__(self, path: str, dim: int, distance: str, iconf: Optional[dict] = None):
+        iconf = iconf or {}
+        self.path = path
+        self.dim = dim
+        self.distance = distance
+        self.nlist = iconf.get("nlist", DEFAULTS["nlist"])
+        self.nprobe = iconf.get("nprobe", DEFAULTS["nprobe"])
+        self.train_size = iconf.get("train_size", DEFAULTS["train_size"])
+        self.sample_size = iconf.get("sample_size", DEFAULTS["sample_size"])
+        self.kmeans_iterations = iconf.get("kmeans_iterations", DEFAULTS["kmeans_iterations"])
+
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        # (sorted row ids, list start offsets) rebuilt lazily after inserts
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    # ---------- persistence ----------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def load(self, count: int, vectors: np.ndarray):
+        """
+        Loads a persisted index, assigning any rows appended after the last persisted assignment.
+        """
+        if not os.path.exists(self._file(CENTROIDS_FILE)):
+            return
+
+        centroids = np.load(self._file(CENTROIDS_FILE))
+        if centroids.shape[1] != self.dim:
+            logger.warning("Stored IVF centroids have a different dimension; retraining on next insert.")
+            return
+
+        self.centroids = centroids
+        self.nlist = len(centroids)
+        assignments = np.fromfile(self._file(ASSIGNMENTS_FILE), dtype=np.int32)[:count]
+        self._assignments = assignments
+        if len(assignments) < count:
+            self.add(vectors[len(assignments):count])
+        logger.info(f"Loaded IVF index with nlist={self.nlist} over {count} row(s).")
+
+    def refresh(self, count: int, vectors: np.ndarray):
+        """
+        Picks up what another process persisted: a newly trained index, or the assignments of rows it appended.
+        """
+        if not self.trained:
+            self.load(count, vectors)
+            return
+        have = len(self._assignments)
+        if count > have:
+            appended = np.fromfile(self._file(ASSIGNMENTS_FILE), dtype=np.int32, offset=have * 4, count=count - have)
+            self._assignments = np.concatenate([self._assignments, appended])
+            self._lists = None
+
+    # ---------- build ----------
+
+    def _scores(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """
+        Affinity of each vector to each centroid; higher is closer for every metric.
+        """
+        products = vectors @ centroids.T
+        if self.distance == "EUCLID":
+            return 2 * products - np.einsum("ij,ij->i", centroids, centroids)[None, :]
+        return products
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(self._scores(np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS]), self.centroids), axis=1)
+            for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS)
+        ]).astype(np.int32)
+
+    def train(self, vectors: np.ndarray, seed: int = 0):
+        """
+        Runs k-means on a sample of `vectors` and assigns every row to a list.
+        """
+        rng = np.random.default_rng(seed)
+        nlist = min(self.nlist, len(vectors))
+        sample_rows = np.sort(rng.choice(len(vectors), size=min(self.sample_size, len(vectors)), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(self._scores(sample, centroids), axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)[:, None]
+            centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+            if self.distance == "COSINE":
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        self.centroids = centroids.astype(np.float32)
+        self.nlist = nlist
+        self._assignments = self._assign(vectors)
+        self._lists = None
+
+        np.save(self._file(CENTROIDS_FILE), self.centroids)
+        self._assignments.tofile(self._file(ASSIGNMENTS_FILE))
+        logger.info(f"Trained IVF index with nlist={nlist} on {len(sample)} sampled row(s).")
+
+    def add(self, vectors: np.ndarray):
+        """
+        Assigns newly appended rows to their nearest list and persists the assignments.
+        """
+        if not self.trained or len(vectors) == 0:
+            return
+        assignments = self._assign(vectors)
+        with open(self._file(ASSIGNMENTS_FILE), "ab") as f:
+            f.write(assignments.tobytes())
+        self._assignments = np.concatenate([self._assignments, assignments])
+        self._lists = None
+
+    # ---------- search ----------
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        lists = self._lists
+        if lists is None or len(lists[0]) != len(self._assignments):
+            assignments = self._assignments
+            order = np.argsort(assignments, kind="stable").astype(np.int64)
+            starts = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=self.nlist))))
+            lists = (order, starts)
+            self._lists = lists
+        return lists
+
+    def candidate_rows(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the (sorted) row ids stored in the `nprobe` lists closest to the query.
+        """
+        nprobe = min(int(nprobe or self.nprobe), self.nlist)
+        order, starts = self._inverted_lists()
+
+        affinity = self._scores(query[None, :], self.centroids)[0]
+        probes = np.argpartition(-affinity, nprobe - 1)[:nprobe]
+        rows = np.concatenate([order[starts[p]:starts[p + 1]] for p in probes])
+        return np.sort(rows)
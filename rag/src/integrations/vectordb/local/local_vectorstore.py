@@ -0,0 +1,497 @@
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from helpers.file_lock import FileLock
+from helpers.logger import setup_logger
+from integrations.vectordb.base_vectorstore import BaseVectorStore
+from integrations.vectordb.local.ivf_index import DEFAULTS as INDEX_DEFAULTS
+from integrations.vectordb.local.ivf_index import IVFIndex
+from integrations.vectordb.local.payload_index import PayloadIndex
+from integrations.vectordb.quantization import DEFAULTS as QUANTIZATION_DEFAULTS
+from integrations.vectordb.quantization import create_quantizer, approximate_scores
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "path": "data/vectordb"
+}
+
+VECTORS_FILE = "vectors.f32"
+SQNORMS_FILE = "sqnorms.f32"
+OFFSETS_FILE = "offsets.i64"
+PAYLOADS_FILE = "payloads.jsonl"
+CODES_FILE = "codes.q"
+QUANTIZER_FILE = "quantizer.npz"
+TOMBSTONES_FILE = "tombstones.i64"
+META_FILE = "meta.json"
+LOCK_FILE = "lock"
+
+
+class LocalVectorStore(BaseVectorStore):
+    """
+    Embedded vector store backed by an append-only, memory-mapped float32 matrix.
+
+    Each collection is a directory holding the vectors, their squared norms, and a JSONL
+    payload sidecar addressed through a byte-offset array. `meta.json` records the committed
+    row count and is written last, so a torn append is truncated away on the next load.
+    Search is an exact flat scan: one matmul plus `argpartition`.
+
+    With `quantization` enabled, compressed codes are kept in RAM and scanned first; the best
+    `limit * oversampling` candidates are then rescored against the full-precision vectors,
+    which stay on disk and are only paged in for those rows.
+
+    With `index.type: ivf`, an IVF index narrows every search to the rows of the `nprobe`
+    lists closest to the query before any scoring happens.
+
+    Deleted (and re-upserted) points are tombstoned: their row numbers are appended to
+    `tombstones.i64` and masked out of every search; rows are never rewritten in place.
+
+    Several processes (the server and `ingest.py`) may share a collection: writes hold an
+    exclusive `flock` on the collection's `lock` file, and every commit bumps the `generation`
+    in `meta.json`. Before searching or writing, a store whose generation is behind reads
+    the rows, tombstones, codes and IVF assignments committed since.
+    """
+
+    backend_name = "local"
+
+    def __init__(self, config: Optional[dict] = None):
+        super().__init__(config, section="local")
+
+        self.path = os.path.join(self.conf.get("path", DEFAULTS["path"]), self.collection_name)
+        os.makedirs(self.path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Serializes writers across processes and keeps readers off half-written appends
+        self._file_lock = FileLock(self._file(LOCK_FILE))
+
+        self._qconf = self.conf.get("quantization", {})
+        self.rescore = self._qconf.get("rescore", QUANTIZATION_DEFAULTS["rescore"])
+        self.oversampling = float(self._qconf.get("oversampling", QUANTIZATION_DEFAULTS["oversampling"]))
+        self.train_size = self._qconf.get("train_size", QUANTIZATION_DEFAULTS["train_size"])
+        self.sample_size = self._qconf.get("sample_size", QUANTIZATION_DEFAULTS["sample_size"])
+        self._iconf = self.conf.get("index", {})
+
+        self._reset_state()
+        with self._file_lock.locked(shared=True):
+            self._load()
+
+        logger.info(
+            f"LocalVectorStore initialized with provider='{self.provider}', "
+            f"model='{self.embedding_model_name}', collection='{self.collection_name}', "
+            f"vector_size={self.vector_size}, distance={self.distance_name}, rows={self._count}, "
+            f"quantization={self.quantizer.kind if self.quantizer else 'none'}, "
+            f"index={'ivf' if self.index else 'flat'}, path='{self.path}'"
+        )
+
+    # ---------- persistence ----------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _reset_state(self):
+        """
+        Empties every in-memory structure; `_load` then rebuilds them from the collection files.
+        """
+        self._count = 0
+        self._payload_bytes = 0
+        self._tombstones = 0  # committed entries in the tombstone file
+        self._generation = 0  # commits seen so far (see `_sync`)
+        self._meta_stat = None  # stat of the meta.json last read or written
+        self._deleted = np.zeros(0, dtype=bool)  # per-row tombstone mask
+        self._deleted_count = 0
+        # (vectors, sqnorms, offsets) replaced as one tuple so searches never see a torn append
+        self._snapshot = (
+            np.empty((0, self.vector_size), dtype=np.float32),
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.int64)
+        )
+
+        self.quantizer = create_quantizer(self._qconf, self.vector_size)
+        self._codes: Optional[np.ndarray] = None  # in-RAM compressed codes, one row per vector
+
+        self.index: Optional[IVFIndex] = None
+        if str(self._iconf.get("type", INDEX_DEFAULTS["type"])).lower() == "ivf":
+            self.index = IVFIndex(self.path, self.vector_size, self.distance_name, self._iconf)
+
+        self.payload_index = PayloadIndex(self._file(PAYLOADS_FILE))
+
+    def _stat_meta(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self._file(META_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        meta_path = self._file(META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r") as f:
+            return json.load(f)
+
+    def _load(self):
+        self._meta_stat = self._stat_meta()
+        meta = self._read_meta()
+        if meta is None:
+            return
+
+        if meta.get("dim") != self.vector_size or meta.get("distance") != self.distance_name:
+            raise ValueError(
+                f"Local collection '{self.collection_name}' was created with dim={meta.get('dim')}, "
+                f"distance={meta.get('distance')}; config has dim={self.vector_size}, distance={self.distance_name}."
+            )
+
+        self._count = meta.get("count", 0)
+        self._payload_bytes = meta.get("payload_bytes", 0)
+        self._generation = meta.get("generation", 0)
+
+        # Drop any bytes written after the last committed meta update
+        self._truncate(VECTORS_FILE, self._count * self.vector_size * 4)
+        self._truncate(SQNORMS_FILE, self._count * 4)
+        self._truncate(OFFSETS_FILE, self._count * 8)
+        self._truncate(PAYLOADS_FILE, self._payload_bytes)
+        self._load_tombstones(meta.get("tombstones", 0))
+
+        self._remap()
+        self._load_quantizer()
+        if self.index is not None:
+            self.index.load(self._count, self._snapshot[0])
+
+    def _refresh(self):
+        """
+        Catches up with commits made by other processes; a `stat` is all it costs when there are none.
+        """
+        if self._stat_meta() == self._meta_stat:
+            return
+        with self._lock, self._file_lock.locked(shared=True):
+            self._sync()
+
+    def _sync(self):
+        """
+        Reads what other processes committed since this store last looked at `meta.json`.
+        The caller holds `_lock` and the file lock, so no other process is midway through a write.
+        """
+        meta_stat = self._stat_meta()
+        if meta_stat == self._meta_stat:
+            return
+        meta = self._read_meta()
+        self._meta_stat = meta_stat
+        if meta is None or meta.get("generation", 0) == self._generation:
+            return
+
+        if meta.get("count", 0) < self._count:
+            logger.warning(f"Local collection '{self.collection_name}' shrank on disk; reloading it.")
+            self._reset_state()
+            self._load()
+        else:
+            self._load_committed(meta)
+        if self.search_cache:
+            self.search_cache.invalidate(self.collection_name)
+        logger.info(f"Local collection '{self.collection_name}' caught up with generation {self._generation} "
+                    f"written by another process ({self._count} row(s)).")
+
+    def _load_committed(self, meta: Dict[str, Any]):
+        """
+        Appends the rows and tombstones committed after this store's own count to its in-memory state.
+        """
+        start, count = self._count, meta["count"]
+        with open(self._file(PAYLOADS_FILE), "rb") as f:
+            f.seek(self._payload_bytes)
+            records = [json.loads(line) for line in f.read(meta["payload_bytes"] - self._payload_bytes).splitlines()]
+
+        self._count = count
+        self._payload_bytes = meta["payload_bytes"]
+        self._generation = meta.get("generation", 0)
+        self._deleted = np.concatenate([self._deleted, np.zeros(count - start, dtype=bool)])
+        committed = meta.get("tombstones", 0)
+        if committed > self._tombstones:
+            rows = np.fromfile(self._file(TOMBSTONES_FILE), dtype=np.int64,
+                               offset=self._tombstones * 8, count=committed - self._tombstones)
+            self._tombstones = committed
+            self._deleted[rows] = True
+            self._deleted_count = int(self._deleted.sum())
+
+        self._remap()
+        self.payload_index.add(start, records)
+        if self.quantizer is not None:
+            if self._codes is None:
+                self._load_quantizer()  # trained by the other process
+            elif count > start:
+                width = self._code_width()
+                codes = np.fromfile(self._file(CODES_FILE), dtype=self._code_dtype(),
+                                    offset=start * width, count=(count - start) * width)
+                self._codes = np.concatenate([self._codes, codes.reshape(-1, width)])
+        if self.index is not None:
+            self.index.refresh(self._count, self._snapshot[0])
+
+    def _truncate(self, name: str, size: int):
+        path = self._file(name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def _load_tombstones(self, committed: int):
+        self._truncate(TOMBSTONES_FILE, committed * 8)
+        self._tombstones = committed
+        self._deleted = np.zeros(self._count, dtype=bool)
+        if committed:
+            self._deleted[np.fromfile(self._file(TOMBSTONES_FILE), dtype=np.int64)] = True
+        self._deleted_count = int(self._deleted.sum())
+
+    def _mark_deleted(self, rows: np.ndarray) -> int:
+        """
+        Tombstones the given rows (caller holds the lock and saves meta afterwards).
+        """
+        rows = np.unique(rows)
+        rows = rows[~self._deleted[rows]]
+        if len(rows) == 0:
+            return 0
+        with open(self._file(TOMBSTONES_FILE), "ab") as f:
+            f.write(rows.astype(np.int64).tobytes())
+        self._deleted[rows] = True
+        self._tombstones += len(rows)
+        self._deleted_count += len(rows)
+        return len(rows)
+
+    def _remap(self):
+        if self._count == 0:
+            return
+        self._snapshot = (
+            np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r", shape=(self._count, self.vector_size)),
+            np.memmap(self._file(SQNORMS_FILE), dtype=np.float32, mode="r", shape=(self._count,)),
+            np.memmap(self._file(OFFSETS_FILE), dtype=np.int64, mode="r", shape=(self._count,))
+        )
+
+    def _code_width(self) -> int:
+        return self.vector_size if self.quantizer.kind == "scalar" else self.quantizer.subvectors
+
+    def _code_dtype(self):
+        return np.int8 if self.quantizer.kind == "scalar" else np.uint8
+
+    def _load_quantizer(self):
+        path = self._file(QUANTIZER_FILE)
+        if self.quantizer is None or not os.path.exists(path):
+            return
+
+        with np.load(path) as state:
+            if str(state["kind"]) != self.quantizer.kind:
+                logger.warning(f"Stored quantizer is '{state['kind']}', config asks for '{self.quantizer.kind}'. "
+                               f"Retraining on next insert.")
+                return
+            self.quantizer.load_state({k: state[k] for k in state.files if k != "kind"})
+
+        self._truncate(CODES_FILE, self._count * self._code_width())
+        codes = np.fromfile(self._file(CODES_FILE), dtype=self._code_dtype())
+        self._codes = codes.reshape(-1, self._code_width())
+        if len(self._codes) != self._count:
+            logger.warning("Quantized codes are incomplete; re-encoding from full-precision vectors.")
+            self._train_quantizer()
+
+    def _train_quantizer(self):
+        """
+        Trains the quantizer on a sample of the stored vectors and re-encodes every row.
+        """
+        vectors = self._snapshot[0]
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(len(vectors), size=min(self.sample_size, len(vectors)), replace=False))
+        self.quantizer.fit(np.asarray(vectors[sample_rows]))
+
+        self._codes = np.concatenate([
+            self.quantizer.encode(np.asarray(vectors[start:start + 65_536]))
+            for start in range(0, len(vectors), 65_536)
+        ])
+        self._codes.tofile(self._file(CODES_FILE))
+        np.savez(self._file(QUANTIZER_FILE), kind=self.quantizer.kind, **self.quantizer.state())
+        logger.info(f"Trained {self.quantizer.kind} quantizer on {len(sample_rows)} vector(s) "
+                    f"for collection '{self.collection_name}'.")
+
+    def _save_meta(self):
+        self._generation += 1
+        tmp_path = self._file(f"{META_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "dim": self.vector_size,
+                "distance": self.distance_name,
+                "count": self._count,
+                "payload_bytes": self._payload_bytes,
+                "tombstones": self._tombstones,
+                "generation": self._generation
+            }, f)
+        os.replace(tmp_path, self._file(META_FILE))
+        self._meta_stat = self._stat_meta()
+
+    def _read_payloads(self, offsets: np.ndarray, rows: np.ndarray) -> List[Dict[str, Any]]:
+        payloads = []
+        with open(self._file(PAYLOADS_FILE), "rb") as f:
+            for row in rows:
+                f.seek(int(offsets[row]))
+                payloads.append(json.loads(f.readline()))
+        return payloads
+
+    def stats(self) -> Dict[str, Any]:
+        self._refresh()
+        return {**super().stats(), "rows": self._count, "deleted_rows": self._deleted_count}
+
+    # ---------- backend hooks ----------
+
+    def _upsert(self, point_ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.distance_name == "COSINE":
+            # Store unit vectors so cosine similarity is a plain dot product (as Qdrant does)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+
+        records = [{"id": point_id, **payload} for point_id, payload in zip(point_ids, payloads)]
+        lines = [(json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8") for record in records]
+
+        with self._lock, self._file_lock.locked():
+            self._sync()
+            offsets = self._payload_bytes + np.concatenate(([0], np.cumsum([len(line) for line in lines])[:-1]))
+
+            with open(self._file(VECTORS_FILE), "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._file(SQNORMS_FILE), "ab") as f:
+                f.write(np.einsum("ij,ij->i", vectors, vectors).astype(np.float32).tobytes())
+            with open(self._file(OFFSETS_FILE), "ab") as f:
+                f.write(offsets.astype(np.int64).tobytes())
+            with open(self._file(PAYLOADS_FILE), "ab") as f:
+                f.writelines(lines)
+
+            new_codes = None
+            if self.quantizer is not None and self.quantizer.trained and self._codes is not None:
+                new_codes = self.quantizer.encode(vectors)
+                with open(self._file(CODES_FILE), "ab") as f:
+                    f.write(new_codes.tobytes())
+
+            # Earlier rows of re-upserted ids are superseded by the ones just appended
+            replaced = self.payload_index.id_rows(point_ids, self._count) if self._count else np.empty(0, np.int64)
+            self._mark_deleted(replaced)
+
+            start_row = self._count
+            self._count += len(point_ids)
+            self._payload_bytes += sum(len(line) for line in lines)
+            self._deleted = np.concatenate([self._deleted, np.zeros(len(point_ids), dtype=bool)])
+            self._save_meta()
+            self._remap()
+            self.payload_index.add(start_row, records)
+
+            if new_codes is not None:
+                self._codes = np.concatenate([self._codes, new_codes])
+            elif self.quantizer is not None and self._count >= self.train_size:
+                self._train_quantizer()
+
+            if self.index is not None:
+                if self.index.trained:
+                    self.index.add(vectors)
+                elif self._count >= self.index.train_size:
+                    self.index.train(self._snapshot[0])
+
+    def _delete(self, point_ids: List[str]):
+        with self._lock, self._file_lock.locked():
+            self._sync()
+            if self._mark_deleted(self.payload_index.id_rows(point_ids, self._count)):
+                self._save_meta()
+
+    def _delete_document(self, document_id: str):
+        with self._lock, self._file_lock.locked():
+            self._sync()
+            rows = self.payload_index.rows({"document_id": [document_id]}, self._count)
+            if self._mark_deleted(rows):
+                self._save_meta()
+
+    def _search_vector(self, query_vector: np.ndarray, threshold: float, limit: int,
+                       search_effort: Optional[int] = None,
+                       filters: Optional[Dict[str, Any]] = None,
+                       with_vectors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Scores the query against the collection. `search_effort` is the IVF `nprobe`
+        for this query (ignored by the flat scan). Filters restrict the scored rows up front.
+        With `with_vectors`, hits carry their full-precision stored vector.
+        """
+        self._refresh()
+        vectors, sqnorms, offsets = self._snapshot
+        codes = self._codes
+        if len(vectors) == 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        if self.distance_name == "COSINE":
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        # Restrict to filtered rows and/or the probed IVF lists, or scan every row
+        filtered = self.payload_index.rows(filters, len(vectors))
+        candidates = None
+        if self.index is not None and self.index.trained:
+            nprobe = search_effort or self.index.nprobe
+            # A selective filter is cheaper (and exact) to scan directly than to intersect with the probes
+            if filtered is None or len(filtered) > len(vectors) * nprobe / self.index.nlist:
+                candidates = self.index.candidate_rows(query, nprobe=nprobe)
+                candidates = candidates[candidates < len(vectors)]
+        if filtered is not None:
+            candidates = filtered if candidates is None else np.intersect1d(candidates, filtered, assume_unique=True)
+
+        deleted = self._deleted[:len(vectors)] if self._deleted_count else None
+        if deleted is not None and candidates is not None:
+            candidates = candidates[~deleted[candidates]]
+        # Full scans score every row; tombstoned rows get the worst possible score instead
+        worst = np.inf if self.distance_name == "EUCLID" else -np.inf
+
+        if codes is not None and len(codes) == len(vectors):
+            # First pass on compressed codes, then rescore the survivors in full precision
+            pool = candidates if candidates is not None else np.arange(len(vectors))
+            pool_codes = codes if candidates is None else codes[candidates]
+            pool_sqnorms = sqnorms if candidates is None else sqnorms[candidates]
+            approx = approximate_scores(self.quantizer, pool_codes, query, self.distance_name, pool_sqnorms)
+            if deleted is not None and candidates is None:
+                approx[deleted] = worst
+            if not self.rescore:
+                order = self._top_k(approx, limit)
+                rows, scores = pool[order], approx[order]
+            else:
+                shortlist = np.sort(pool[self._top_k(approx, max(limit, int(limit * self.oversampling)))])
+                exact = self._exact_scores(np.asarray(vectors[shortlist]), sqnorms[shortlist], query)
+                order = self._top_k(exact, limit)
+                rows, scores = shortlist[order], exact[order]
+        elif candidates is not None:
+            exact = self._exact_scores(np.asarray(vectors[candidates]), sqnorms[candidates], query)
+            order = self._top_k(exact, limit)
+            rows, scores = candidates[order], exact[order]
+        else:
+            exact = self._exact_scores(vectors, sqnorms, query)
+            if deleted is not None:
+                exact[deleted] = worst
+            rows = self._top_k(exact, limit)
+            scores = exact[rows]
+
+        keep = [i for i, (row, score) in enumerate(zip(rows, scores))
+                if self._passes_threshold(float(score), threshold) and (deleted is None or not deleted[row])]
+        rows, scores = rows[keep], scores[keep]
+
+        payloads = self._read_payloads(offsets, rows)
+        if with_vectors:
+            return [self._to_match(score, payload, vector)
+                    for score, payload, vector in zip(scores, payloads, np.asarray(vectors[rows]))]
+        return [self._to_match(score, payload) for score, payload in zip(scores, payloads)]
+
+    def _exact_scores(self, vectors: np.ndarray, sqnorms: np.ndarray, query: np.ndarray) -> np.ndarray:
+        scores = vectors @ query
+        if self.distance_name == "EUCLID":
+            # ||v - q||² = ||v||² - 2·v·q + ||q||²
+            return np.sqrt(np.maximum(sqnorms - 2 * scores + float(query @ query), 0.0))
+        return scores
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the k best scores, best first (ascending for EUCLID distances).
+        """
+        order_keys = scores if self.distance_name == "EUCLID" else -scores
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(order_keys, k - 1)[:k]
+        return top[np.argsort(order_keys[top], kind="stable")]
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+
+class PayloadIndex:
+    """
+    In-memory keyword/range index over the point ids and filterable payload fields of a local collection.
+
+    Built lazily from the payload sidecar on the first filtered search (so unfiltered
+    deployments keep their instant start) and then maintained incrementally on insert.
+    """
+
+    def __init__(self, payloads_path: str):
+        self.payloads_path = payloads_path
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        self._id_rows: Dict[str, List[int]] = {}  # an id has several rows once it is re-upserted
+        self._document_rows: Dict[str, List[int]] = {}
+        self._tag_rows: Dict[str, List[int]] = {}
+        self._ingested_at: List[int] = []
+
+    def _index(self, row: int, payload: Dict[str, Any]):
+        self._id_rows.setdefault(payload.get("id"), []).append(row)
+        self._document_rows.setdefault(payload.get("document_id"), []).append(row)
+        for tag in payload.get("tags", []):
+            self._tag_rows.setdefault(tag, []).append(row)
+        self._ingested_at.append(int(payload.get("ingested_at", 0)))
+
+    def _ensure_loaded(self, count: int):
+        if self._loaded:
+            return
+        if os.path.exists(self.payloads_path):
+            with open(self.payloads_path, "rb") as f:
+                for row, line in enumerate(f):
+                    if row >= count:
+                        break
+                    self._index(row, json.loads(line))
+        self._loaded = True
+        logger.info(f"Built payload index over {len(self._ingested_at)} row(s).")
+
+    def add(self, start_row: int, payloads: List[Dict[str, Any]]):
+        """
+        Indexes freshly appended rows; a no-op until the index has been built.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            for offset, payload in enumerate(payloads):
+                self._index(start_row + offset, payload)
+
+    def id_rows(self, point_ids: List[str], count: int) -> np.ndarray:
+        """
+        Returns every row (live or deleted) ever written for the given point ids.
+        """
+        with self._lock:
+            self._ensure_loaded(count)
+            rows = [row for point_id in point_ids for row in self._id_rows.get(point_id, [])]
+        return np.asarray(sorted(rows), dtype=np.int64)
+
+    def rows(self, filters: Optional[Dict[str, Any]], count: int) -> Optional[np.ndarray]:
+        """
+        Returns the sorted row ids matching a normalised filter, or None when nothing is filtered.
+        """
+        if not filters:
+            return None
+
+        with self._lock:
+            self._ensure_loaded(count)
+            selected: Optional[np.ndarray] = None
+
+            for field, index in (("document_id", self._document_rows), ("tags", self._tag_rows)):
+                if field in filters:
+                    lists = [index[value] for value in filters[field] if value in index]
+                    rows = np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int64)
+                    selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+
+            if "ingested_after" in filters or "ingested_before" in filters:
+                ingested_at = np.asarray(self._ingested_at[:count], dtype=np.int64)
+                mask = np.ones(len(ingested_at), dtype=bool)
+                if "ingested_after" in filters:
+                    mask &= ingested_at >= filters["ingested_after"]
+                if "ingested_before" in filters:
+                    mask &= ingested_at <= filters["ingested_before"]
+                rows = np.flatnonzero(mask)
+                selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+
+        selected = selected.astype(np.int64)
+        return selected[selected < count]
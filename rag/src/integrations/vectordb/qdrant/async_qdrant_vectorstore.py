@@ -0,0 +1,102 @@
+import asyncio
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Batch, PayloadSchemaType, PointIdsList
+
+from helpers.logger import setup_logger
+from integrations.vectordb.filters import FILTERABLE_FIELDS
+from integrations.vectordb.qdrant.qdrant_vectorstore import QdrantVectorStore
+
+logger = setup_logger("app")
+
+
+class AsyncQdrantVectorStore(QdrantVectorStore):
+    """
+    Qdrant vector store whose `ainsert_chunks` / `asearch_similar` talk to Qdrant through
+    `AsyncQdrantClient`, so network round-trips never occupy an executor thread.
+
+    Embedding still runs in the bounded executor (it is CPU/GPU bound). The synchronous
+    methods inherited from `QdrantVectorStore` keep working for non-async callers.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        super().__init__(config)
+        self.async_client = AsyncQdrantClient(host=self.host, port=self.port)
+        self._collection_lock: Optional[asyncio.Lock] = None
+
+    async def _acreate_collection_if_not_exists(self):
+        """
+        Async counterpart of `_create_collection_if_not_exists`, checked once per process.
+        """
+        if self._collection_ready:
+            return
+        if self._collection_lock is None:
+            self._collection_lock = asyncio.Lock()
+
+        async with self._collection_lock:
+            if self._collection_ready:
+                return
+            if not await self.async_client.collection_exists(self.collection_name):
+                logger.info(f"Creating new Qdrant collection: {self.collection_name}")
+                try:
+                    await self.async_client.create_collection(**self._collection_params())
+                except Exception:
+                    if not await self.async_client.collection_exists(self.collection_name):
+                        raise
+                    logger.info(f"Qdrant collection '{self.collection_name}' was created by another process.")
+                else:
+                    for field, schema in FILTERABLE_FIELDS.items():
+                        await self.async_client.create_payload_index(
+                            collection_name=self.collection_name,
+                            field_name=field,
+                            field_schema=PayloadSchemaType(schema)
+                        )
+            self._collection_ready = True
+
+    async def _aupsert(self, point_ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        await self._acreate_collection_if_not_exists()
+        for start in range(0, len(point_ids), self.upsert_batch_size):
+            end = start + self.upsert_batch_size
+            await self.async_client.upsert(
+                collection_name=self.collection_name,
+                points=Batch(ids=point_ids[start:end], vectors=vectors[start:end].tolist(), payloads=payloads[start:end]),
+                wait=True
+            )
+
+    async def _adelete(self, point_ids: List[str]):
+        await self.async_client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(points=point_ids),
+            wait=True
+        )
+
+    async def _adelete_document(self, document_id: str):
+        await self._acreate_collection_if_not_exists()
+        await self.async_client.delete(
+            collection_name=self.collection_name,
+            points_selector=self._document_selector(document_id),
+            wait=True
+        )
+
+    async def _asearch_vector(self, query_vector: np.ndarray, threshold: float, limit: int,
+                              search_effort: Optional[int] = None,
+                              filters: Optional[Dict[str, Any]] = None,
+                              with_vectors: bool = False) -> List[Dict[str, Any]]:
+        response = await self.async_client.query_points(
+            **self._query_params(query_vector, threshold, limit, search_effort, filters, with_vectors))
+        return [self._to_match(point.score, point.payload or {}, point.vector) for point in response.points]
+
+    async def _asearch_vectors(self, searches: List[tuple]) -> List[List[Dict[str, Any]]]:
+        results = []
+        for start in range(0, len(searches), self.search_batch_size):
+            responses = await self.async_client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[self._query_request(*search) for search in searches[start:start + self.search_batch_size]]
+            )
+            results.extend(self._batch_matches(responses))
+        return results
+
+    async def aclose(self):
+        await self.async_client.close()
@@ -1,13 +1,33 @@
-import os
-import uuid
+import threading
 from typing import List, Dict, Any, Optional
 
-from openai import OpenAI
+import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, Distance, VectorParams
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import (
+    CompressionRatio,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HnswConfigDiff,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    ProductQuantization,
+    QueryRequest,
+    ProductQuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 
 from helpers.logger import setup_logger
+from integrations.vectordb.base_vectorstore import BaseVectorStore
+from integrations.vectordb.filters import FILTERABLE_FIELDS, to_qdrant_filter
+from integrations.vectordb.quantization import DEFAULTS as QUANTIZATION_DEFAULTS
 
 logger = setup_logger("app")
 
@@ -15,158 +35,213 @@ logger = setup_logger("app")
 DEFAULTS = {
     "host": "localhost",
     "port": 6333,
-    "collection": "source_texts",
-    "provider": "sentence-transformers",
-    "model": "all-MiniLM-L6-v2",
-    "openai_model": "text-embedding-ada-002",
-    "vector_size": 384,
-    "openai_vector_size": 1536,
-    "distance": Distance.COSINE
+    "hnsw_m": 16,
+    "hnsw_ef_construct": 100,
+    "search_batch_size": 64  # queries per query_batch_points request
 }
 
 
-class QdrantVectorStore:
+class QdrantVectorStore(BaseVectorStore):
+    backend_name = "Qdrant"
+
     def __init__(self, config: Optional[dict] = None):
         """
         Initialize the Qdrant vector store using config dictionary.
         Supports both sentence-transformers and OpenAI embeddings.
         Lazy-loads heavy models to reduce app startup time.
         """
-        config = config or {}
-        qconf = config.get("vectordb", {}).get("qdrant", {})
-
-        self.host = qconf.get("host", DEFAULTS["host"])
-        self.port = qconf.get("port", DEFAULTS["port"])
-        self.collection_name = qconf.get("collection_name", DEFAULTS["collection"])
-        self.provider = qconf.get("provider", DEFAULTS["provider"]).lower()
-
-        # Embedding model config
-        if self.provider == "openai":
-            self.embedding_model_name = qconf.get("embedding_model", DEFAULTS["openai_model"])
-            self.vector_size = qconf.get("vector_size", DEFAULTS["openai_vector_size"])
-        else:
-            self.embedding_model_name = qconf.get("embedding_model", DEFAULTS["model"])
-            self.vector_size = qconf.get("vector_size", DEFAULTS["vector_size"])
+        super().__init__(config, section="qdrant")
 
-        self.distance = getattr(Distance, qconf.get("distance", DEFAULTS["distance"].name), DEFAULTS["distance"])
-
-        self.embedding_model = None  # for sentence-transformers
-        self.openai_client = None  # for OpenAI
+        self.host = self.conf.get("host", DEFAULTS["host"])
+        self.port = self.conf.get("port", DEFAULTS["port"])
+        self.distance = getattr(Distance, self.distance_name)
+        self.quantization = self.conf.get("quantization", {})
+        self.hnsw = self.conf.get("hnsw", {})
+        self.search_batch_size = self.conf.get("search_batch_size", DEFAULTS["search_batch_size"])
 
         self.client = QdrantClient(host=self.host, port=self.port)
+        # Ingestion upserts from several threads; only one of them may create the collection
+        self._collection_ready = False
+        self._collection_create_lock = threading.Lock()
 
         logger.info(
             f"QdrantVectorStore initialized with provider='{self.provider}', "
             f"model='{self.embedding_model_name}', collection='{self.collection_name}', "
-            f"vector_size={self.vector_size}, distance={self.distance.name}"
+            f"vector_size={self.vector_size}, distance={self.distance.name}, "
+            f"embedding_batch_size={self.embedding_batch_size}, "
+            f"quantization={self.quantization.get('type', QUANTIZATION_DEFAULTS['type'])}"
         )
 
-    def _lazy_load_embedding_model(self):
+    def _quantization_config(self):
         """
-        Lazily loads the embedding model based on the provider.
+        Maps `vectordb.qdrant.quantization` onto Qdrant's collection quantization config.
         """
-        if self.provider == "openai":
-            if self.openai_client is None:
-                logger.info("Loading OpenAI client for embeddings...")
-                self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        else:
-            if self.embedding_model is None:
-                logger.info(f"Loading SentenceTransformer model: {self.embedding_model_name}")
-                self.embedding_model = SentenceTransformer(self.embedding_model_name)
-
-    def _encode(self, text: str) -> List[float]:
+        kind = str(self.quantization.get("type", QUANTIZATION_DEFAULTS["type"])).lower()
+        always_ram = self.quantization.get("always_ram", QUANTIZATION_DEFAULTS["always_ram"])
+
+        if kind == "scalar":
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=self.quantization.get("quantile", QUANTIZATION_DEFAULTS["quantile"]),
+                always_ram=always_ram
+            ))
+        if kind == "product":
+            compression = str(self.quantization.get("pq_compression", QUANTIZATION_DEFAULTS["pq_compression"]))
+            return ProductQuantization(product=ProductQuantizationConfig(
+                compression=CompressionRatio(compression.lower()),
+                always_ram=always_ram
+            ))
+        return None
+
+    def _search_params(self, search_effort: Optional[int] = None) -> Optional[SearchParams]:
         """
-        Encodes a text string into an embedding using the configured provider.
+        Per-query HNSW `ef` plus rescoring/oversampling parameters when the collection is quantized.
         """
-        self._lazy_load_embedding_model()
-
-        if self.provider == "openai":
-            response = self.openai_client.embeddings.create(
-                input=[text],
-                model=self.embedding_model_name
+        hnsw_ef = search_effort or self.hnsw.get("ef")
+        quantization = None
+        if self._quantization_config() is not None:
+            quantization = QuantizationSearchParams(
+                rescore=self.quantization.get("rescore", QUANTIZATION_DEFAULTS["rescore"]),
+                oversampling=self.quantization.get("oversampling", QUANTIZATION_DEFAULTS["oversampling"])
             )
-            return response.data[0].embedding
-        else:
-            return self.embedding_model.encode(text).tolist()
 
-    def _create_collection_if_not_exists(self):
+        if hnsw_ef is None and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+    def _collection_params(self) -> Dict[str, Any]:
         """
-        Ensures the Qdrant collection exists; creates it if it does not.
+        Arguments for `create_collection`, shared by the sync and async clients.
         """
-        collections = self.client.get_collections()
-        existing = [col.name for col in collections.collections]
-
-        if self.collection_name not in existing:
-            logger.info(f"Creating new Qdrant collection: {self.collection_name}")
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=self.vector_size, distance=self.distance)
-            )
-        else:
-            logger.debug(f"Qdrant collection '{self.collection_name}' already exists.")
+        return dict(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(size=self.vector_size, distance=self.distance),
+            hnsw_config=HnswConfigDiff(
+                m=self.hnsw.get("m", DEFAULTS["hnsw_m"]),
+                ef_construct=self.hnsw.get("ef_construct", DEFAULTS["hnsw_ef_construct"])
+            ),
+            quantization_config=self._quantization_config()
+        )
 
-    def insert_chunks(self, document_id: str, chunks: List[str]) -> int:
+    def _create_collection_if_not_exists(self):
         """
-        Encodes and inserts text chunks into the Qdrant collection.
-
-        Returns:
-            int: Number of chunks successfully inserted.
+        Ensures the Qdrant collection exists; creates it (with payload indexes) if it does not.
+        Checked once per store; another process creating it first counts as success.
         """
-        points = []
-
-        for chunk in chunks:
-            embedding = self._encode(chunk)
-            point_id = str(uuid.uuid4())
+        if self._collection_ready:
+            return
+
+        with self._collection_create_lock:
+            if self._collection_ready:
+                return
+            if not self.client.collection_exists(self.collection_name):
+                logger.info(f"Creating new Qdrant collection: {self.collection_name}")
+                try:
+                    self.client.create_collection(**self._collection_params())
+                except Exception:
+                    if not self.client.collection_exists(self.collection_name):
+                        raise
+                    logger.info(f"Qdrant collection '{self.collection_name}' was created by another process.")
+                else:
+                    for field, schema in FILTERABLE_FIELDS.items():
+                        self.client.create_payload_index(
+                            collection_name=self.collection_name,
+                            field_name=field,
+                            field_schema=PayloadSchemaType(schema)
+                        )
+            else:
+                logger.debug(f"Qdrant collection '{self.collection_name}' already exists.")
+            self._collection_ready = True
+
+    def _upsert(self, point_ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        self._create_collection_if_not_exists()
+        self.client.upload_collection(
+            collection_name=self.collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=point_ids,
+            batch_size=self.upsert_batch_size,
+            wait=True
+        )
 
-            points.append(
-                PointStruct(
-                    id=point_id,
-                    vector=embedding,
-                    payload={
-                        "document_id": document_id,
-                        "text": chunk
-                    }
-                )
-            )
+    def _delete(self, point_ids: List[str]):
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(points=point_ids),
+            wait=True
+        )
 
-        if points:
-            self._create_collection_if_not_exists()
-            self.client.upsert(collection_name=self.collection_name, points=points)
-            logger.info(f"Inserted {len(points)} chunk(s) into Qdrant collection '{self.collection_name}'.")
-        else:
-            logger.warning("No chunks to insert into Qdrant.")
+    def _delete_document(self, document_id: str):
+        if not self.client.collection_exists(self.collection_name):
+            return
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=self._document_selector(document_id),
+            wait=True
+        )
 
-        return len(points)
+    @staticmethod
+    def _document_selector(document_id: str) -> FilterSelector:
+        return FilterSelector(filter=Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]))
+
+    def _search_vector(self, query_vector: np.ndarray, threshold: float, limit: int,
+                       search_effort: Optional[int] = None,
+                       filters: Optional[Dict[str, Any]] = None,
+                       with_vectors: bool = False) -> List[Dict[str, Any]]:
+        # Filtering and the score threshold are applied server-side, so only real hits are transferred.
+        # For EUCLID, Qdrant treats score_threshold as a maximum distance.
+        response = self.client.query_points(
+            **self._query_params(query_vector, threshold, limit, search_effort, filters, with_vectors))
+        return [self._to_match(point.score, point.payload or {}, point.vector) for point in response.points]
+
+    def _search_vectors(self, searches: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """
+        Sends the searches through `query_batch_points`, `search_batch_size` queries per request.
+        """
+        results = []
+        for start in range(0, len(searches), self.search_batch_size):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[self._query_request(*search) for search in searches[start:start + self.search_batch_size]]
+            )
+            results.extend(self._batch_matches(responses))
+        return results
 
-    def search_similar(self, text: str, threshold: float, limit: int = 5) -> List[Dict[str, Any]]:
+    def _query_request(self, query_vector: np.ndarray, threshold: float, limit: int,
+                       search_effort: Optional[int] = None,
+                       filters: Optional[Dict[str, Any]] = None,
+                       with_vectors: bool = False) -> QueryRequest:
         """
-        Searches for chunks similar to the input text in Qdrant.
+        One entry of a `query_batch_points` call; mirrors `_query_params`.
+        """
+        return QueryRequest(
+            query=query_vector.tolist(),
+            filter=to_qdrant_filter(filters),
+            score_threshold=threshold,
+            limit=limit,
+            params=self._search_params(search_effort),
+            with_payload=True,
+            with_vector=with_vectors
+        )
 
-        Args:
-            text (str): The query text.
-            threshold (float): Minimum similarity score.
-            limit (int): Maximum number of results.
+    def _batch_matches(self, responses) -> List[List[Dict[str, Any]]]:
+        return [[self._to_match(point.score, point.payload or {}, point.vector) for point in response.points]
+                for response in responses]
 
-        Returns:
-            List[Dict[str, Any]]: List of matching texts and their scores.
+    def _query_params(self, query_vector: np.ndarray, threshold: float, limit: int,
+                      search_effort: Optional[int] = None,
+                      filters: Optional[Dict[str, Any]] = None,
+                      with_vectors: bool = False) -> Dict[str, Any]:
         """
-        query_vector = self._encode(text)
-
-        results = self.client.search(
+        Arguments for `query_points`, shared by the sync and async clients.
+        """
+        return dict(
             collection_name=self.collection_name,
-            query_vector=query_vector,
+            query=query_vector.tolist(),
+            query_filter=to_qdrant_filter(filters),
+            score_threshold=threshold,
             limit=limit,
-            with_payload=True
+            search_params=self._search_params(search_effort),
+            with_payload=True,
+            with_vectors=with_vectors
         )
-
-        matches = [
-            {
-                "text": result.payload.get("text", ""),
-                "score": result.score
-            }
-            for result in results if result.score >= threshold
-        ]
-
-        logger.info(
-            f"Search completed for query '{text[:30]}...'. Found {len(matches)} matches above threshold {threshold}.")
-        return matches
@@ -0,0 +1,189 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+# Default configuration values
+DEFAULTS = {
+    "type": "none",  # none, scalar or product
+    "quantile": 0.99,
+    "always_ram": True,
+    "rescore": True,
+    "oversampling": 3.0,
+    "pq_compression": "x16",
+    "train_size": 1024,  # rows required before the quantizer is trained
+    "sample_size": 20_000  # rows used for training
+}
+
+# Bytes of float32 input per output byte, matching Qdrant's CompressionRatio values
+PQ_COMPRESSION = {"x4": 4, "x8": 8, "x16": 16, "x32": 32, "x64": 64}
+
+PQ_CENTROIDS = 256
+KMEANS_ITERATIONS = 12
+SCORE_CHUNK_ROWS = 8192
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension int8 scalar quantization.
+
+    Each dimension is clipped to its [1 - quantile, quantile] range and mapped onto 256 levels,
+    so a vector costs one byte per dimension instead of four.
+    """
+
+    kind = "scalar"
+
+    def __init__(self, quantile: float = DEFAULTS["quantile"]):
+        self.quantile = quantile
+        self.offset: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    @property
+    def trained(self) -> bool:
+        return self.offset is not None
+
+    def fit(self, vectors: np.ndarray):
+        low = np.quantile(vectors, 1 - self.quantile, axis=0).astype(np.float32)
+        high = np.quantile(vectors, self.quantile, axis=0).astype(np.float32)
+        self.offset = low
+        self.scale = np.maximum(high - low, 1e-12) / 255.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        levels = np.rint((vectors - self.offset) / self.scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.offset + self.scale * (codes.astype(np.float32) + 128)
+
+    def dot(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Approximate `decode(codes) @ query` without materialising the decoded matrix.
+        """
+        weights = (query * self.scale).astype(np.float32)
+        bias = float(query @ self.offset) + 128.0 * float(weights.sum())
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_CHUNK_ROWS):
+            block = codes[start:start + SCORE_CHUNK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ weights + bias
+        return scores
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"offset": self.offset, "scale": self.scale}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        self.offset = state["offset"]
+        self.scale = state["scale"]
+
+
+class ProductQuantizer:
+    """
+    Product quantization with 256 centroids per sub-vector (one byte per sub-vector).
+
+    Scores are computed with asymmetric distance: the query stays in full precision and
+    is compared against centroid lookup tables.
+    """
+
+    kind = "product"
+
+    def __init__(self, dim: int, compression: str = DEFAULTS["pq_compression"]):
+        ratio = PQ_COMPRESSION.get(str(compression).lower(), PQ_COMPRESSION[DEFAULTS["pq_compression"]])
+        sub_dim = max(1, ratio // 4)
+        while dim % sub_dim:
+            sub_dim -= 1  # fall back to the nearest sub-vector size that divides the dimension
+
+        self.dim = dim
+        self.sub_dim = sub_dim
+        self.subvectors = dim // sub_dim
+        self.centroids: Optional[np.ndarray] = None  # (subvectors, 256, sub_dim)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def fit(self, vectors: np.ndarray, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        parts = vectors.reshape(len(vectors), self.subvectors, self.sub_dim)
+        k = min(PQ_CENTROIDS, len(vectors))
+        centroids = np.zeros((self.subvectors, PQ_CENTROIDS, self.sub_dim), dtype=np.float32)
+
+        for j in range(self.subvectors):
+            data = parts[:, j, :]
+            centers = data[rng.choice(len(data), size=k, replace=False)].copy()
+            for _ in range(KMEANS_ITERATIONS):
+                assignment = self._nearest(data, centers)
+                sums = np.zeros_like(centers)
+                np.add.at(sums, assignment, data)
+                counts = np.bincount(assignment, minlength=k)[:, None]
+                centers = np.where(counts > 0, sums / np.maximum(counts, 1), centers)
+            centroids[j, :k] = centers
+
+        self.centroids = centroids
+
+    @staticmethod
+    def _nearest(data: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        distances = (np.einsum("ij,ij->i", centers, centers)[None, :] - 2 * data @ centers.T)
+        return np.argmin(distances, axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        parts = vectors.reshape(len(vectors), self.subvectors, self.sub_dim)
+        codes = np.empty((len(vectors), self.subvectors), dtype=np.uint8)
+        for j in range(self.subvectors):
+            codes[:, j] = self._nearest(parts[:, j, :], self.centroids[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = self.centroids[np.arange(self.subvectors), codes]  # (n, subvectors, sub_dim)
+        return parts.reshape(len(codes), self.dim)
+
+    def _lookup(self, codes: np.ndarray, table: np.ndarray) -> np.ndarray:
+        scores = np.empty(len(codes), dtype=np.float32)
+        columns = np.arange(self.subvectors)
+        for start in range(0, len(codes), SCORE_CHUNK_ROWS):
+            block = codes[start:start + SCORE_CHUNK_ROWS]
+            scores[start:start + len(block)] = table[columns, block].sum(axis=1)
+        return scores
+
+    def dot(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        query_parts = query.reshape(self.subvectors, 1, self.sub_dim)
+        table = (self.centroids * query_parts).sum(axis=2)  # (subvectors, 256)
+        return self._lookup(codes, table)
+
+    def sqdist(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        query_parts = query.reshape(self.subvectors, 1, self.sub_dim)
+        table = ((self.centroids - query_parts) ** 2).sum(axis=2)
+        return self._lookup(codes, table)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"centroids": self.centroids}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        self.centroids = state["centroids"]
+
+
+def create_quantizer(qconf: Optional[dict], dim: int):
+    """
+    Builds the quantizer described by a `quantization` config block, or None when disabled.
+    """
+    qconf = qconf or {}
+    kind = str(qconf.get("type", DEFAULTS["type"])).lower()
+
+    if kind == "scalar":
+        return ScalarQuantizer(quantile=qconf.get("quantile", DEFAULTS["quantile"]))
+    if kind == "product":
+        return ProductQuantizer(dim, compression=qconf.get("pq_compression", DEFAULTS["pq_compression"]))
+    return None
+
+
+def approximate_scores(quantizer, codes: np.ndarray, query: np.ndarray, distance: str,
+                       sqnorms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    First-pass scores on compressed codes, oriented like the exact scores
+    (similarity for COSINE/DOT, distance for EUCLID).
+    """
+    if distance != "EUCLID":
+        return quantizer.dot(codes, query)
+
+    if isinstance(quantizer, ProductQuantizer):
+        return np.sqrt(np.maximum(quantizer.sqdist(codes, query), 0.0))
+
+    # Exact norms + approximate dot product keep the scalar EUCLID estimate tight
+    return np.sqrt(np.maximum(sqnorms - 2 * quantizer.dot(codes, query) + float(query @ query), 0.0))
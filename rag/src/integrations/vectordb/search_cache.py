@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from helpers.text_hash import normalize_text
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": True,
+    "ttl_seconds": 300,
+    "max_entries": 1024
+}
+
+
+class SearchResultCache:
+    """
+    In-process LRU + TTL cache of vector-search results.
+
+    Keys embed a per-collection generation number; `invalidate(collection)` bumps it,
+    so every cached result for that collection becomes unreachable at once and ages out of the LRU.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def make_key(self, collection: str, query: str, threshold: float, limit: int, **options: Hashable) -> Tuple:
+        """
+        Builds the cache key for a search. Extra keyword options (filters, modes, ...) become part of the key.
+        """
+        with self._lock:
+            generation = self._generations.get(collection, 0)
+        return (
+            collection,
+            generation,
+            normalize_text(query),
+            float(threshold),
+            int(limit),
+            tuple(sorted(options.items()))
+        )
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(result) for result in entry[1]]
+
+    def put(self, key: Tuple, results: List[Dict[str, Any]]):
+        with self._lock:
+            if key[1] != self._generations.get(key[0], 0):
+                return  # the collection changed while this search was running
+            self._entries[key] = (time.monotonic(), [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection: str):
+        """
+        Invalidates every cached result for `collection` by bumping its generation.
+        """
+        with self._lock:
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+            self.invalidations += 1
+
+    def generation(self, collection: str) -> int:
+        with self._lock:
+            return self._generations.get(collection, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "invalidations": self.invalidations,
+            "generations": dict(self._generations)
+        }
+
+
+_search_cache: Optional[SearchResultCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache(config: Optional[dict]) -> Optional[SearchResultCache]:
+    """
+    Returns the process-wide search cache, or None when it is disabled.
+    Sharing one instance lets an insert through any store invalidate searches made through the others.
+    """
+    global _search_cache
+    cconf = (config or {}).get("vectordb", {}).get("search_cache", {})
+    if not cconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchResultCache(
+                ttl_seconds=cconf.get("ttl_seconds", DEFAULTS["ttl_seconds"]),
+                max_entries=cconf.get("max_entries", DEFAULTS["max_entries"])
+            )
+        return _search_cache
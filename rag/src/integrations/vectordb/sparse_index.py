@@ -0,0 +1,510 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from helpers.file_lock import FileLock
+from helpers.logger import setup_logger
+from integrations.vectordb.local.payload_index import PayloadIndex
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": True,
+    "path": "data/sparse_index",
+    "k1": 1.2,
+    "b": 0.75,
+    "merge_docs": 20_000,  # in-memory delta docs (or new tombstones) folded into the on-disk postings at this size
+    "rrf_k": 60,  # reciprocal-rank fusion constant
+    "candidates": 4  # hybrid: each retriever contributes limit * candidates hits to the fusion
+}
+
+SEARCH_MODES = ("dense", "sparse", "hybrid")
+
+POSTINGS_FILE = "postings.npz"
+DOCS_FILE = "docs.jsonl"
+TOMBSTONES_FILE = "tombstones.i64"
+META_FILE = "meta.json"
+LOCK_FILE = "lock"
+
+# Keeps identifiers such as "ERR-1042", "v2.3.1" or "sku_99/a" together as one token
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./:#][a-z0-9]+)*")
+_PART = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were "
+    "will with what which who how when where why do does did not no".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cases text into terms. Compound identifiers are kept whole and also split into
+    their alphanumeric parts, so "ERR-1042" matches queries for "ERR-1042" and for "1042".
+    """
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token not in _STOPWORDS:
+            terms.append(token)
+        parts = _PART.findall(token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if len(part) > 1 and part not in _STOPWORDS)
+    return terms
+
+
+class SparseIndex:
+    """
+    Persistent BM25 inverted index over the chunks of one collection.
+
+    Postings live in compressed-sparse-row arrays (`postings.npz`: vocabulary, term offsets,
+    doc ids, term frequencies). Newly added chunks go to an in-memory delta that is folded into
+    the arrays every `merge_docs` documents; until then they are durable in the `docs.jsonl`
+    sidecar and re-tokenized on load. Deletions are tombstones, as in the local vector store;
+    a merge drops the postings of tombstoned rows, and `merge_docs` new tombstones also trigger one.
+
+    As with the local vector store, writers hold an exclusive `flock` on the `lock` file and
+    bump the `generation` in `meta.json`, and an index that is behind reads the other
+    process's appended rows and tombstones (or reloads after another process merged).
+    """
+
+    def __init__(self, path: str, k1: float = DEFAULTS["k1"], b: float = DEFAULTS["b"],
+                 merge_docs: int = DEFAULTS["merge_docs"]):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.merge_docs = merge_docs
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self._file(LOCK_FILE))
+        self._reset_state()
+        with self._file_lock.locked(shared=True):
+            self._load()
+
+    # ---------- persistence ----------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _reset_state(self):
+        """
+        Empties every in-memory structure; `_load` then rebuilds them from the index files.
+        """
+        self._generation = 0  # commits seen so far (see `_sync`)
+        self._meta_stat = None  # stat of the meta.json last read or written
+        self._count = 0  # documents (rows) ever added
+        self._docs_bytes = 0
+        self._tombstones = 0
+        self._merged_tombstones = 0  # tombstones whose postings the last merge already dropped
+        self._deleted = np.zeros(0, dtype=bool)
+        self._doc_lens: List[int] = []  # terms per row
+        self._offsets: List[int] = []  # byte offset of each row in docs.jsonl
+        self._doc_lens_array: Optional[np.ndarray] = None  # cached np view of _doc_lens
+
+        # Merged postings (CSR) covering rows [0, _base_count)
+        self._base_count = 0
+        self._base_bytes = 0
+        self._vocab: Dict[str, int] = {}
+        self._term_offsets = np.zeros(1, dtype=np.int64)
+        self._post_docs = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.uint16)
+        # Delta postings for rows [_base_count, _count): term -> ([rows], [tfs])
+        self._delta: Dict[str, Tuple[List[int], List[int]]] = {}
+
+        self.payload_index = PayloadIndex(self._file(DOCS_FILE))
+
+    def _truncate(self, name: str, size: int):
+        path = self._file(name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def _stat_meta(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self._file(META_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self._file(META_FILE)):
+            return None
+        with open(self._file(META_FILE), "r") as f:
+            return json.load(f)
+
+    def _load(self):
+        self._meta_stat = self._stat_meta()
+        meta = self._read_meta()
+        if meta is None:
+            return
+        self._generation = meta.get("generation", 0)
+
+        self._docs_bytes = meta.get("docs_bytes", 0)
+        self._truncate(DOCS_FILE, self._docs_bytes)
+        self._base_count = meta.get("base_count", 0)
+        self._base_bytes = meta.get("base_bytes", 0)
+
+        if self._base_count:
+            with np.load(self._file(POSTINGS_FILE), allow_pickle=False) as postings:
+                self._vocab = {term: i for i, term in enumerate(postings["terms"].tolist())}
+                self._term_offsets = postings["term_offsets"]
+                self._post_docs = postings["docs"]
+                self._post_tfs = postings["tfs"]
+                self._doc_lens = postings["doc_lens"].tolist()
+                self._offsets = postings["offsets"].tolist()
+
+        # Re-tokenize the rows appended since the last merge
+        self._count = self._base_count
+        if os.path.exists(self._file(DOCS_FILE)):
+            with open(self._file(DOCS_FILE), "rb") as f:
+                f.seek(self._base_bytes)
+                position = self._base_bytes
+                for line in f:
+                    self._add_delta(self._count, json.loads(line)["text"], position)
+                    position += len(line)
+                    self._count += 1
+
+        self._tombstones = meta.get("tombstones", 0)
+        self._merged_tombstones = meta.get("merged_tombstones", 0)
+        self._truncate(TOMBSTONES_FILE, self._tombstones * 8)
+        self._deleted = np.zeros(self._count, dtype=bool)
+        if self._tombstones:
+            self._deleted[np.fromfile(self._file(TOMBSTONES_FILE), dtype=np.int64)] = True
+        logger.info(f"Loaded sparse index at {self.path} with {self._count} row(s), "
+                    f"{len(self._vocab)} merged term(s), {self._count - self._base_count} delta row(s).")
+
+    def _refresh(self):
+        """
+        Catches up with commits made by other processes; a `stat` is all it costs when there are none.
+        """
+        if self._stat_meta() == self._meta_stat:
+            return
+        with self._lock, self._file_lock.locked(shared=True):
+            self._sync()
+
+    def _sync(self):
+        """
+        Reads what other processes committed since this index last looked at `meta.json`.
+        The caller holds `_lock` and the file lock.
+        """
+        meta_stat = self._stat_meta()
+        if meta_stat == self._meta_stat:
+            return
+        meta = self._read_meta()
+        self._meta_stat = meta_stat
+        if meta is None or meta.get("generation", 0) == self._generation:
+            return
+
+        if (meta.get("base_count", 0) != self._base_count or meta.get("docs_bytes", 0) < self._docs_bytes
+                or meta.get("merged_tombstones", 0) != self._merged_tombstones):
+            self._reset_state()  # another process merged: its postings replace ours
+            self._load()
+        else:
+            self._load_committed(meta)
+        logger.info(f"Sparse index at {self.path} caught up with generation {self._generation} "
+                    f"written by another process ({self._count} row(s)).")
+
+    def _load_committed(self, meta: Dict[str, Any]):
+        """
+        Adds the rows and tombstones appended after this index's own count to the delta.
+        """
+        start = self._count
+        records = []
+        with open(self._file(DOCS_FILE), "rb") as f:
+            f.seek(self._docs_bytes)
+            position = self._docs_bytes
+            for line in f.read(meta["docs_bytes"] - self._docs_bytes).splitlines(keepends=True):
+                record = json.loads(line)
+                self._add_delta(self._count, record["text"], position)
+                records.append(record)
+                position += len(line)
+                self._count += 1
+        self._docs_bytes = meta["docs_bytes"]
+        self._generation = meta.get("generation", 0)
+        self._deleted = np.concatenate([self._deleted, np.zeros(self._count - start, dtype=bool)])
+        self.payload_index.add(start, records)
+
+        committed = meta.get("tombstones", 0)
+        if committed > self._tombstones:
+            rows = np.fromfile(self._file(TOMBSTONES_FILE), dtype=np.int64,
+                               offset=self._tombstones * 8, count=committed - self._tombstones)
+            self._deleted[rows] = True
+            self._tombstones = committed
+
+    def _save_meta(self):
+        self._generation += 1
+        tmp_path = self._file(f"{META_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "base_count": self._base_count,
+                "base_bytes": self._base_bytes,
+                "docs_bytes": self._docs_bytes,
+                "tombstones": self._tombstones,
+                "merged_tombstones": self._merged_tombstones,
+                "generation": self._generation
+            }, f)
+        os.replace(tmp_path, self._file(META_FILE))
+        self._meta_stat = self._stat_meta()
+
+    def _merge(self):
+        """
+        Folds the delta postings into the CSR arrays, dropping those of tombstoned rows, and rewrites
+        `postings.npz`. Row numbers do not change, so the docs sidecar and tombstones stay valid.
+        """
+        terms = list(self._vocab)
+        for term in self._delta:
+            if term not in self._vocab:
+                self._vocab[term] = len(terms)
+                terms.append(term)
+
+        base_terms = np.repeat(np.arange(len(self._term_offsets) - 1), np.diff(self._term_offsets))
+        delta_terms = np.concatenate([np.full(len(rows), self._vocab[t]) for t, (rows, _) in self._delta.items()]
+                                     or [np.zeros(0, dtype=np.int64)])
+        delta_docs = np.concatenate([rows for rows, _ in self._delta.values()] or [np.zeros(0)]).astype(np.int32)
+        delta_tfs = np.concatenate([tfs for _, tfs in self._delta.values()] or [np.zeros(0)]).astype(np.uint16)
+
+        all_terms = np.concatenate([base_terms, delta_terms]).astype(np.int64)
+        all_docs = np.concatenate([self._post_docs, delta_docs])
+        all_tfs = np.concatenate([self._post_tfs, delta_tfs])
+        live = ~self._deleted[all_docs]
+        all_terms, all_docs, all_tfs = all_terms[live], all_docs[live], all_tfs[live]
+        order = np.lexsort((all_docs, all_terms))
+
+        self._post_docs = all_docs[order]
+        self._post_tfs = all_tfs[order]
+        self._term_offsets = np.concatenate(([0], np.cumsum(np.bincount(all_terms, minlength=len(terms)))))
+        self._base_count = self._count
+        self._base_bytes = self._docs_bytes
+        self._merged_tombstones = self._tombstones
+        self._delta = {}
+
+        tmp_path = self._file(f"{POSTINGS_FILE}.tmp.npz")
+        np.savez(tmp_path, terms=np.array(terms, dtype=str), term_offsets=self._term_offsets,
+                 docs=self._post_docs, tfs=self._post_tfs,
+                 doc_lens=np.asarray(self._doc_lens, dtype=np.int32), offsets=np.asarray(self._offsets, dtype=np.int64))
+        os.replace(tmp_path, self._file(POSTINGS_FILE))
+        self._save_meta()
+        logger.info(f"Merged sparse index at {self.path}: {self._count} row(s), {len(terms)} term(s), "
+                    f"{len(self._post_docs)} live posting(s).")
+
+    # ---------- writes ----------
+
+    def _add_delta(self, row: int, text: str, offset: int):
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            rows, tfs = self._delta.setdefault(term, ([], []))
+            rows.append(row)
+            tfs.append(min(tf, 65535))
+        self._doc_lens.append(sum(counts.values()))
+        self._offsets.append(offset)
+
+    def _mark_deleted(self, rows: np.ndarray) -> int:
+        rows = np.unique(rows)
+        rows = rows[~self._deleted[rows]]
+        if len(rows) == 0:
+            return 0
+        with open(self._file(TOMBSTONES_FILE), "ab") as f:
+            f.write(rows.astype(np.int64).tobytes())
+        self._deleted[rows] = True
+        self._tombstones += len(rows)
+        return len(rows)
+
+    def add(self, point_ids: List[str], payloads: List[Dict[str, Any]]):
+        """
+        Indexes chunks (payloads carry `text`, `document_id`, `tags`, `ingested_at`).
+        Earlier rows of the same point ids are superseded.
+        """
+        if not point_ids:
+            return
+        records = [
+            {"id": point_id, "document_id": payload.get("document_id"), "text": payload.get("text", ""),
+             "tags": payload.get("tags", []), "ingested_at": payload.get("ingested_at", 0)}
+            for point_id, payload in zip(point_ids, payloads)
+        ]
+        lines = [(json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8") for record in records]
+
+        with self._lock, self._file_lock.locked():
+            self._sync()
+            self._mark_deleted(self.payload_index.id_rows(point_ids, self._count))
+
+            with open(self._file(DOCS_FILE), "ab") as f:
+                f.writelines(lines)
+            start_row, offset = self._count, self._docs_bytes
+            for record, line in zip(records, lines):
+                self._add_delta(self._count, record["text"], offset)
+                offset += len(line)
+                self._count += 1
+            self._docs_bytes = offset
+            self._deleted = np.concatenate([self._deleted, np.zeros(len(records), dtype=bool)])
+            self.payload_index.add(start_row, records)
+
+            self._save()
+
+    def delete(self, point_ids: List[str]):
+        with self._lock, self._file_lock.locked():
+            self._sync()
+            if self._mark_deleted(self.payload_index.id_rows(point_ids, self._count)):
+                self._save()
+
+    def delete_document(self, document_id: str):
+        with self._lock, self._file_lock.locked():
+            self._sync()
+            rows = self.payload_index.rows({"document_id": [document_id]}, self._count)
+            if self._mark_deleted(rows):
+                self._save()
+
+    def _save(self):
+        """
+        Persists a write, merging once the delta or the tombstones not yet compacted reach `merge_docs`.
+        """
+        if (self._count - self._base_count >= self.merge_docs
+                or self._tombstones - self._merged_tombstones >= self.merge_docs):
+            self._merge()
+        else:
+            self._save_meta()
+
+    def missing(self, point_ids: List[str]) -> List[str]:
+        """
+        Returns the point ids that have no live row in the index (e.g. ingested before it existed).
+        """
+        self._refresh()
+        with self._lock:
+            return [point_id for point_id in point_ids
+                    if not any(not self._deleted[row] for row in self.payload_index.id_rows([point_id], self._count))]
+
+    # ---------- search ----------
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        docs, tfs = [], []
+        term_id = self._vocab.get(term)
+        if term_id is not None:
+            start, end = self._term_offsets[term_id], self._term_offsets[term_id + 1]
+            docs.append(self._post_docs[start:end])
+            tfs.append(self._post_tfs[start:end])
+        if term in self._delta:
+            rows, counts = self._delta[term]
+            docs.append(np.asarray(rows, dtype=np.int32))
+            tfs.append(np.asarray(counts, dtype=np.uint16))
+        if not docs:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint16)
+        return np.concatenate(docs), np.concatenate(tfs)
+
+    def search(self, text: str, limit: int, filters: Optional[Dict[str, Any]] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Ranks chunks by BM25 against the query terms.
+
+        Args:
+            text (str): The query text.
+            limit (int): Maximum number of results.
+            filters (Optional[Dict[str, Any]]): A normalised filter (see `filters.normalize_filters`).
+
+        Returns:
+            List[Tuple[float, Dict[str, Any]]]: (score, payload) pairs, best first.
+        """
+        terms = set(tokenize(text))
+        self._refresh()
+        with self._lock:
+            count = self._count
+            live = count - int(self._deleted.sum())
+            if not terms or live == 0:
+                return []
+
+            allowed = self.payload_index.rows(filters, count)
+            if self._doc_lens_array is None or len(self._doc_lens_array) != count:
+                self._doc_lens_array = np.asarray(self._doc_lens, dtype=np.float32)
+            doc_lens = self._doc_lens_array
+            avg_len = max(float(doc_lens[~self._deleted].mean()), 1.0)
+            norms = self.k1 * (1 - self.b + self.b * doc_lens / avg_len)
+            scores = np.zeros(count, dtype=np.float32)
+
+            for term in terms:
+                docs, tfs = self._postings(term)
+                if len(docs) == 0:
+                    continue
+                keep = ~self._deleted[docs]
+                docs, tfs = docs[keep], tfs[keep]
+                df = len(docs)
+                if df == 0:
+                    continue
+                idf = max(0.0, math.log(1 + (live - df + 0.5) / (df + 0.5)))
+                tfs = tfs.astype(np.float32)
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norms[docs])
+
+            scores[self._deleted] = 0.0
+            if allowed is not None:
+                mask = np.zeros(count, dtype=bool)
+                mask[allowed] = True
+                scores[~mask] = 0.0
+
+            hits = np.flatnonzero(scores > 0)
+            if len(hits) == 0:
+                return []
+            top = hits[np.argsort(-scores[hits], kind="stable")[:limit]]
+            payloads = self._read_docs(top)
+
+        return [(float(scores[row]), payload) for row, payload in zip(top, payloads)]
+
+    def _read_docs(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        payloads = []
+        with open(self._file(DOCS_FILE), "rb") as f:
+            for row in rows:
+                f.seek(int(self._offsets[row]))
+                payloads.append(json.loads(f.readline()))
+        return payloads
+
+    def stats(self) -> Dict[str, int]:
+        self._refresh()
+        with self._lock:
+            return {
+                "rows": self._count,
+                "deleted_rows": int(self._deleted.sum()),
+                "postings": len(self._post_docs) + sum(len(rows) for rows, _ in self._delta.values()),
+                "terms": len(set(self._vocab) | set(self._delta)),
+                "delta_rows": self._count - self._base_count
+            }
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], k: int = DEFAULTS["rrf_k"],
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked match lists; each hit scores sum(1 / (k + rank)) over the lists it appears in.
+    Hits are identified by (document_id, text); the fused score replaces the original one.
+    """
+    fused: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, start=1):
+            key = (match.get("document_id"), match.get("text"))
+            entry = fused.setdefault(key, {**match, "score": 0.0})
+            entry["score"] += 1.0 / (k + rank)
+
+    results = sorted(fused.values(), key=lambda m: m["score"], reverse=True)
+    return results[:limit] if limit is not None else results
+
+
+_indexes: Dict[str, SparseIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_sparse_index(config: Optional[dict], scope: str) -> Optional[SparseIndex]:
+    """
+    Returns the process-wide sparse index for a backend/collection scope, or None when disabled.
+    """
+    sconf = (config or {}).get("vectordb", {}).get("sparse", {})
+    if not sconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    path = os.path.join(sconf.get("path", DEFAULTS["path"]), re.sub(r"[^A-Za-z0-9_.-]+", "_", scope))
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = SparseIndex(
+                path,
+                k1=sconf.get("k1", DEFAULTS["k1"]),
+                b=sconf.get("b", DEFAULTS["b"]),
+                merge_docs=sconf.get("merge_docs", DEFAULTS["merge_docs"])
+            )
+        return _indexes[path]
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from integrations.vectordb.base_vectorstore import BaseVectorStore
+
+DEFAULT_BACKEND = "qdrant"
+
+
+def create_vector_store(config: Optional[dict] = None, use_async: bool = False) -> BaseVectorStore:
+    """
+    Builds the vector store selected by `vectordb.backend` ("qdrant" or "local").
+    Backends are imported lazily so the unused one never loads its dependencies.
+
+    With `use_async`, Qdrant is served by `AsyncQdrantVectorStore` so the `a*` methods use
+    the async client; other backends offload their async methods to the bounded executor.
+    """
+    backend = (config or {}).get("vectordb", {}).get("backend", DEFAULT_BACKEND).lower()
+
+    if backend == "qdrant" and use_async:
+        from integrations.vectordb.qdrant.async_qdrant_vectorstore import AsyncQdrantVectorStore
+        return AsyncQdrantVectorStore(config)
+
+    if backend == "qdrant":
+        from integrations.vectordb.qdrant.qdrant_vectorstore import QdrantVectorStore
+        return QdrantVectorStore(config)
+
+    if backend == "local":
+        from integrations.vectordb.local.local_vectorstore import LocalVectorStore
+        return LocalVectorStore(config)
+
+    raise ValueError(f"Unsupported vector store backend: {backend}")
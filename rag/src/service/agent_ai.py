@@ -1,64 +1,244 @@
 import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from config.knowledge_manager import knowledge_curr
+import numpy as np
+
+from config.knowledge_manager import KNOWLEDGE_FILE, knowledge_curr
 from helpers.logger import setup_logger
-from integrations.llm.llm_interface import LLMClient
-from integrations.vectordb.qdrant.qdrant_vectorstore import QdrantVectorStore
+from helpers.single_flight import get_single_flight
+from helpers.text_hash import normalize_text, text_hash
+from helpers.token_utils import count_text_tokens
+from integrations.llm.llm_interface import ERROR_PREFIXES, LLMClient, is_error_response
+from integrations.llm.memory import AgentMemory
+from integrations.rerank.cross_encoder_reranker import create_reranker
+from integrations.vectordb.base_vectorstore import BaseVectorStore
+from integrations.vectordb.vectorstore_factory import create_vector_store
+from service.semantic_cache import get_semantic_cache
+from service.session_store import DEFAULTS as SESSION_DEFAULTS, get_session_store
 
 USER = "user"
 BOT = "bot"
+HISTORY_LENGTH = 10
+SUMMARY_INSTRUCTIONS = ("Summarize the conversation below in a few sentences, for your own later reference. "
+                        "Keep names, facts, decisions and open questions.")
 
 
 class AgentAI:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, vector_store: Optional[BaseVectorStore] = None):
+        """
+        Args:
+            config: Application config.
+            vector_store: Store to answer from; pass the one the routes write to, so inserts are seen
+                at once (a second local store would keep its own row count and search cache over the
+                same files). Created from the config on first use when omitted.
+        """
         self.logger = setup_logger("app")
         self.config = config
+        self.vector_store = vector_store
         self.constants = config.get("constants", {})
         self.llm = LLMClient(config)
+        self.reranker = create_reranker(config)
+        self.semantic_cache = get_semantic_cache(config)
+        self.chat_flight = get_single_flight(config, "chat")
+        # Per-session conversation memory (requests that carry a session_id)
+        self.sessions = get_session_store(config)
+        llm_config = config.get("llm_config", {})
+        self.include_history = llm_config.get("include_history", True)
+        self.history_length = llm_config.get("history_length", HISTORY_LENGTH)
+        self.keep_recent = config.get("sessions", {}).get("keep_recent", SESSION_DEFAULTS["keep_recent"])
+        # Answers depend on these settings as much as on the knowledge itself
+        self._settings_hash = text_hash(json.dumps(
+            {key: config.get(key) for key in ("knowledge", "llm_config")}, sort_keys=True, default=str))
 
         self.user_role = self.constants.get("user", USER)
         self.bot_role = self.constants.get("bot", BOT)
 
-    def respond(self, user_input: str) -> str:
+    def respond(self, user_input: str, session_id: Optional[str] = None) -> str:
         self.logger.info(f"Agent received input: {user_input}")
-        return self._handle_conversation(user_input)
-
-    def _handle_conversation(self, user_input: str) -> str:
-        knowledge = self._knowledge_setup(user_input)
-        context_window = self.llm.context_window
-        max_tokens = self.llm.max_tokens
-
-        # remaining_tokens = calculate_remaining_tokens(
-        #     user_input=user_input,
-        #     knowledge=knowledge,
-        #     context_window=context_window,
-        #     max_tokens=max_tokens,
-        #     user_role=self.user_role
-        # )
-
-        initial_response = self.llm.ask(
+        memory = self._session(session_id)
+        history = self._history_entries(memory)
+        if history:
+            # The answer depends on this conversation, so it is neither shared nor cached by question
+            response = self._handle_conversation(user_input, history)
+        elif not self.chat_flight:
+            response = self._respond(user_input)
+        else:
+            # Concurrent identical questions wait for the one already being answered
+            response = self.chat_flight.do((self._settings_hash, normalize_text(user_input)), self._respond,
+                                           user_input)
+        self._remember(memory, user_input, response)
+        return response
+
+    def _respond(self, user_input: str) -> str:
+        cached, cache_entry = self._semantic_lookup(user_input)
+        if cached is not None:
+            return cached
+
+        response = self._handle_conversation(user_input)
+        self._semantic_store(user_input, cache_entry, response)
+        return response
+
+    def respond_stream(self, user_input: str, session_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Streaming variant of `respond`: yields the answer in pieces as the LLM produces them.
+        """
+        self.logger.info(f"Agent received input (streaming): {user_input}")
+        memory = self._session(session_id)
+        history = self._history_entries(memory)
+        cached, cache_entry = self._semantic_lookup(user_input) if not history else (None, None)
+        if cached is not None:
+            self._remember(memory, user_input, cached)
+            yield cached
+            return
+
+        knowledge, chunks = self._knowledge_setup(user_input)
+        parts = []
+        for part in self.llm.ask_stream(user_input=user_input, knowledge=knowledge, knowledge_chunks=chunks,
+                                        history=history):
+            parts.append(part)
+            yield part
+        if not any(part.startswith(ERROR_PREFIXES) for part in parts):
+            self._semantic_store(user_input, cache_entry, "".join(parts).strip())
+            self._remember(memory, user_input, "".join(parts).strip())
+
+    def get_memories(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        Returns the messages remembered for a session (oldest first); empty for unknown sessions.
+        """
+        memory = self.sessions.get(session_id, create=False) if self.sessions else None
+        return memory.get_history() if memory is not None else []
+
+    def get_summary(self, session_id: str) -> Optional[str]:
+        """
+        Returns the summary of a session's compacted older turns, if there is one.
+        """
+        memory = self.sessions.get(session_id, create=False) if self.sessions else None
+        return memory.summary if memory is not None else None
+
+    def _session(self, session_id: Optional[str]) -> Optional[AgentMemory]:
+        if not session_id or not self.sessions or not self.include_history:
+            return None
+        return self.sessions.get(session_id)
+
+    def _remember(self, memory: Optional[AgentMemory], user_input: str, response: str):
+        if memory is not None and not is_error_response(response):
+            with memory.lock:
+                memory.add_message(self.user_role, user_input)
+                memory.add_message(self.bot_role, response)
+
+    def _history_entries(self, memory: Optional[AgentMemory]) -> List[str]:
+        """
+        Returns the session history for the prompt: the summary of older turns (if any), then recent messages.
+        """
+        if memory is None:
+            return []
+        with memory.lock:
+            self._compact(memory)
+            entries = [f"{message['role']}: {message['content']}" for message in memory.get_history()]
+            if memory.summary:
+                entries.insert(0, f"Summary of the earlier conversation: {memory.summary}")
+        return entries
+
+    def _compact(self, memory: AgentMemory):
+        """
+        Folds all but the `keep_recent` newest messages into the session summary once the history
+        outgrows `history_length` messages or its share of the prompt budget. Callers hold `memory.lock`.
+        """
+        messages = memory.get_history()
+        if len(messages) <= self.keep_recent:
+            return
+        lines = [f"{message['role']}: {message['content']}" for message in messages]
+        if len(messages) <= self.history_length:
+            if self.llm.prompt_budget is None:
+                return
+            budget = int(self.llm.prompt_budget * self.llm.history_token_share)
+            if sum(count_text_tokens(text, self.llm.model) for text in lines + [memory.summary or ""]) <= budget:
+                return
+
+        older = "\n".join(lines[:len(lines) - self.keep_recent])
+        try:
+            summary = self.llm.ask(
+                user_input=f"Earlier summary: {memory.summary}\n{older}" if memory.summary else older,
+                knowledge=SUMMARY_INSTRUCTIONS
+            )
+        except Exception as e:
+            summary = f"Error: {e}"
+        if is_error_response(summary):
+            self.logger.warning(f"Could not summarize the conversation, dropping older turns instead: {summary}")
+            summary = memory.summary
+        memory.compact(self.keep_recent, summary.strip() if summary else None)
+
+    def _semantic_lookup(self, user_input: str) -> Tuple[Optional[str], Optional[Tuple[np.ndarray, str]]]:
+        """
+        Returns a cached answer to a similar question (or None) and the (embedding, version)
+        to store the new answer under; the latter is None when the semantic cache is off or unavailable.
+        """
+        if not self.semantic_cache:
+            return None, None
+        try:
+            version = self._knowledge_version()
+            embedding = self._get_vector_store().embed([user_input])[0]
+        except Exception as e:
+            self.logger.error(f"Semantic cache unavailable, answering without it: {e}")
+            return None, None
+        return self.semantic_cache.lookup(embedding, version), (embedding, version)
+
+    def _semantic_store(self, user_input: str, cache_entry: Optional[Tuple[np.ndarray, str]], response: str):
+        if cache_entry is not None and not is_error_response(response):
+            self.semantic_cache.store(user_input, cache_entry[0], response, cache_entry[1])
+
+    def _get_vector_store(self) -> BaseVectorStore:
+        if self.vector_store is None:
+            self.vector_store = create_vector_store(self.config)
+        return self.vector_store
+
+    def _knowledge_version(self) -> str:
+        """
+        Identifies the knowledge answers are currently built from: the vector collection's revision
+        (or the knowledge file's mtime for the file source) plus the knowledge and LLM settings.
+        """
+        if self.config.get("knowledge", {}).get("source", "file") == "qdrant":
+            source = self._get_vector_store().knowledge_version()
+        else:
+            stat = os.stat(KNOWLEDGE_FILE) if os.path.exists(KNOWLEDGE_FILE) else None
+            source = f"file@{stat.st_mtime_ns}:{stat.st_size}" if stat else "file"
+        return f"{source}/{self._settings_hash}"
+
+    def _handle_conversation(self, user_input: str, history: Optional[List[str]] = None) -> str:
+        knowledge, chunks = self._knowledge_setup(user_input)
+        # LLMClient fits knowledge and history into context_window - max_tokens, dropping the lowest-ranked chunks first
+        return self.llm.ask(
             user_input=user_input,
-            knowledge=knowledge
+            knowledge=knowledge,
+            knowledge_chunks=chunks,
+            history=history
         )
 
-        return initial_response
-
-    def _knowledge_setup(self, user_input: str) -> str:
-        nl = "\n"
+    def _knowledge_setup(self, user_input: str) -> Tuple[str, List[str]]:
+        """
+        Returns the system text and the retrieved knowledge chunks (best-ranked first) for the question.
+        """
         base = "You are an AI Agent, called RAG_Chatbot. Give your best to respond given your knowledge."
 
         source = self.config.get("knowledge", {}).get("source", "file")
         threshold = self.config.get("knowledge", {}).get("threshold", 0.7)
         limit = self.config.get("knowledge", {}).get("limit", 3)
+        search_effort = self.config.get("knowledge", {}).get("search_effort")
+        search_mode = self.config.get("knowledge", {}).get("search_mode")
+        diversify = self.config.get("knowledge", {}).get("diversify")
+        candidates = max(limit, self.reranker.candidates) if self.reranker else limit
 
         if source == "qdrant":
             try:
-                if not hasattr(self, "vector_store"):
-                    self.vector_store = QdrantVectorStore(self.config)
-                results = self.vector_store.search_similar(user_input, threshold=threshold, limit=limit)
+                results = self._get_vector_store().search_similar(
+                    user_input, threshold=threshold, limit=candidates, search_effort=search_effort,
+                    search_mode=search_mode, diversify=diversify
+                )
+                if self.reranker:
+                    results = self.reranker.rerank(user_input, results, top_k=limit)
                 if results:
-                    chunks = "\n".join([f"- {r['text']}" for r in results])
-                    return f"{base}\nThis is what you know from database:\n{chunks}"
+                    return f"{base}\nThis is what you know from database:", [r["text"] for r in results]
                 else:
                     self.logger.warning("Qdrant returned no results. Falling back to file knowledge.")
             except Exception as e:
@@ -67,4 +247,4 @@ class AgentAI:
 
         # Fallback to JSON knowledge
         knowledge = json.dumps(knowledge_curr.get_knowledge(), indent=2)
-        return f"{base}\nThis is what you know:\n{knowledge}"
+        return f"{base}\nThis is what you know:\n{knowledge}", []
@@ -0,0 +1,301 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from helpers.logger import setup_logger
+from helpers.text_hash import text_hash
+from integrations.vectordb.base_vectorstore import BaseVectorStore
+from integrations.vectordb.vectorstore_factory import create_vector_store
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "chunk_workers": 2,
+    "embed_workers": 1,
+    "upsert_workers": 2,
+    "queue_size": 64,  # records buffered between two stages; a full queue blocks the stage before it
+    "embed_batch_chunks": 256,  # chunks from several records embedded in one call
+    "report_interval": 10.0,  # seconds between progress log lines
+    "checkpoint": "data/ingestion_checkpoint.jsonl"
+}
+
+STAGES = ("read", "chunk", "embed", "upsert")
+
+_STOP = object()  # end-of-stream marker, one per downstream worker
+
+
+class StageStats:
+    """
+    Thread-safe throughput counters for one pipeline stage.
+    """
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.chunks = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items: int = 1, chunks: int = 0, seconds: float = 0.0, errors: int = 0):
+        with self._lock:
+            self.items += items
+            self.chunks += chunks
+            self.errors += errors
+            self.busy_seconds += seconds
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "records": self.items,
+                "chunks": self.chunks,
+                "errors": self.errors,
+                "records_per_s": round(self.items / elapsed, 2) if elapsed else 0.0,
+                "chunks_per_s": round(self.chunks / elapsed, 2) if elapsed else 0.0,
+                # share of the stage's worker time spent working rather than waiting on queues
+                "utilisation": round(self.busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0
+            }
+
+
+class IngestionCheckpoint:
+    """
+    Append-only JSONL log of ingested records, keyed by document id and content hash.
+
+    A record is logged only after its chunks are upserted, so an interrupted run resumes
+    without re-inserting finished documents, and a changed document is ingested again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._done = set()
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._done.add(json.loads(line)["key"])
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # torn last line from an interrupted run
+            logger.info(f"Loaded ingestion checkpoint with {len(self._done)} record(s) from {path}.")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def key(record: Dict[str, Any]) -> str:
+        return f"{record['document_id']}:{text_hash(record['text'])}"
+
+    def is_done(self, key: str) -> bool:
+        return key in self._done
+
+    def mark_done(self, key: str, chunks: int):
+        with self._lock:
+            self._done.add(key)
+            self._file.write(json.dumps({"key": key, "chunks": chunks, "at": int(time.time())}) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class IngestionPipeline:
+    """
+    Streams records through chunk -> embed -> upsert stages running on their own worker threads.
+
+    Stages are connected by bounded queues, so a slow stage applies backpressure to the ones
+    before it instead of letting records pile up in memory. Chunking goes through
+    `TextChunkingService` (one instance per worker) and embedding/upserts through the configured
+    vector store, so ingested data is identical to what `/add-to-qdrant` produces.
+    """
+
+    def __init__(self, config: dict, vector_store: Optional[BaseVectorStore] = None,
+                 chunker_factory: Optional[Callable[[], Any]] = None, **overrides):
+        """
+        Args:
+            config (dict): App config; settings are read from `ingestion` and may be overridden by keyword.
+            vector_store (Optional[BaseVectorStore]): Store to write to; built from config when omitted.
+            chunker_factory (Optional[Callable]): Builds one chunker per chunk worker;
+                defaults to `TextChunkingService(config)`.
+        """
+        iconf = {**DEFAULTS, **config.get("ingestion", {}), **{k: v for k, v in overrides.items() if v is not None}}
+        self.chunk_workers = max(1, int(iconf["chunk_workers"]))
+        self.embed_workers = max(1, int(iconf["embed_workers"]))
+        self.upsert_workers = max(1, int(iconf["upsert_workers"]))
+        self.queue_size = max(1, int(iconf["queue_size"]))
+        self.embed_batch_chunks = max(1, int(iconf["embed_batch_chunks"]))
+        self.report_interval = float(iconf["report_interval"])
+        self.checkpoint_path = iconf["checkpoint"]
+
+        self.vector_store = vector_store or create_vector_store(config)
+        if chunker_factory is None:
+            from service.text_chunking import TextChunkingService
+            chunker_factory = lambda: TextChunkingService(config)  # noqa: E731
+        self._chunker_factory = chunker_factory
+
+    def run(self, records: Iterable[Dict[str, Any]], tags: Optional[List[str]] = None,
+            resume: bool = True) -> Dict[str, Any]:
+        """
+        Ingests `records` (dicts with `document_id`, `text` and optional `tags`) and blocks until done.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Source records, e.g. from `helpers.document_reader.iter_documents`.
+            tags (Optional[List[str]]): Tags added to every record.
+            resume (bool): Skip records already present in the checkpoint.
+
+        Returns:
+            Dict[str, Any]: Totals and per-stage throughput.
+        """
+        if not resume and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        checkpoint = IngestionCheckpoint(self.checkpoint_path)
+
+        chunk_q = queue.Queue(maxsize=self.queue_size)
+        embed_q = queue.Queue(maxsize=self.queue_size)
+        upsert_q = queue.Queue(maxsize=self.queue_size)
+        stats = {
+            "read": StageStats("read", 1),
+            "chunk": StageStats("chunk", self.chunk_workers),
+            "embed": StageStats("embed", self.embed_workers),
+            "upsert": StageStats("upsert", self.upsert_workers)
+        }
+        skipped = [0]
+        started = time.perf_counter()
+
+        def read():
+            try:
+                for record in records:
+                    key = IngestionCheckpoint.key(record)
+                    if resume and checkpoint.is_done(key):
+                        skipped[0] += 1
+                        continue
+                    record = {**record, "key": key, "tags": sorted(set(record.get("tags") or []) | set(tags or []))}
+                    chunk_q.put(record)  # blocks while the chunk stage is saturated
+                    stats["read"].record()
+            except Exception:
+                logger.exception("Reading input records failed; finishing the records already queued.")
+                stats["read"].record(items=0, errors=1)
+
+        def chunk():
+            chunker = self._chunker_factory()
+            while (record := chunk_q.get()) is not _STOP:
+                t0 = time.perf_counter()
+                try:
+                    record["chunks"] = chunker.chunk_text(record["text"], export=False)
+                except Exception:
+                    logger.exception(f"Chunking failed for document '{record['document_id']}'.")
+                    stats["chunk"].record(seconds=time.perf_counter() - t0, errors=1)
+                    continue
+                stats["chunk"].record(chunks=len(record["chunks"]), seconds=time.perf_counter() - t0)
+                embed_q.put(record)
+
+        def embed():
+            stopping = False
+            while not stopping:
+                batch = []
+                item = embed_q.get()
+                if item is _STOP:
+                    break
+                batch.append(item)
+                # Top up the batch with whatever is already queued, to embed across records in one call
+                while sum(len(r["chunks"]) for r in batch) < self.embed_batch_chunks:
+                    try:
+                        item = embed_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                t0 = time.perf_counter()
+                try:
+                    # Only chunks that are new or changed since the last ingestion need embedding
+                    pending = [self.vector_store.pending_chunks(r["document_id"], r["chunks"], r["tags"])
+                               for r in batch]
+                    texts = [c for chunks in pending for c in chunks]
+                    vectors = self.vector_store.embed(texts)
+                except Exception:
+                    logger.exception(f"Embedding failed for a batch of {len(batch)} record(s).")
+                    stats["embed"].record(items=len(batch), seconds=time.perf_counter() - t0, errors=len(batch))
+                    continue
+                stats["embed"].record(items=len(batch), chunks=len(texts), seconds=time.perf_counter() - t0)
+
+                offset = 0
+                for record, chunks in zip(batch, pending):
+                    record["embeddings"] = dict(zip(chunks, vectors[offset:offset + len(chunks)]))
+                    offset += len(chunks)
+                    upsert_q.put(record)
+
+        def upsert():
+            while (record := upsert_q.get()) is not _STOP:
+                t0 = time.perf_counter()
+                try:
+                    inserted = self.vector_store.insert_embedded(
+                        record["document_id"], record["chunks"], record["embeddings"], tags=record["tags"])
+                except Exception:
+                    logger.exception(f"Upsert failed for document '{record['document_id']}'.")
+                    stats["upsert"].record(seconds=time.perf_counter() - t0, errors=1)
+                    continue
+                checkpoint.mark_done(record["key"], inserted)
+                stats["upsert"].record(chunks=inserted, seconds=time.perf_counter() - t0)
+
+        stages = [
+            ([threading.Thread(target=read, name="ingest-read", daemon=True)], chunk_q, self.chunk_workers),
+            (self._threads(chunk, "chunk", self.chunk_workers), embed_q, self.embed_workers),
+            (self._threads(embed, "embed", self.embed_workers), upsert_q, self.upsert_workers),
+            (self._threads(upsert, "upsert", self.upsert_workers), None, 0)
+        ]
+        for threads, _, _ in stages:
+            for thread in threads:
+                thread.start()
+
+        reporter_stop = threading.Event()
+        reporter = threading.Thread(target=self._report, args=(stats, started, reporter_stop,
+                                                               (chunk_q, embed_q, upsert_q)), daemon=True)
+        reporter.start()
+
+        try:
+            # Once every worker of a stage has exited, tell each worker of the next stage to stop
+            for threads, next_q, next_workers in stages:
+                for thread in threads:
+                    thread.join()
+                for _ in range(next_workers):
+                    next_q.put(_STOP)
+        finally:
+            reporter_stop.set()
+            checkpoint.close()
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "documents": stats["upsert"].items,
+            "chunks": stats["upsert"].chunks,
+            "skipped": skipped[0],
+            "errors": sum(s.errors for s in stats.values()),
+            "elapsed_s": round(elapsed, 2),
+            "stages": {name: s.snapshot(elapsed) for name, s in stats.items()}
+        }
+        logger.info(f"Ingestion finished: {summary['documents']} document(s), {summary['chunks']} chunk(s), "
+                    f"{summary['skipped']} skipped, {summary['errors']} error(s) in {summary['elapsed_s']}s.")
+        return summary
+
+    @staticmethod
+    def _threads(target: Callable, stage: str, workers: int) -> List[threading.Thread]:
+        return [threading.Thread(target=target, name=f"ingest-{stage}-{i}", daemon=True) for i in range(workers)]
+
+    def _report(self, stats: Dict[str, StageStats], started: float, stop: threading.Event, queues: tuple):
+        while not stop.wait(self.report_interval):
+            elapsed = time.perf_counter() - started
+            parts = []
+            for name in STAGES:
+                snapshot = stats[name].snapshot(elapsed)
+                parts.append(f"{name}={snapshot['records']} ({snapshot['records_per_s']}/s)")
+            depths = "/".join(str(q.qsize()) for q in queues)
+            logger.info(f"Ingestion progress after {elapsed:.0f}s: {', '.join(parts)}; queue depths {depths}.")
@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from helpers.logger import setup_logger
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": False,
+    "path": "data/semantic_cache.sqlite",
+    "similarity_threshold": 0.92,  # cosine similarity a new question needs to reuse an answer
+    "ttl_seconds": 86400,
+    "max_entries": 5000  # least recently used answers are evicted beyond this count
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    version TEXT NOT NULL,
+    query TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_version ON answers (version);
+CREATE INDEX IF NOT EXISTS answers_last_access ON answers (last_access);
+"""
+
+
+class SemanticResponseCache:
+    """
+    Persistent cache of chat answers, looked up by the cosine similarity of question embeddings.
+
+    Every answer is stored with the knowledge version it was generated from; only answers of
+    the current version are candidates, so ingesting new documents (or editing the knowledge
+    file) retires every older answer. Embeddings of the current version are kept in RAM as
+    one unit-normalised matrix, so a lookup is a single matrix-vector product.
+    """
+
+    def __init__(self, path: str, similarity_threshold: float, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        # In-RAM view of the answers for `_version`: row ids, unit embeddings and their creation times
+        self._version: Optional[str] = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix: Optional[np.ndarray] = None
+        self._created = np.empty(0, dtype=np.float64)
+        self._next_check = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def lookup(self, embedding: np.ndarray, version: str) -> Optional[str]:
+        """
+        Returns the answer to the most similar cached question of `version`, or None.
+
+        Args:
+            embedding (np.ndarray): Embedding of the new question.
+            version (str): Current knowledge version.
+
+        Returns:
+            Optional[str]: The cached answer if one is similar enough and not expired.
+        """
+        query = self._unit(embedding)
+        now = time.time()
+        with self._lock:
+            self._sync(version, now)
+            if self._matrix is None or len(self._ids) == 0:
+                self.misses += 1
+                return None
+
+            similarity = self._matrix @ query
+            similarity[now - self._created > self.ttl_seconds] = -np.inf
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            row = self._conn.execute("SELECT answer FROM answers WHERE id = ?", (int(self._ids[best]),)).fetchone()
+            if row is None:  # evicted by another process
+                self._next_check = 0.0
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE answers SET last_access = ?, hits = hits + 1 WHERE id = ?",
+                                   (now, int(self._ids[best])))
+            self.hits += 1
+            logger.info(f"Semantic cache hit (similarity {float(similarity[best]):.3f}).")
+            return row[0]
+
+    def store(self, query: str, embedding: np.ndarray, answer: str, version: str):
+        """
+        Saves an answer for `query` under `version`, evicting expired and least recently used answers.
+        """
+        vector = self._unit(embedding)
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO answers (version, query, embedding, answer, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (version, query, vector.tobytes(), answer, now, now)
+            )
+            self.stores += 1
+            if self._version == version:
+                self._ids = np.append(self._ids, cursor.lastrowid)
+                self._matrix = vector[None, :] if self._matrix is None else np.vstack([self._matrix, vector])
+                self._created = np.append(self._created, now)
+            if self._evict(now, version):
+                self._version = None  # reload the surviving rows on the next lookup
+
+    def _sync(self, version: str, now: float):
+        """
+        Loads the answers of `version` into RAM when the version changes, and periodically so
+        that answers stored by other workers become visible.
+        """
+        if version == self._version and now < self._next_check:
+            return
+        rows = self._conn.execute(
+            "SELECT id, embedding, created_at FROM answers WHERE version = ? AND created_at >= ?",
+            (version, now - self.ttl_seconds)
+        ).fetchall()
+        self._version = version
+        self._next_check = now + 5.0
+        self._ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._created = np.array([row[2] for row in rows], dtype=np.float64)
+        self._matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+
+    def _evict(self, now: float, version: str) -> int:
+        """
+        Drops expired answers and answers of other versions; beyond `max_entries`, the least recently
+        used tenth is dropped in one go so eviction (and the RAM reload it causes) stays infrequent.
+        """
+        evicted = self._conn.execute(
+            "DELETE FROM answers WHERE created_at < ? OR version != ?", (now - self.ttl_seconds, version)
+        ).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        if count > self.max_entries:
+            evicted += self._conn.execute(
+                "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_access LIMIT ?)",
+                (count - int(self.max_entries * 0.9),)
+            ).rowcount
+        self.evictions += evicted
+        return evicted
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries
+        }
+
+
+_semantic_caches: Dict[str, SemanticResponseCache] = {}
+_semantic_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(config: Optional[dict]) -> Optional[SemanticResponseCache]:
+    """
+    Returns the process-wide semantic response cache for the configured path, or None when it is disabled.
+    """
+    cconf = (config or {}).get("semantic_cache", {})
+    if not cconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    path = cconf.get("path", DEFAULTS["path"])
+    with _semantic_caches_lock:
+        if path not in _semantic_caches:
+            _semantic_caches[path] = SemanticResponseCache(
+                path,
+                similarity_threshold=cconf.get("similarity_threshold", DEFAULTS["similarity_threshold"]),
+                ttl_seconds=cconf.get("ttl_seconds", DEFAULTS["ttl_seconds"]),
+                max_entries=cconf.get("max_entries", DEFAULTS["max_entries"])
+            )
+            logger.info(f"Semantic response cache opened at {path}.")
+        return _semantic_caches[path]
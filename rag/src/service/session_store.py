@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from helpers.logger import setup_logger
+from integrations.llm.memory import AgentMemory
+
+logger = setup_logger("app")
+
+# Default configuration values
+DEFAULTS = {
+    "enabled": True,
+    "path": "data/sessions.sqlite",
+    "max_sessions": 1000,  # sessions kept in memory; the least recently used are spilled to disk beyond this
+    "max_messages": 100,  # messages kept per session (older ones are summarized or dropped)
+    "ttl_seconds": 604800,  # spilled sessions untouched for this long are deleted
+    "keep_recent": 4  # messages kept verbatim when older turns are compacted into the summary
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+"""
+
+
+class SessionStore:
+    """
+    Conversation memories keyed by session ID, with a bounded number of live sessions.
+
+    Up to `max_sessions` `AgentMemory` objects stay in RAM in LRU order; the least recently
+    used one is spilled to a SQLite table when a new session would exceed the cap, and is
+    read back transparently the next time its session ID shows up. Spilled sessions not
+    used for `ttl_seconds` are deleted.
+    """
+
+    def __init__(self, path: str, max_sessions: int = DEFAULTS["max_sessions"],
+                 max_messages: int = DEFAULTS["max_messages"], ttl_seconds: float = DEFAULTS["ttl_seconds"]):
+        self.path = path
+        self.max_sessions = max(1, max_sessions)
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._live: "OrderedDict[str, AgentMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.spilled = 0
+        self.restored = 0
+
+    def get(self, session_id: str, create: bool = True) -> Optional[AgentMemory]:
+        """
+        Returns the memory of a session, restoring it from disk or creating it as needed.
+
+        Args:
+            session_id (str): Client-chosen session identifier.
+            create (bool): Create an empty memory for unknown sessions (otherwise return None).
+
+        Returns:
+            Optional[AgentMemory]: The session's memory.
+        """
+        with self._lock:
+            memory = self._live.get(session_id)
+            if memory is not None:
+                self._live.move_to_end(session_id)
+                return memory
+
+            memory = self._restore(session_id)
+            if memory is None:
+                if not create:
+                    return None
+                memory = AgentMemory(max_size=self.max_messages)
+                self.created += 1
+
+            self._live[session_id] = memory
+            while len(self._live) > self.max_sessions:
+                evicted_id, evicted = self._live.popitem(last=False)
+                self._spill(evicted_id, evicted)
+            return memory
+
+    def _restore(self, session_id: str) -> Optional[AgentMemory]:
+        row = self._conn.execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self.restored += 1
+        return AgentMemory.load(json.loads(row[0]))
+
+    def _spill(self, session_id: str, memory: AgentMemory):
+        now = time.time()
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                               (session_id, json.dumps(memory.dump()), now))
+            self.spilled += 1
+            if self.spilled % 100 == 0:
+                self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    def flush(self):
+        """
+        Spills every live session to disk (e.g. at shutdown); they are restored on their next request.
+        """
+        with self._lock:
+            while self._live:
+                session_id, memory = self._live.popitem(last=False)
+                self._spill(session_id, memory)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            on_disk = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {
+                "live": len(self._live),
+                "max_sessions": self.max_sessions,
+                "on_disk": on_disk,
+                "created": self.created,
+                "spilled": self.spilled,
+                "restored": self.restored
+            }
+
+
+_session_stores: Dict[str, SessionStore] = {}
+_session_stores_lock = threading.Lock()
+
+
+def get_session_store(config: Optional[dict]) -> Optional[SessionStore]:
+    """
+    Returns the process-wide session store for the configured path, or None when sessions are disabled.
+    """
+    sconf = (config or {}).get("sessions", {})
+    if not sconf.get("enabled", DEFAULTS["enabled"]):
+        return None
+
+    path = sconf.get("path", DEFAULTS["path"])
+    with _session_stores_lock:
+        if path not in _session_stores:
+            _session_stores[path] = SessionStore(
+                path,
+                max_sessions=sconf.get("max_sessions", DEFAULTS["max_sessions"]),
+                max_messages=sconf.get("max_messages", DEFAULTS["max_messages"]),
+                ttl_seconds=sconf.get("ttl_seconds", DEFAULTS["ttl_seconds"])
+            )
+            logger.info(f"Session store opened at {path}.")
+        return _session_stores[path]
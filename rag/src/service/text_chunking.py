@@ -8,6 +8,8 @@ from llama_index.embeddings.openai import OpenAIEmbedding
 
 from helpers.chunk_exporter import export_chunks_to_json
 from helpers.logger import setup_logger
+from integrations.embeddings.cached_embedding import CachedEmbedding
+from integrations.embeddings.embedding_cache import get_embedding_cache
 
 logger = setup_logger("app")
 
@@ -23,6 +25,7 @@ DEFAULT_SEMANTIC_THRESHOLD = 70  # in percent
 
 class TextChunkingService:
     def __init__(self, config: dict):
+        self.config = config
         chunk_conf = config.get("chunking", {})
 
         self.enable_variable = chunk_conf.get("enable_variable", DEFAULT_ENABLE_VARIABLE)
@@ -38,10 +41,14 @@ class TextChunkingService:
         self._semantic_model: Optional[HuggingFaceEmbedding] = None
         self._stanza_nlp: Optional[stanza.Pipeline] = None
 
-    def chunk_text(self, text: str) -> List[str]:
+    def chunk_text(self, text: str, export: bool = True) -> List[str]:
         """
         Orchestrates both variable and semantic chunking based on config.
         Returns a de-duplicated list of text chunks.
+
+        Args:
+            text (str): The text to chunk.
+            export (bool): Write the chunks to `resources/chunking` (disabled for bulk ingestion).
         """
         logger.info("Starting text chunking...")
         chunks: List[str] = []
@@ -62,9 +69,11 @@ class TextChunkingService:
 
         # Remove duplicates while preserving order
         unique_chunks = list(dict.fromkeys(chunks))
-        export_path = export_chunks_to_json(text, unique_chunks, semantic_embed_model=self.semantic_model_name)
-
-        logger.info(f"Chunking completed. Exported {len(unique_chunks)} chunk(s) to {export_path}.")
+        if export:
+            export_path = export_chunks_to_json(text, unique_chunks, semantic_embed_model=self.semantic_model_name)
+            logger.info(f"Chunking completed. Exported {len(unique_chunks)} chunk(s) to {export_path}.")
+        else:
+            logger.info(f"Chunking completed. Produced {len(unique_chunks)} chunk(s).")
 
         if not unique_chunks:
             logger.warning("No chunks were generated from the input text.")
@@ -75,10 +84,13 @@ class TextChunkingService:
         if "openai" in self.semantic_model_name.lower():
             model_id = self.semantic_model_name.replace("openai/", "", 1)
             logger.info(f"Using OpenAIEmbedding model: {model_id}")
-            return OpenAIEmbedding(model=model_id)
+            model = OpenAIEmbedding(model=model_id)
         else:
             logger.info(f"Using HuggingFaceEmbedding model: {self.semantic_model_name}")
-            return HuggingFaceEmbedding(model_name=self.semantic_model_name)
+            model = HuggingFaceEmbedding(model_name=self.semantic_model_name)
+
+        cache = get_embedding_cache(self.config, self.semantic_model_name)
+        return CachedEmbedding(model, cache) if cache else model
 
     def _variable_chunking(self, text: str) -> List[str]:
         """
@@ -26,3 +26,63 @@ function callPost() {
             document.getElementById("responseBox").textContent = "Error: " + error;
         });
 }
+
+// One conversation per page load; the server keeps its history under this ID
+const chatSessionId = crypto.randomUUID();
+
+async function streamChat() {
+    const input = document.getElementById("chatInput");
+    const button = document.getElementById("chatButton");
+    const box = document.getElementById("chatBox");
+    const message = input.value.trim();
+    if (!message) return;
+
+    box.textContent = "";
+    button.disabled = true;
+    try {
+        const response = await fetch("/chat/stream", {
+            method: "POST", headers: {"Content-Type": "application/json"},
+            body: JSON.stringify({message, session_id: chatSessionId})
+        });
+        if (!response.ok) {
+            const error = await response.json();
+            box.textContent = "Error: " + (error.detail || response.statusText);
+            return;
+        }
+
+        // Server-Sent Events over a POST body: events are separated by a blank line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const {value, done} = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, {stream: true});
+
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const event = parseEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+                if (event.type === "error") {
+                    box.textContent += "\nError: " + event.data.detail;
+                } else if (event.type === "message") {
+                    box.textContent += event.data.token;
+                }
+            }
+        }
+    } catch (error) {
+        box.textContent += "\nError: " + error;
+    } finally {
+        button.disabled = false;
+    }
+}
+
+function parseEvent(raw) {
+    let type = "message";
+    let data = "";
+    for (const line of raw.split("\n")) {
+        if (line.startsWith("event:")) type = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+    }
+    return {type, data: data ? JSON.parse(data) : {}};
+}
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from integrations.llm.admission import AdmissionController, AdmissionRejected, ProviderLimiter
+
+
+def hold_slots(limiter: ProviderLimiter, count: int, release: threading.Event):
+    """Starts `count` threads that take a slot (or queue for one) and keep it until `release` is set."""
+    def hold():
+        try:
+            with limiter.slot():
+                release.wait(5)
+        except AdmissionRejected:
+            pass
+
+    threads = [threading.Thread(target=hold) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def wait_for(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+
+def test_full_queue_rejects_with_429():
+    limiter = ProviderLimiter("ollama", max_concurrency=1, max_queue=2, queue_timeout=5)
+    release = threading.Event()
+    threads = hold_slots(limiter, 3, release)
+    wait_for(lambda: limiter.stats()["active"] == 1 and limiter.stats()["queued"] == 2)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        with limiter.slot():
+            pass
+    assert rejected.value.status_code == 429
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert limiter.stats()["admitted"] == 3
+
+
+def test_queue_timeout_rejects_with_503():
+    limiter = ProviderLimiter("ollama", max_concurrency=1, max_queue=4, queue_timeout=0.1)
+    release = threading.Event()
+    threads = hold_slots(limiter, 1, release)
+    wait_for(lambda: limiter.stats()["active"] == 1)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        with limiter.slot():
+            pass
+    assert rejected.value.status_code == 503
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_unlimited_provider_never_waits():
+    limiter = ProviderLimiter("openai", max_concurrency=0)
+    with limiter.slot(), limiter.slot():
+        pass
+
+
+def test_capacity_counts_only_limited_providers():
+    admission = AdmissionController({
+        "max_concurrency": 0,
+        "max_queue": 32,
+        "providers": {"ollama": {"max_concurrency": 2, "max_queue": 16}, "llamacpp": {"max_concurrency": 1}}
+    })
+    assert admission.capacity(["openai", "ollama", "ollama"]) == 18
+    assert admission.capacity(["ollama", "llamacpp"]) == 18 + 33
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+
+for module in ("sentence_transformers", "stanza", "llama_index.core"):
+    pytest.importorskip(module)  # imported by the vector store and the chunker the routes are built from
+
+import integrations.llm.admission as admission  # noqa: E402
+import integrations.llm.llm_interface as llm_interface  # noqa: E402
+from api.fastapi_routes import create_fastapi_app  # noqa: E402
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    """A provider stream that yields a token every 50 ms and records when it was closed."""
+    state = {"closed": threading.Event(), "tokens": 0}
+
+    def slow_stream(prompt, model):
+        try:
+            for i in range(40):
+                time.sleep(0.05)
+                state["tokens"] += 1
+                yield f"token{i} "
+        finally:
+            state["closed"].set()
+
+    monkeypatch.setattr(llm_interface, "ollama_stream", slow_stream)
+    return state
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, stream):
+    monkeypatch.setattr(admission, "_controller", None)  # process-wide: rebuild it from this config
+    monkeypatch.chdir(SRC_DIR)  # templates/ and static/ are mounted relative to the working directory
+    return create_fastapi_app({
+        "llm_config": {
+            "provider": "ollama", "model": "llama3", "context_window": 8192, "max_tokens": 512,
+            "admission": {"providers": {"ollama": {"max_concurrency": 1, "max_queue": 0}}}
+        },
+        "vectordb": {
+            "backend": "local",
+            "qdrant": {"provider": "sentence-transformers", "vector_size": 16},
+            "local": {"path": str(tmp_path / "vectordb")},
+            "manifest": {"path": str(tmp_path / "manifest.sqlite")},
+            "sparse": {"path": str(tmp_path / "sparse")}
+        },
+        "embedding_cache": {"enabled": False},
+        "semantic_cache": {"enabled": False},
+        "sessions": {"path": str(tmp_path / "sessions.sqlite")}
+    })
+
+
+async def post_stream(app, body, leave_after: int = None):
+    """
+    Drives `POST /chat/stream` through the ASGI interface; with `leave_after`, the client disconnects
+    once it has received that many events. Returns the status code and the events received.
+    """
+    received, status = [], {}
+    disconnected, request_sent = asyncio.Event(), False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+        elif message.get("body"):
+            received.append(message["body"].decode())
+            if leave_after is not None and len(received) >= leave_after:
+                disconnected.set()
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/chat/stream", "raw_path": b"/chat/stream", "query_string": b"",
+             "root_path": "", "headers": [(b"content-type", b"application/json")],
+             "client": ("testclient", 50000), "server": ("testserver", 80)}
+    await asyncio.wait_for(app(scope, receive, send), 10)
+    return status.get("code"), received
+
+
+def ollama_limiter():
+    return admission.get_admission_controller({}).limiter("ollama")
+
+
+def test_disconnect_mid_stream_releases_the_admission_slot(app, stream):
+    status, events = asyncio.run(post_stream(app, {"message": "tell me a story", "session_id": "s1"},
+                                             leave_after=3))
+    assert status == 200 and len(events) >= 3
+
+    assert stream["closed"].wait(2), "the provider stream was never closed"
+    assert stream["tokens"] < 40  # the answer was abandoned, not read to the end
+    assert ollama_limiter().stats()["active"] == 0
+
+    # The single slot is free again: the next stream is admitted instead of getting a 429
+    status, events = asyncio.run(post_stream(app, {"message": "another story"}))
+    assert status == 200 and events[-1].startswith("event: done")
+
+
+def test_saturated_provider_answers_429_before_streaming(app, stream):
+    async def main():
+        first = asyncio.create_task(post_stream(app, {"message": "tell me a story"}, leave_after=10))
+        await asyncio.sleep(0.2)  # the first stream holds the only slot for about half a second
+        second = await post_stream(app, {"message": "another story"})
+        await first
+        return second
+
+    status, _ = asyncio.run(main())
+    assert status == 429
+    assert ollama_limiter().stats()["active"] == 0
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+import time
+
+from helpers.executor import configure_executor, configure_llm_executor, run_in_executor, run_in_llm_executor
+from integrations.llm.admission import AdmissionController, AdmissionRejected
+
+
+def test_saturated_provider_rejects_without_starving_shared_pool():
+    config = {"executor": {"max_workers": 2, "max_pending": 8}}
+    admission = AdmissionController({"providers": {"ollama": {"max_concurrency": 1, "max_queue": 3}}})
+    shared = configure_executor(config)
+    llm = configure_llm_executor(config, admission.capacity(["ollama"]))
+    release = threading.Event()
+
+    def answer():
+        with admission.slot("ollama"):
+            release.wait(5)
+        return "ok"
+
+    async def chat():
+        try:
+            return await run_in_llm_executor(answer)
+        except AdmissionRejected as e:
+            return e.status_code
+
+    async def main():
+        chats = [asyncio.create_task(chat()) for _ in range(10)]
+        await asyncio.sleep(0.2)
+        started = time.monotonic()
+        await run_in_executor(lambda: None)  # e.g. /chunk, while every admission slot and queue entry is taken
+        chunk_wait = time.monotonic() - started
+        release.set()
+        return chunk_wait, await asyncio.gather(*chats)
+
+    try:
+        chunk_wait, results = asyncio.run(main())
+    finally:
+        shared.shutdown(wait=False)
+        llm.shutdown(wait=False)
+
+    assert chunk_wait < 1
+    assert results.count("ok") == 4
+    assert results.count(429) == 6
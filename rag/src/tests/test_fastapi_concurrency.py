@@ -0,0 +1,73 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+for module in ("sentence_transformers", "stanza", "llama_index.core"):
+    pytest.importorskip(module)  # imported by the vector store and the chunker the routes are built from
+
+import httpx  # noqa: E402
+
+import integrations.llm.llm_interface as llm_interface  # noqa: E402
+from api.fastapi_routes import create_fastapi_app  # noqa: E402
+from integrations.vectordb.base_vectorstore import BaseVectorStore  # noqa: E402
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LATENCY = 0.3  # seconds each stubbed provider call takes
+CLIENTS = 8
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    def slow_answer(prompt, *args):
+        time.sleep(LATENCY)
+        return "stub answer"
+
+    def slow_embeddings(self, texts):
+        time.sleep(LATENCY)
+        return np.ones((len(texts), 16), dtype=np.float32)
+
+    monkeypatch.setattr(llm_interface, "openai_call", slow_answer)
+    monkeypatch.setattr(BaseVectorStore, "_compute_embeddings", slow_embeddings)
+    monkeypatch.chdir(SRC_DIR)  # templates/ and static/ are mounted relative to the working directory
+    return create_fastapi_app({
+        "executor": {"max_workers": CLIENTS},
+        "llm_config": {"provider": "openai", "model": "gpt-4o", "context_window": 8192, "max_tokens": 512},
+        "vectordb": {
+            "backend": "local",
+            "qdrant": {"provider": "sentence-transformers", "vector_size": 16},
+            "local": {"path": str(tmp_path / "vectordb")},
+            "manifest": {"path": str(tmp_path / "manifest.sqlite")},
+            "sparse": {"path": str(tmp_path / "sparse")}
+        },
+        "embedding_cache": {"enabled": False},
+        "semantic_cache": {"enabled": False},
+        "sessions": {"enabled": False}
+    })
+
+
+def parallel_wall_time(app, route: str, bodies) -> float:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            started = time.monotonic()
+            responses = await asyncio.gather(*(client.post(route, json=body) for body in bodies))
+            elapsed = time.monotonic() - started
+        assert [response.status_code for response in responses] == [200] * len(bodies)
+        return elapsed
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("route, body", [
+    ("/chat", lambda i: {"message": f"question number {i}"}),
+    ("/search-qdrant", lambda i: {"text": f"query number {i}", "threshold": 0}),
+], ids=["chat", "search"])
+def test_parallel_clients_are_served_concurrently(app, route, body):
+    # Distinct payloads, so single-flight and the caches cannot merge the requests into one
+    elapsed = parallel_wall_time(app, route, [body(i) for i in range(CLIENTS)])
+
+    # Serving the requests one after another would take CLIENTS * LATENCY
+    assert elapsed < 3 * LATENCY, f"{CLIENTS} parallel requests took {elapsed:.2f}s"
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from integrations.vectordb.local.ivf_index import IVFIndex
+
+DIM = 32
+K = 10
+
+
+def clustered(rows: int, seed: int):
+    """Unit vectors around a few dozen topics, like chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(40, DIM))
+    vectors = centers[rng.integers(0, len(centers), rows)] + 0.5 * rng.normal(size=(rows, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def top_k(vectors, query, rows):
+    return set(rows[np.argsort(-(vectors[rows] @ query))[:K]])
+
+
+def recall(index, vectors, queries, nprobe=None):
+    everything = np.arange(len(vectors))
+    hits = [len(top_k(vectors, query, index.candidate_rows(query, nprobe)) & top_k(vectors, query, everything))
+            for query in queries]
+    return sum(hits) / (K * len(queries))
+
+
+@pytest.fixture
+def data():
+    return clustered(4000, seed=0), clustered(50, seed=1)
+
+
+@pytest.fixture
+def index(tmp_path, data):
+    index = IVFIndex(str(tmp_path), DIM, "COSINE", {"nlist": 32, "nprobe": 8, "sample_size": 2000})
+    index.train(data[0])
+    return index
+
+
+def test_recall_and_scanned_rows(index, data):
+    vectors, queries = data
+    assert recall(index, vectors, queries) >= 0.9
+    assert np.mean([len(index.candidate_rows(query)) for query in queries]) < 0.5 * len(vectors)
+
+
+def test_more_probes_never_lower_recall(index, data):
+    vectors, queries = data
+    recalls = [recall(index, vectors, queries, nprobe) for nprobe in (1, 4, 32)]
+    assert recalls == sorted(recalls) and recalls[-1] == 1.0
+
+
+def test_index_survives_reload(tmp_path, index, data):
+    vectors, queries = data
+    reloaded = IVFIndex(str(tmp_path), DIM, "COSINE", {"nlist": 32, "nprobe": 8})
+    reloaded.load(len(vectors), vectors)
+
+    assert reloaded.trained and reloaded.nlist == 32
+    for query in queries[:10]:
+        assert np.array_equal(reloaded.candidate_rows(query), index.candidate_rows(query))
+
+
+def test_rows_added_after_training_are_found_after_reload(tmp_path, data):
+    vectors, queries = data
+    index = IVFIndex(str(tmp_path), DIM, "COSINE", {"nlist": 32, "nprobe": 8, "sample_size": 2000})
+    index.train(vectors[:3000])
+    other = IVFIndex(str(tmp_path), DIM, "COSINE", {"nlist": 32, "nprobe": 8})
+    other.load(3000, vectors)
+
+    index.add(vectors[3000:3500])  # persisted on insert
+    other.refresh(3500, vectors)  # picks up the assignments another process appended
+    for query in queries[:10]:
+        assert np.array_equal(other.candidate_rows(query), index.candidate_rows(query))
+
+    reloaded = IVFIndex(str(tmp_path), DIM, "COSINE", {"nlist": 32, "nprobe": 8})
+    reloaded.load(len(vectors), vectors)  # rows appended without an assignment are assigned on load
+    assert recall(reloaded, vectors, queries) >= 0.9
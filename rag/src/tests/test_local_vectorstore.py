@@ -0,0 +1,124 @@
+import multiprocessing
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")  # imported by base_vectorstore for the default embedding provider
+
+from integrations.vectordb.base_vectorstore import BaseVectorStore  # noqa: E402
+from integrations.vectordb.local.local_vectorstore import LocalVectorStore  # noqa: E402
+
+DIM = 32
+
+
+def fake_embeddings(self, texts):
+    """Hashed bag-of-words vectors: deterministic, and texts sharing words score higher."""
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[row, zlib.crc32(word.encode()) % DIM] += 1.0
+    return vectors
+
+
+@pytest.fixture(autouse=True)
+def no_model(monkeypatch):
+    monkeypatch.setattr(BaseVectorStore, "_compute_embeddings", fake_embeddings)
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {
+        "vectordb": {
+            "backend": "local",
+            "qdrant": {"provider": "sentence-transformers", "vector_size": DIM},
+            "local": {"path": str(tmp_path / "vectordb")},
+            "manifest": {"path": str(tmp_path / "manifest.sqlite")},
+            "sparse": {"path": str(tmp_path / "sparse")}
+        },
+        "embedding_cache": {"enabled": False}
+    }
+
+
+def document_ids(matches):
+    return [match["document_id"] for match in matches]
+
+
+def test_store_sees_its_own_inserts(config):
+    store = LocalVectorStore(config)
+    assert store.search_similar("orange harvest", threshold=-1) == []  # also fills the search cache
+
+    store.insert_chunks("fruit", ["orange harvest starts in november"])
+    assert document_ids(store.search_similar("orange harvest", threshold=-1)) == ["fruit"]
+
+
+def test_rows_survive_reopening(config):
+    LocalVectorStore(config).insert_chunks("fruit", ["orange harvest starts in november", "apples ripen in autumn"])
+
+    reopened = LocalVectorStore(config)
+    assert reopened.stats()["rows"] == 2
+    assert document_ids(reopened.search_similar("apples ripen", threshold=-1, limit=1)) == ["fruit"]
+
+
+def test_second_store_sees_other_writes(config):
+    reader = LocalVectorStore(config)
+    assert reader.search_similar("quarterly report", threshold=-1) == []
+
+    writer = LocalVectorStore(config)
+    writer.insert_chunks("report", ["the quarterly report is due friday"])
+
+    assert document_ids(reader.search_similar("quarterly report", threshold=-1)) == ["report"]
+    assert reader.stats()["rows"] == 1
+
+
+def write_documents(config, name, count):
+    """Runs in a separate process, the way ingest.py runs next to the server."""
+    BaseVectorStore._compute_embeddings = fake_embeddings
+    store = LocalVectorStore(config)
+    for i in range(count):
+        store.insert_chunks(f"{name}-{i}", [f"document {name} number {i}"])
+
+
+def test_concurrent_writer_processes(config):
+    reader = LocalVectorStore(config)
+    context = multiprocessing.get_context("spawn")
+    writers = [context.Process(target=write_documents, args=(config, name, 10)) for name in ("a", "b")]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(60)
+        assert writer.exitcode == 0
+
+    matches = reader.search_similar("document", threshold=-1, limit=50, search_mode="sparse")
+    assert sorted(document_ids(matches)) == sorted(f"{name}-{i}" for name in ("a", "b") for i in range(10))
+    assert reader.stats()["rows"] == 20
+
+
+@pytest.mark.parametrize("search_mode", ["sparse", "hybrid"])
+def test_search_after_reingestion(config, search_mode):
+    store = LocalVectorStore(config)
+    store.insert_chunks("guide", ["reset the router with pin ERR-1042", "call support afterwards"])
+    store.insert_chunks("guide", ["reset the router with pin ERR-2077", "call support afterwards"])
+
+    hits = store.search_similar("ERR-2077", threshold=-1, limit=3, search_mode=search_mode)
+    assert hits and "ERR-2077" in hits[0]["text"]
+    old = store.search_similar("ERR-1042", threshold=-1, limit=3, search_mode="sparse")
+    assert all("ERR-1042" not in match["text"] for match in old)  # the replaced chunk is gone
+    assert store.stats()["rows"] - store.stats()["deleted_rows"] == 2
+
+
+def test_unchanged_reingestion_upserts_nothing(config):
+    store = LocalVectorStore(config)
+    assert store.insert_chunks("guide", ["first step", "second step"]) == 2
+    assert store.insert_chunks("guide", ["first step", "second step"]) == 0
+    assert store.insert_chunks("guide", ["first step", "second step", "third step"]) == 1
+
+
+def test_whitespace_variants_are_one_chunk(config):
+    store = LocalVectorStore(config)
+    assert store.insert_chunks("d1", ["alpha beta", "alpha  beta", "gamma"]) == 2
+
+    hits = store.search_similar("alpha beta", threshold=-1, limit=5)
+    assert [match["text"] for match in hits].count("alpha beta") == 1
+    assert all(match["text"] != "alpha  beta" for match in hits)
+    assert store.stats()["rows"] == 2
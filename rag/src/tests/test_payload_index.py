@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from integrations.vectordb.filters import normalize_filters
+from integrations.vectordb.local.payload_index import PayloadIndex
+
+PAYLOADS = [
+    {"id": "p0", "document_id": "manual", "tags": ["hr"], "ingested_at": 100},
+    {"id": "p1", "document_id": "manual", "tags": ["it", "hr"], "ingested_at": 200},
+    {"id": "p2", "document_id": "faq", "tags": ["it"], "ingested_at": 300},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "payloads.jsonl"
+    path.write_text("".join(json.dumps(payload) + "\n" for payload in PAYLOADS[:2]))
+    index = PayloadIndex(str(path))
+    index.rows(normalize_filters({"tags": "hr"}), 2)  # builds the index from the file
+    index.add(2, PAYLOADS[2:])  # then maintained on insert
+    return index
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"document_id": "manual"}, [0, 1]),
+    ({"tags": ["it"]}, [1, 2]),
+    ({"document_id": "manual", "tags": "it"}, [1]),
+    ({"ingested_after": 150}, [1, 2]),
+    ({"tags": "hr", "ingested_before": 150}, [0]),
+    ({"document_id": "missing"}, []),
+])
+def test_rows_match_filters(index, filters, expected):
+    assert index.rows(normalize_filters(filters), 3).tolist() == expected
+
+
+def test_no_filter_selects_everything(index):
+    assert index.rows(normalize_filters({"tags": []}), 3) is None
+
+
+def test_id_rows_include_every_upsert_of_an_id(index):
+    index.add(3, [{**PAYLOADS[0], "ingested_at": 400}])
+    assert index.id_rows(["p0"], 4).tolist() == [0, 3]
+
+
+def test_unknown_filter_keys_are_rejected():
+    with pytest.raises(ValueError):
+        normalize_filters({"author": "someone"})
@@ -0,0 +1,58 @@
+import pytest
+
+from helpers.token_utils import count_message_tokens
+from integrations.llm.prompt_builder import build_prompt
+
+CHUNKS = [f"chunk {rank} " + "fact " * 40 for rank in range(6)]  # best-ranked first
+HISTORY = [f"user: turn {turn} " + "words " * 20 for turn in range(8)]  # oldest first
+
+
+def knowledge_lines(prompt):
+    return [line for line in prompt[0]["content"].split("\n") if line.startswith("- ")]
+
+
+def test_no_budget_keeps_everything():
+    prompt = build_prompt("question?", "You are a bot.", HISTORY, knowledge_chunks=CHUNKS)
+    assert len(knowledge_lines(prompt)) == len(CHUNKS)
+    assert prompt[-1] == {"role": "user", "content": "question?"}
+
+
+@pytest.mark.parametrize("budget", [150, 300, 600])
+def test_prompt_fits_budget_dropping_lowest_ranked_chunks_and_oldest_history(budget):
+    prompt = build_prompt("question?", "You are a bot.", HISTORY, knowledge_chunks=CHUNKS, token_budget=budget,
+                          model="gpt-4o", min_chunk_tokens=10_000)
+
+    assert count_message_tokens(prompt, "gpt-4o") <= budget
+    kept = [line[2:] for line in knowledge_lines(prompt)]
+    assert kept == CHUNKS[:len(kept)]
+    history = [message["content"] for message in prompt if "conversation history" in message["content"]]
+    if history:
+        entries = history[0].split("\n")[1:]
+        assert entries == HISTORY[len(HISTORY) - len(entries):]
+    assert prompt[-1] == {"role": "user", "content": "question?"}
+
+
+def test_last_fitting_chunk_is_shortened():
+    prompt = build_prompt(None, None, None, knowledge_chunks=CHUNKS[:2], token_budget=30, model="gpt-4o",
+                          min_chunk_tokens=8)
+    lines = knowledge_lines(prompt)
+    assert len(lines) == 1
+    assert 0 < len(lines[0][2:]) < len(CHUNKS[0]) and CHUNKS[0].startswith(lines[0][2:].strip())
+    assert count_message_tokens(prompt, "gpt-4o") <= 30
+
+
+def test_client_without_room_for_the_prompt_does_not_trim():
+    for module in ("google.generativeai", "ollama", "llama_cpp"):
+        pytest.importorskip(module)  # provider SDKs imported by LLMClient
+    from integrations.llm.llm_interface import LLMClient
+
+    # The defaults reserve the whole context window for the answer
+    client = LLMClient({"llm_config": {"context_window": 10000, "max_tokens": 10000}})
+    assert client.prompt_budget is None
+    prompt = client._prepare_prompt("question?", "You are a bot.", HISTORY, "gpt-4o", CHUNKS)
+    assert len(knowledge_lines(prompt)) == len(CHUNKS)
+
+    client = LLMClient({"llm_config": {"context_window": 10000, "max_tokens": 9800}})
+    assert client.prompt_budget == 200
+    prompt = client._prepare_prompt("question?", "You are a bot.", HISTORY, "gpt-4o", CHUNKS)
+    assert count_message_tokens(prompt, "gpt-4o") <= 200
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from integrations.llm.provider_router import ProviderRouter
+
+
+def stub_providers(latencies, failing=()):
+    """call(provider, prompt, temperature) answering after the provider's latency, or raising for `failing`."""
+    calls = []
+
+    def call(provider, prompt, temperature):
+        calls.append(provider)
+        time.sleep(latencies[provider])
+        if provider in failing:
+            raise RuntimeError(f"{provider} is down")
+        return f"answer from {provider}"
+
+    return call, calls
+
+
+def router(**settings):
+    return ProviderRouter({"providers": ["primary", "secondary"], "hedge_after_ms": 100, **settings})
+
+
+def test_slow_primary_is_hedged_and_the_faster_answer_wins():
+    call, calls = stub_providers({"primary": 1.0, "secondary": 0.05})
+    started = time.monotonic()
+    assert router().ask(call, "prompt", 0.7) == "answer from secondary"
+
+    assert time.monotonic() - started < 0.5  # hedge after 0.1s + 0.05s, not the primary's 1s
+    assert calls == ["primary", "secondary"]
+
+
+def test_no_hedge_before_the_deadline():
+    call, calls = stub_providers({"primary": 0.02, "secondary": 0.02})
+    routing = router()
+    assert routing.ask(call, "prompt", 0.7) == "answer from primary"
+    assert calls == ["primary"]
+    assert routing.stats()["secondary"]["hedges"] == 0
+
+
+def test_hedging_disabled_waits_for_the_primary():
+    call, calls = stub_providers({"primary": 0.3, "secondary": 0.01})
+    assert router(hedge=False).ask(call, "prompt", 0.7) == "answer from primary"
+    assert calls == ["primary"]
+
+
+def test_failing_provider_fails_over_and_cools_down():
+    call, calls = stub_providers({"primary": 0.01, "secondary": 0.01}, failing={"primary"})
+    routing = router(failure_cooldown_s=60)
+    assert routing.ask(call, "prompt", 0.7) == "answer from secondary"
+    assert calls == ["primary", "secondary"]
+
+    assert routing.ranked() == ["secondary", "primary"]  # primary is in cooldown
+    calls.clear()
+    assert routing.ask(call, "prompt", 0.7) == "answer from secondary"
+    assert calls == ["secondary"]
+    assert routing.stats()["primary"]["failures"] == 1
+
+
+def test_error_when_every_provider_fails():
+    call, _ = stub_providers({"primary": 0.01, "secondary": 0.01}, failing={"primary", "secondary"})
+    with pytest.raises(RuntimeError):
+        router().ask(call, "prompt", 0.7)
+
+
+def test_faster_provider_is_ranked_first():
+    call, _ = stub_providers({"primary": 0.05, "secondary": 0.01})
+    routing = router(hedge=False)
+    routing.ask(call, "prompt", 0.7)  # primary: first in the list while both are untried
+    routing._run(call, "secondary", "prompt", 0.7)
+    assert routing.ranked() == ["secondary", "primary"]
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from integrations.vectordb.quantization import approximate_scores, create_quantizer
+
+DIM = 64
+K = 10
+OVERSAMPLING = 3
+
+
+def clustered(rows: int, seed: int):
+    """Unit vectors around a few dozen topics, like chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(40, DIM))
+    vectors = centers[rng.integers(0, len(centers), rows)] + 0.6 * rng.normal(size=(rows, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def exact_top(vectors, query, k, distance):
+    scores = vectors @ query if distance != "EUCLID" else -np.linalg.norm(vectors - query, axis=1)
+    return set(np.argsort(-scores)[:k])
+
+
+def rescored_top(quantizer, codes, vectors, query, k, distance, rescore=True):
+    """First pass on the codes, then (optionally) full-precision rescoring of k * OVERSAMPLING candidates."""
+    sqnorms = np.einsum("ij,ij->i", vectors, vectors)
+    approx = approximate_scores(quantizer, codes, query, distance, sqnorms)
+    order = np.argsort(-approx if distance != "EUCLID" else approx)
+    if not rescore:
+        return set(order[:k])
+    candidates = order[:k * OVERSAMPLING]
+    return set(candidates[list(exact_top(vectors[candidates], query, k, distance))])
+
+
+def recall(quantizer, distance, rescore=True):
+    vectors, queries = clustered(3000, seed=0), clustered(40, seed=1)
+    quantizer.fit(vectors[:1000])
+    codes = quantizer.encode(vectors)
+    hits = [len(rescored_top(quantizer, codes, vectors, query, K, distance, rescore)
+                & exact_top(vectors, query, K, distance)) for query in queries]
+    return sum(hits) / (K * len(queries))
+
+
+@pytest.mark.parametrize("distance", ["COSINE", "EUCLID"])
+@pytest.mark.parametrize("kind, threshold", [("scalar", 0.97), ("product", 0.8)])
+def test_rescored_recall(kind, threshold, distance):
+    assert recall(create_quantizer({"type": kind, "pq_compression": "x16"}, DIM), distance) >= threshold
+
+
+def test_rescoring_improves_product_recall():
+    without = recall(create_quantizer({"type": "product"}, DIM), "COSINE", rescore=False)
+    assert recall(create_quantizer({"type": "product"}, DIM), "COSINE") > without
+
+
+@pytest.mark.parametrize("kind", ["scalar", "product"])
+def test_state_round_trip(kind, tmp_path):
+    vectors, query = clustered(500, seed=2), clustered(1, seed=3)[0]
+    quantizer = create_quantizer({"type": kind}, DIM)
+    quantizer.fit(vectors)
+    path = tmp_path / "quantizer.npz"
+    np.savez(path, **quantizer.state())  # as the local store persists it
+
+    restored = create_quantizer({"type": kind}, DIM)
+    with np.load(path) as state:
+        restored.load_state({name: state[name] for name in state.files})
+    codes = quantizer.encode(vectors)
+    assert np.array_equal(restored.encode(vectors), codes)
+    assert np.allclose(restored.dot(codes, query), quantizer.dot(codes, query))
+
+
+def test_disabled_quantization():
+    assert create_quantizer({"type": "none"}, DIM) is None
+    assert create_quantizer(None, DIM) is None
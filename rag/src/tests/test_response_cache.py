@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+import integrations.llm.response_cache as response_cache
+from integrations.llm.response_cache import LLMResponseCache
+
+PROMPT = [{"role": "system", "content": "You are a bot."}, {"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), ttl_seconds=60, max_entries=3)
+
+
+def key(**changes):
+    request = {"provider": "openai", "model": "gpt-4o", "temperature": 0.7, "top_p": 1.0, "max_tokens": 512,
+               "prompt": PROMPT, **changes}
+    return LLMResponseCache.make_key(**request)
+
+
+@pytest.mark.parametrize("changes", [
+    {"provider": "ollama"},
+    {"model": "gpt-4o-mini"},
+    {"temperature": 0.2},
+    {"top_p": 0.9},
+    {"max_tokens": 256},
+    {"prompt": PROMPT[:1] + [{"role": "user", "content": "hi!"}]},
+])
+def test_key_covers_provider_model_sampling_and_prompt(changes):
+    assert key(**changes) != key()
+    assert key() == key(prompt=[dict(message) for message in PROMPT])
+
+
+def test_hit_after_put(cache):
+    assert cache.get(key()) is None
+    cache.put(key(), "hello")
+    assert cache.get(key()) == "hello"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), ttl_seconds=0.05, max_entries=10)
+    cache.put(key(), "hello")
+    time.sleep(0.1)
+    assert cache.get(key()) is None
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    monkeypatch.setattr(response_cache, "EVICT_EVERY", 5)
+    keys = [key(max_tokens=tokens) for tokens in range(5)]
+    for i, cache_key in enumerate(keys[:4]):
+        cache.put(cache_key, f"answer {i}")
+        time.sleep(0.002)  # distinct access times
+    cache.get(keys[0])  # recently used again
+    time.sleep(0.002)
+    cache.put(keys[4], "answer 4")  # fifth store: eviction pass down to max_entries
+
+    assert cache.stats()["entries"] == 3
+    assert [cache.get(cache_key) is not None for cache_key in keys] == [True, False, False, True, True]
+
+
+def test_shared_file_between_instances(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    LLMResponseCache(path, ttl_seconds=60, max_entries=10).put(key(), "hello")
+    assert LLMResponseCache(path, ttl_seconds=60, max_entries=10).get(key()) == "hello"
+
+
+def test_client_answers_repeated_prompts_from_the_cache(tmp_path, monkeypatch):
+    for module in ("google.generativeai", "ollama", "llama_cpp"):
+        pytest.importorskip(module)  # provider SDKs imported by LLMClient
+    import integrations.llm.llm_interface as llm_interface
+
+    answers = iter(["Error: provider down", "fresh answer", "unexpected third call"])
+    monkeypatch.setattr(llm_interface, "openai_call", lambda *args: next(answers))
+    client = llm_interface.LLMClient({
+        "llm_config": {"provider": "openai", "context_window": 8192, "max_tokens": 512},
+        "llm_cache": {"enabled": True, "path": str(tmp_path / "llm_cache.sqlite")}
+    })
+
+    assert client.ask("hi", "You are a bot.") == "Error: provider down"  # errors are never cached
+    assert client.ask("hi", "You are a bot.") == "fresh answer"
+    assert client.ask("hi", "You are a bot.") == "fresh answer"
+    assert client.ask("hi", "You are a bot.", use_cache=False) == "unexpected third call"
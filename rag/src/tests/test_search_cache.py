@@ -0,0 +1,46 @@
+import time
+
+from integrations.vectordb.search_cache import SearchResultCache
+
+RESULTS = [{"text": "chunk", "score": 0.9}]
+
+
+def test_key_normalizes_whitespace_but_keeps_case():
+    cache = SearchResultCache(ttl_seconds=60, max_entries=8)
+    assert cache.make_key("docs", "  reset   router ", 0.5, 5) == cache.make_key("docs", "reset router", 0.5, 5)
+    # Embedding models are case-sensitive, so "US" and "us" are different searches
+    assert cache.make_key("docs", "US", 0.5, 5) != cache.make_key("docs", "us", 0.5, 5)
+
+
+def test_invalidate_hides_cached_results():
+    cache = SearchResultCache(ttl_seconds=60, max_entries=8)
+    key = cache.make_key("docs", "query", 0.5, 5, search_mode="dense")
+    cache.put(key, RESULTS)
+    assert cache.get(key) == RESULTS
+
+    cache.invalidate("docs")
+    assert cache.get(cache.make_key("docs", "query", 0.5, 5, search_mode="dense")) is None
+
+
+def test_results_of_a_search_overtaken_by_an_insert_are_not_stored():
+    cache = SearchResultCache(ttl_seconds=60, max_entries=8)
+    key = cache.make_key("docs", "query", 0.5, 5)
+    cache.invalidate("docs")  # an insert lands while the search runs
+    cache.put(key, RESULTS)
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_and_least_recently_used_entries_are_dropped():
+    cache = SearchResultCache(ttl_seconds=0.01, max_entries=8)
+    key = cache.make_key("docs", "query", 0.5, 5)
+    cache.put(key, RESULTS)
+    time.sleep(0.02)
+    assert cache.get(key) is None
+
+    cache = SearchResultCache(ttl_seconds=60, max_entries=2)
+    keys = [cache.make_key("docs", f"query {i}", 0.5, 5) for i in range(3)]
+    cache.put(keys[0], RESULTS)
+    cache.put(keys[1], RESULTS)
+    cache.get(keys[0])
+    cache.put(keys[2], RESULTS)
+    assert cache.get(keys[1]) is None and cache.get(keys[0]) == RESULTS
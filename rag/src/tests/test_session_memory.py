@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from integrations.llm.memory import AgentMemory
+from service.session_store import SessionStore
+
+
+def conversation(memory, turns, start=0):
+    for turn in range(start, start + turns):
+        memory.add_message("user", f"question {turn}")
+        memory.add_message("bot", f"answer {turn}")
+
+
+def contents(memory):
+    return [message["content"] for message in memory.get_history()]
+
+
+def test_least_recently_used_session_spills_and_restores(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite"), max_sessions=2)
+    conversation(store.get("a"), 2)
+    store.get("a").compact(2, "talked about a")
+    store.get("b")
+    store.get("a")  # "b" is now the least recently used
+    store.get("c")
+
+    stats = store.stats()
+    assert stats["live"] == 2 and stats["on_disk"] == 1 and stats["spilled"] == 1
+    assert store.get("b", create=False) is not None and store.stats()["restored"] == 1  # spills "a"
+
+    restored = store.get("a", create=False)
+    assert contents(restored) == ["question 1", "answer 1"]
+    assert restored.summary == "talked about a" and restored.summarized_messages == 2
+
+
+def test_flushed_sessions_survive_a_restart(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite"))
+    conversation(store.get("a"), 3)
+    store.flush()
+
+    reopened = SessionStore(str(tmp_path / "sessions.sqlite"))
+    assert contents(reopened.get("a", create=False))[-1] == "answer 2"
+    assert reopened.get("unknown", create=False) is None
+
+
+def test_compact_keeps_recent_messages_and_summary():
+    memory = AgentMemory(max_size=10)
+    conversation(memory, 3)
+    memory.compact(2, "earlier turns")
+
+    assert contents(memory) == ["question 2", "answer 2"]
+    assert memory.summary == "earlier turns" and memory.summarized_messages == 4
+    assert contents(AgentMemory.load(memory.dump())) == contents(memory)
+
+
+@pytest.fixture
+def agent():
+    for module in ("sentence_transformers", "google.generativeai", "ollama", "llama_cpp"):
+        pytest.importorskip(module)  # imported by AgentAI's vector store and LLM client
+    from service.agent_ai import AgentAI
+
+    class SlowSummarizer:
+        model = "gpt-4o"
+        prompt_budget = None
+        history_token_share = 0.3
+
+        def __init__(self):
+            self.prompts = []
+
+        def ask(self, user_input, knowledge):
+            self.prompts.append(user_input)
+            time.sleep(0.2)
+            return f"summary #{len(self.prompts)}"
+
+    agent = AgentAI.__new__(AgentAI)
+    agent.llm = SlowSummarizer()
+    agent.history_length = 4
+    agent.keep_recent = 2
+    agent.user_role, agent.bot_role = "user", "bot"
+    agent.logger = logging.getLogger("test")
+    return agent
+
+
+def test_history_is_summarized_once_it_outgrows_history_length(agent):
+    memory = AgentMemory()
+    conversation(memory, 2)
+    assert agent._history_entries(memory)[0] == "user: question 0"  # 4 messages: nothing to compact
+    assert agent.llm.prompts == []
+
+    conversation(memory, 1, start=2)
+    entries = agent._history_entries(memory)
+    assert entries == ["Summary of the earlier conversation: summary #1", "user: question 2", "bot: answer 2"]
+    assert "question 0" in agent.llm.prompts[0] and "answer 1" in agent.llm.prompts[0]
+
+
+def test_messages_added_during_a_summary_are_kept(agent):
+    memory = AgentMemory()
+    conversation(memory, 3)
+    compacting = threading.Thread(target=agent._history_entries, args=(memory,))
+    compacting.start()
+    time.sleep(0.05)  # the summary is being written
+    agent._remember(memory, "question 3", "answer 3")
+    compacting.join()
+
+    assert contents(memory) == ["question 2", "answer 2", "question 3", "answer 3"]
+    assert memory.summarized_messages == 4
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from helpers.single_flight import SingleFlight
+
+CALLERS = 5
+
+
+def wait_for(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.005)
+
+
+def run_concurrently(flight, func):
+    """Calls `flight.do("key", func)` from CALLERS threads; `func` must block until the followers have joined."""
+    with ThreadPoolExecutor(CALLERS) as pool:
+        futures = [pool.submit(flight.do, "key", func) for _ in range(CALLERS)]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_do_runs_concurrent_identical_calls_once():
+    flight, runs = SingleFlight("test"), []
+
+    def compute():
+        runs.append(1)
+        wait_for(lambda: flight.stats()["deduplicated"] == CALLERS - 1)
+        return "result"
+
+    assert run_concurrently(flight, compute) == ["result"] * CALLERS
+    assert len(runs) == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_do_passes_the_leader_exception_to_every_follower():
+    flight = SingleFlight("test")
+
+    def fail():
+        wait_for(lambda: flight.stats()["deduplicated"] == CALLERS - 1)
+        raise ValueError("boom")
+
+    errors = run_concurrently(flight, fail)
+    assert all(isinstance(error, ValueError) and str(error) == "boom" for error in errors)
+
+
+def test_do_does_not_cache_finished_calls():
+    flight, runs = SingleFlight("test"), []
+    flight.do("key", runs.append, 1)
+    flight.do("key", runs.append, 2)
+    assert runs == [1, 2]
+
+
+def test_ado_runs_concurrent_identical_calls_once():
+    flight, runs = SingleFlight("test"), []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("key", compute) for _ in range(CALLERS)))
+
+    assert asyncio.run(main()) == ["result"] * CALLERS
+    assert len(runs) == 1
+    assert flight.stats() == {"name": "test", "leaders": 1, "deduplicated": CALLERS - 1, "in_flight": 0}
+
+
+def test_ado_passes_the_leader_exception_to_every_follower():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("key", fail) for _ in range(CALLERS)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, ValueError) and str(error) == "boom" for error in errors)
+
+
+def test_ado_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.ado("key", compute))
+        follower = asyncio.create_task(flight.ado("key", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "result"
@@ -0,0 +1,49 @@
+import pytest
+
+from integrations.vectordb.sparse_index import SparseIndex
+
+
+def chunk(text, tags=None):
+    return {"text": text, "document_id": "manual", "tags": tags or []}
+
+
+@pytest.mark.parametrize("merge_docs", [20_000, 2], ids=["delta", "merged"])
+def test_search_after_reingestion(tmp_path, merge_docs):
+    index = SparseIndex(str(tmp_path), merge_docs=merge_docs)
+    # Re-ingesting supersedes the earlier rows of the same ids; their postings must not count towards df
+    for tags in (["v1"], ["v2"], ["v3"]):
+        index.add(["a", "b"], [chunk("the part SKU-77 ships monthly", tags), chunk("unrelated notes", tags)])
+
+    hits = index.search("SKU-77", 5)
+    assert [payload["id"] for _, payload in hits] == ["a"]
+    assert hits[0][0] > 0
+    assert hits[0][1]["tags"] == ["v3"]
+
+    reopened = SparseIndex(str(tmp_path), merge_docs=merge_docs)
+    assert [payload["id"] for _, payload in reopened.search("SKU-77", 5)] == ["a"]
+
+
+def test_merge_compacts_deleted_postings(tmp_path):
+    index = SparseIndex(str(tmp_path), merge_docs=2)
+    for _ in range(5):
+        index.add(["a"], [chunk("alpha beta gamma")])
+
+    stats = index.stats()
+    assert stats["rows"] == 5 and stats["deleted_rows"] == 4
+    assert stats["postings"] <= 2 * 3  # at most the live row plus one unmerged re-ingestion
+
+
+def test_delete_document(tmp_path):
+    index = SparseIndex(str(tmp_path))
+    index.add(["a", "b"], [chunk("alpha"), {"text": "alpha", "document_id": "other", "tags": []}])
+    index.delete_document("manual")
+
+    assert [payload["id"] for _, payload in index.search("alpha", 5)] == ["b"]
+
+
+def test_second_instance_sees_writes(tmp_path):
+    writer = SparseIndex(str(tmp_path))
+    reader = SparseIndex(str(tmp_path))
+    writer.add(["a"], [chunk("written elsewhere")])
+
+    assert [payload["id"] for _, payload in reader.search("elsewhere", 5)] == ["a"]